@@ -0,0 +1,242 @@
+"""
+Clients for submitting JSONL request files to a batch processing service.
+"""
+
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional, Union
+import aiofiles
+from openai import AsyncOpenAI
+from agents.openai_client import openai_client_factory
+
+# Batch states after which the batch will not change anymore
+TERMINAL_BATCH_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+# Produces the assistant message content for a chat completion request body
+Responder = Callable[[Dict], Awaitable[str]]
+
+
+class OpenAIBatchClient:
+    """Runs request files through the OpenAI Batch API."""
+
+    def __init__(self, client: Optional[AsyncOpenAI] = None, completion_window: str = "24h"):
+        """
+        Initialize the batch client.
+
+        Args:
+            client: Optional OpenAI client (defaults to the shared application client)
+            completion_window: Time frame in which the batch should be processed
+        """
+        self._client = client
+        self.completion_window = completion_window
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        """Get the OpenAI client, falling back to the shared application client."""
+        if self._client is None:
+            self._client = openai_client_factory.get_client()
+        return self._client
+
+    async def submit(self, input_path: Path) -> str:
+        """
+        Upload a request file and start processing it.
+
+        Args:
+            input_path: JSONL file of chat completion requests
+
+        Returns:
+            Id of the created batch
+        """
+        input_file = await self.client.files.create(file=input_path, purpose="batch")
+        batch = await self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window=self.completion_window
+        )
+        return batch.id
+
+    async def status(self, batch_id: str) -> str:
+        """
+        Get the processing state of a batch.
+
+        Args:
+            batch_id: The batch id
+
+        Returns:
+            The batch status, such as in_progress or completed
+        """
+        batch = await self.client.batches.retrieve(batch_id)
+        return batch.status
+
+    async def download(self, batch_id: str, output_path: Path) -> None:
+        """
+        Write the results of a finished batch to a JSONL file.
+
+        Args:
+            batch_id: The batch id
+            output_path: Where to write one result per line
+        """
+        batch = await self.client.batches.retrieve(batch_id)
+
+        async with aiofiles.open(output_path, 'wb') as f:
+            # Failed requests are reported in a separate error file
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if file_id:
+                    content = await self.client.files.content(file_id)
+                    await f.write(content.content)
+
+
+class LocalBatchClient:
+    """
+    File-based stand-in for the Batch API.
+
+    Request files are copied into a directory per batch and answered there,
+    producing output in the Batch API format, so bulk generation can be run
+    end to end without network access.
+    """
+
+    def __init__(self, work_dir: Union[str, Path] = "./cache_data/bulk/local", responder: Optional[Responder] = None):
+        """
+        Initialize the local batch client.
+
+        Args:
+            work_dir: Directory holding the batches
+            responder: Optional function answering a request body (defaults to
+                an offline placeholder script)
+        """
+        self.work_dir = Path(work_dir)
+        self.responder = responder or offline_responder
+
+    async def submit(self, input_path: Path) -> str:
+        """
+        Store a request file as a new batch.
+
+        Args:
+            input_path: JSONL file of chat completion requests
+
+        Returns:
+            Id of the created batch
+        """
+        batch_id = f"local_batch_{uuid.uuid4().hex}"
+        batch_dir = self.work_dir / batch_id
+        batch_dir.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(input_path, batch_dir / "input.jsonl")
+        return batch_id
+
+    async def status(self, batch_id: str) -> str:
+        """
+        Get the processing state of a batch, answering it on first check.
+
+        Args:
+            batch_id: The batch id
+
+        Returns:
+            completed once the output file is written, failed for unknown batches
+        """
+        batch_dir = self.work_dir / batch_id
+        if not (batch_dir / "input.jsonl").exists():
+            return "failed"
+
+        if not (batch_dir / "output.jsonl").exists():
+            await self._process(batch_dir)
+        return "completed"
+
+    async def download(self, batch_id: str, output_path: Path) -> None:
+        """
+        Copy the results of a finished batch to a JSONL file.
+
+        Args:
+            batch_id: The batch id
+            output_path: Where to write one result per line
+        """
+        shutil.copyfile(self.work_dir / batch_id / "output.jsonl", output_path)
+
+    async def _process(self, batch_dir: Path) -> None:
+        """Answer every request of a batch and write the output file."""
+        temp_path = batch_dir / "output.jsonl.part"
+
+        async with aiofiles.open(batch_dir / "input.jsonl", 'r', encoding='utf-8') as src, \
+                aiofiles.open(temp_path, 'w', encoding='utf-8') as dest:
+            async for line in src:
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                await dest.write(json.dumps(await self._answer(request)) + "\n")
+
+        os.replace(temp_path, batch_dir / "output.jsonl")
+
+    async def _answer(self, request: Dict) -> Dict:
+        """Build the Batch API result line for one request."""
+        result = {
+            "id": f"batch_req_{uuid.uuid4().hex}",
+            "custom_id": request.get("custom_id"),
+            "response": None,
+            "error": None
+        }
+
+        try:
+            content = await self.responder(request["body"])
+        except Exception as e:
+            result["error"] = {"code": "local_responder_error", "message": str(e)}
+            return result
+
+        result["response"] = {
+            "status_code": 200,
+            "request_id": uuid.uuid4().hex,
+            "body": {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request["body"].get("model"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop"
+                }]
+            }
+        }
+        return result
+
+
+async def offline_responder(body: Dict) -> str:
+    """
+    Answer a chat completion request without calling a model.
+
+    Args:
+        body: The chat completion request body
+
+    Returns:
+        A placeholder script that reads back the request prompt
+    """
+    prompt = next(
+        (message["content"] for message in reversed(body.get("messages", [])) if message.get("role") == "user"),
+        ""
+    )
+    return "\n\n".join([
+        "Welcome to this episode. This script was produced by the offline batch stand-in "
+        "instead of a language model, so it simply reads back what was asked for.",
+        prompt.strip(),
+        "Thanks for listening, and see you next time."
+    ])
+
+
+def create_batch_client(backend: str = "openai", work_dir: str = "./cache_data/bulk/local"):
+    """
+    Create the batch client for a backend name.
+
+    Args:
+        backend: openai for the Batch API or local for the file-based stand-in
+        work_dir: Directory of the local stand-in
+
+    Returns:
+        The batch client
+    """
+    if backend == "local":
+        return LocalBatchClient(work_dir)
+    if backend == "openai":
+        return OpenAIBatchClient()
+    raise ValueError(f"Unknown batch backend: {backend}")
@@ -0,0 +1,143 @@
+"""
+Circuit breaking for calls to a degraded upstream API.
+"""
+
+import math
+import time
+import httpx
+from openai import APIConnectionError, InternalServerError
+
+# Errors suggesting the upstream is unreachable or failing, as opposed to rejecting a request
+OUTAGE_ERRORS = (APIConnectionError, InternalServerError, httpx.TransportError)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because its circuit is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        """
+        Initialize the error.
+
+        Args:
+            name: Name of the circuit
+            retry_after: Seconds until the circuit lets calls through again
+        """
+        super().__init__(f"OpenAI {name} API is unavailable, retry in {math.ceil(retry_after)} seconds")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Fails calls fast while an upstream dependency is down.
+
+    The circuit opens after a run of consecutive outage errors. While open,
+    calls are rejected immediately instead of waiting for the client timeout.
+    Once the reset timeout has passed the circuit is half-open: a limited
+    number of probe calls go through, and the first one to succeed closes
+    the circuit again while a failure reopens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_calls: int = 1
+    ):
+        """
+        Initialize the circuit breaker.
+
+        Args:
+            name: Name of the circuit, used in errors and statistics
+            failure_threshold: Consecutive outage errors that open the circuit
+            reset_timeout: Seconds the circuit stays open before probing
+            half_open_calls: Probe calls allowed at once while half-open
+        """
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = max(1, half_open_calls)
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self.times_opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        """Get the current state, moving from open to half-open once the reset timeout has passed."""
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def retry_after(self) -> float:
+        """
+        Get how long callers should wait before trying again.
+
+        Returns:
+            Seconds until the circuit lets calls through, 0 if it does now
+        """
+        state = self.state
+        if state == self.OPEN:
+            return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+        if state == self.HALF_OPEN and self._probes >= self.half_open_calls:
+            return 1.0
+        return 0.0
+
+    def before_call(self) -> None:
+        """
+        Admit a call or reject it.
+
+        Raises:
+            CircuitOpenError: If the circuit is open or all probe slots are taken
+        """
+        retry_after = self.retry_after()
+        if retry_after > 0:
+            self.rejected += 1
+            raise CircuitOpenError(self.name, retry_after)
+
+        if self._state == self.HALF_OPEN:
+            self._probes += 1
+
+    def record_success(self) -> None:
+        """Record a call that reached a responsive upstream, closing the circuit."""
+        self._state = self.CLOSED
+        self._failures = 0
+        self._probes = 0
+
+    def record_failure(self) -> None:
+        """Record an outage error, opening the circuit after too many in a row."""
+        self._failures += 1
+        if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                self.times_opened += 1
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+            self._probes = 0
+
+    def release(self) -> None:
+        """Give back the probe slot of a call that was abandoned without an outcome."""
+        if self._state == self.HALF_OPEN and self._probes > 0:
+            self._probes -= 1
+
+    def stats(self) -> dict:
+        """
+        Get circuit statistics.
+
+        Returns:
+            Dictionary with the state, failure run and rejection counts
+        """
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "retry_after_seconds": round(self.retry_after(), 2),
+            "times_opened": self.times_opened,
+            "rejected": self.rejected
+        }
@@ -0,0 +1,102 @@
+"""
+Latency tracking and budgeting for hedged API requests.
+"""
+
+import math
+from collections import deque
+from typing import Deque, Optional
+
+
+class HedgingPolicy:
+    """
+    Decides when a slow request deserves a duplicate.
+
+    A request becomes eligible for a hedge once it has run longer than the
+    chosen percentile of recently observed latencies. Hedges are paid for
+    from a global budget that every primary request tops up by a fixed
+    ratio, so at most that fraction of extra requests is ever sent.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        window: int = 200,
+        min_samples: int = 20,
+        budget_ratio: float = 0.1,
+        max_budget: float = 10.0
+    ):
+        """
+        Initialize the hedging policy.
+
+        Args:
+            percentile: Latency percentile after which a request is hedged
+            window: Number of recent latencies the percentile is computed over
+            min_samples: Latencies needed before any request is hedged
+            budget_ratio: Hedges allowed per primary request
+            max_budget: Maximum number of hedges that can be saved up
+        """
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.budget_ratio = budget_ratio
+        self.max_budget = max_budget
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._budget = max_budget
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self.hedges_denied = 0
+
+    def threshold(self) -> Optional[float]:
+        """
+        Get how long a request may run before it is hedged.
+
+        Returns:
+            Threshold in seconds, or None while too few latencies are known
+        """
+        if len(self._latencies) < self.min_samples:
+            return None
+
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, math.ceil(self.percentile * len(ordered)) - 1)
+        return ordered[index]
+
+    def record(self, latency: float) -> None:
+        """
+        Record the latency of a finished request and top up the hedge budget.
+
+        Args:
+            latency: Seconds the request took
+        """
+        self._latencies.append(latency)
+        self._budget = min(self.max_budget, self._budget + self.budget_ratio)
+
+    def try_hedge(self) -> bool:
+        """
+        Take one hedge from the budget.
+
+        Returns:
+            True if a hedge may be sent
+        """
+        if self._budget < 1.0:
+            self.hedges_denied += 1
+            return False
+
+        self._budget -= 1.0
+        self.hedges_sent += 1
+        return True
+
+    def stats(self) -> dict:
+        """
+        Get hedging statistics.
+
+        Returns:
+            Dictionary with the current threshold, budget and hedge counts
+        """
+        threshold = self.threshold()
+        return {
+            "threshold_seconds": round(threshold, 3) if threshold is not None else None,
+            "samples": len(self._latencies),
+            "budget": round(self._budget, 2),
+            "hedges_sent": self.hedges_sent,
+            "hedges_won": self.hedges_won,
+            "hedges_denied": self.hedges_denied
+        }
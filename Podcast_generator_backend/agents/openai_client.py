@@ -0,0 +1,84 @@
+"""
+Shared OpenAI client with a pooled, keep-alive HTTP connection.
+"""
+
+import os
+from typing import Optional
+import httpx
+from dotenv import load_dotenv
+from openai import AsyncOpenAI
+
+load_dotenv()
+
+
+class OpenAIClientFactory:
+    """Builds and owns the application-wide OpenAI client."""
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 120.0,
+        connect_timeout: float = 10.0,
+        max_retries: int = 0
+    ):
+        """
+        Initialize the client factory.
+
+        Args:
+            max_connections: Maximum number of open connections to the API
+            max_keepalive_connections: Maximum number of idle connections kept open
+            keepalive_expiry: Seconds an idle connection is kept for reuse
+            timeout: Default timeout for a request in seconds
+            connect_timeout: Timeout for establishing a connection in seconds
+            max_retries: Retries done by the SDK itself (rate limits and transient
+                errors are retried by the rate limit scheduler)
+        """
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_retries = max_retries
+        self._client: Optional[AsyncOpenAI] = None
+
+    def get_client(self) -> AsyncOpenAI:
+        """
+        Get the shared client, creating it on first use.
+
+        Returns:
+            The shared OpenAI client
+        """
+        if self._client is None:
+            api_key = os.getenv("OPENAI_API_KEY")
+            if not api_key or api_key == "your_openai_api_key_here":
+                raise ValueError("OpenAI API key not configured. Please set OPENAI_API_KEY in your .env file.")
+
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                    keepalive_expiry=self.keepalive_expiry
+                ),
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout)
+            )
+            self._client = AsyncOpenAI(api_key=api_key, http_client=http_client, max_retries=self.max_retries)
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close the shared client and its connection pool."""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+# Global OpenAI client factory instance
+openai_client_factory = OpenAIClientFactory(
+    max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "100")),
+    max_keepalive_connections=int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20")),
+    keepalive_expiry=float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "30")),
+    timeout=float(os.getenv("OPENAI_TIMEOUT", "120")),
+    connect_timeout=float(os.getenv("OPENAI_CONNECT_TIMEOUT", "10")),
+    max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "0"))
+)
@@ -0,0 +1,380 @@
+"""
+Rate-limit-aware scheduling of OpenAI API calls.
+"""
+
+import asyncio
+import os
+import random
+import re
+import time
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+from dotenv import load_dotenv
+from openai import APIConnectionError, InternalServerError, RateLimitError
+from agents.circuit_breaker import CircuitBreaker, OUTAGE_ERRORS
+
+load_dotenv()
+
+T = TypeVar("T")
+
+# Errors worth retrying; everything else surfaces immediately
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, InternalServerError)
+
+RESET_DURATION = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+RESET_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+class TokenBucket:
+    """Continuously refilling per-minute budget that callers reserve from."""
+
+    def __init__(self, per_minute: float):
+        """
+        Initialize the bucket.
+
+        Args:
+            per_minute: Units allowed per minute (0 disables the bucket)
+        """
+        self.per_minute = per_minute
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self._tokens = float(per_minute)
+        self._updated = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the bucket limits anything."""
+        return self.per_minute > 0
+
+    def reserve(self, amount: float) -> float:
+        """
+        Take units from the bucket, going into debt if needed.
+
+        Args:
+            amount: Units the call will consume
+
+        Returns:
+            Seconds to wait before the reservation is covered
+        """
+        if not self.enabled:
+            return 0.0
+
+        self._refill()
+        self._tokens -= min(amount, self.capacity)
+        return max(0.0, -self._tokens / self.rate)
+
+    def adjust(self, amount: float) -> None:
+        """
+        Correct an earlier reservation.
+
+        Args:
+            amount: Units to give back (positive) or charge extra (negative)
+        """
+        if not self.enabled:
+            return
+
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + amount)
+
+    def throttle(self, factor: float = 0.75, floor: float = 0.1) -> None:
+        """
+        Slow the refill rate and drain the bucket after upstream rejected a call.
+
+        Args:
+            factor: Multiplier applied to the current rate
+            floor: Lowest allowed fraction of the configured rate
+        """
+        if not self.enabled:
+            return
+
+        self._refill()
+        self.rate = max(self.rate * factor, self.per_minute / 60.0 * floor)
+        self._tokens = min(self._tokens, 0.0)
+
+    def recover(self, step: float = 0.1) -> None:
+        """
+        Raise the refill rate back towards the configured rate.
+
+        Args:
+            step: Fraction of the configured rate added per successful call
+        """
+        if not self.enabled:
+            return
+
+        self._refill()
+        configured = self.per_minute / 60.0
+        self.rate = min(configured, self.rate + configured * step)
+
+    def stats(self) -> dict:
+        """Get the configured and current per-minute rates."""
+        self._refill()
+        return {
+            "per_minute": self.per_minute,
+            "current_per_minute": round(self.rate * 60.0, 2),
+            "available": round(self._tokens, 2)
+        }
+
+    def _refill(self) -> None:
+        """Add the units accrued since the last update."""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class RateLimitScheduler:
+    """
+    Paces chat and speech calls against their upstream quotas.
+
+    Each API group also has a circuit breaker, so once upstream keeps failing
+    calls are rejected with CircuitOpenError instead of waiting for timeouts.
+    """
+
+    def __init__(
+        self,
+        chat_requests_per_minute: int = 500,
+        chat_tokens_per_minute: int = 30000,
+        speech_requests_per_minute: int = 500,
+        speech_chars_per_minute: int = 0,
+        max_retries: int = 5,
+        max_backoff: float = 60.0,
+        breaker_failures: int = 5,
+        breaker_reset_seconds: float = 30.0
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            chat_requests_per_minute: Chat completion requests allowed per minute
+            chat_tokens_per_minute: Chat completion tokens allowed per minute
+            speech_requests_per_minute: TTS requests allowed per minute
+            speech_chars_per_minute: TTS input characters allowed per minute (0 for no limit)
+            max_retries: Retries of a rate-limited or transiently failed call
+            max_backoff: Longest pause between attempts in seconds
+            breaker_failures: Consecutive outage errors that open a group's circuit
+            breaker_reset_seconds: Seconds an open circuit waits before probing upstream
+        """
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self._buckets: Dict[str, Dict[str, TokenBucket]] = {
+            "chat": {
+                "requests": TokenBucket(chat_requests_per_minute),
+                "tokens": TokenBucket(chat_tokens_per_minute)
+            },
+            "speech": {
+                "requests": TokenBucket(speech_requests_per_minute),
+                "characters": TokenBucket(speech_chars_per_minute)
+            }
+        }
+        self._breakers = {
+            group: CircuitBreaker(group, failure_threshold=breaker_failures, reset_timeout=breaker_reset_seconds)
+            for group in self._buckets
+        }
+        self._paused_until = {group: 0.0 for group in self._buckets}
+        self._backoff = {group: 0.0 for group in self._buckets}
+        self._rate_limited = {group: 0 for group in self._buckets}
+        self._retries = {group: 0 for group in self._buckets}
+
+    async def run_chat(self, call: Callable[[], Awaitable[T]], tokens: int) -> T:
+        """
+        Run a chat completion call within the chat quotas.
+
+        Args:
+            call: Function starting the API call
+            tokens: Estimated prompt plus completion tokens
+
+        Returns:
+            The result of the call
+        """
+        return await self._run("chat", {"requests": 1, "tokens": tokens}, call)
+
+    async def run_speech(self, call: Callable[[], Awaitable[T]], characters: int) -> T:
+        """
+        Run a TTS call within the speech quotas.
+
+        Args:
+            call: Function starting the API call
+            characters: Input characters sent to TTS
+
+        Returns:
+            The result of the call
+        """
+        return await self._run("speech", {"requests": 1, "characters": characters}, call)
+
+    def reconcile_tokens(self, estimated: int, actual: int) -> None:
+        """
+        Correct a chat token reservation once actual usage is known.
+
+        Args:
+            estimated: Tokens reserved before the call
+            actual: Tokens the call consumed
+        """
+        self._buckets["chat"]["tokens"].adjust(estimated - actual)
+
+    def circuit_retry_after(self) -> float:
+        """
+        Get how long until every API group accepts calls again.
+
+        Returns:
+            Seconds until the last open circuit starts probing, 0 if none is open
+        """
+        return max(
+            (breaker.retry_after() for breaker in self._breakers.values() if breaker.state == CircuitBreaker.OPEN),
+            default=0.0
+        )
+
+    def circuit_states(self) -> Dict[str, str]:
+        """Get the circuit state of each API group."""
+        return {group: breaker.state for group, breaker in self._breakers.items()}
+
+    def stats(self) -> dict:
+        """
+        Get scheduler statistics.
+
+        Returns:
+            Dictionary of bucket rates, pauses, retry counts and circuits per API group
+        """
+        now = time.monotonic()
+        return {
+            group: {
+                "buckets": {name: bucket.stats() for name, bucket in buckets.items() if bucket.enabled},
+                "paused_seconds": round(max(0.0, self._paused_until[group] - now), 2),
+                "rate_limited": self._rate_limited[group],
+                "retries": self._retries[group],
+                "circuit": self._breakers[group].stats()
+            }
+            for group, buckets in self._buckets.items()
+        }
+
+    async def _run(self, group: str, amounts: Dict[str, int], call: Callable[[], Awaitable[T]]) -> T:
+        """Acquire quota, run the call and retry it on retryable errors."""
+        breaker = self._breakers[group]
+        for attempt in range(self.max_retries + 1):
+            # Fails fast while upstream is down, also between retries
+            breaker.before_call()
+
+            try:
+                await self._acquire(group, amounts)
+                result = await call()
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
+            except Exception as e:
+                # Any answer other than an outage error shows upstream is reachable
+                if isinstance(e, OUTAGE_ERRORS):
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+
+                if not isinstance(e, RETRYABLE_ERRORS) or attempt == self.max_retries:
+                    raise
+                self._retries[group] += 1
+                if isinstance(e, RateLimitError):
+                    self._on_rate_limited(group, amounts, e)
+                else:
+                    await asyncio.sleep(self._jittered(min(self.max_backoff, 2 ** attempt)))
+                continue
+
+            breaker.record_success()
+            self._on_success(group)
+            return result
+
+    async def _acquire(self, group: str, amounts: Dict[str, int]) -> None:
+        """Wait out any pause on the group, then reserve from its buckets."""
+        while True:
+            pause = self._paused_until[group] - time.monotonic()
+            if pause <= 0:
+                break
+            await asyncio.sleep(pause)
+
+        buckets = self._buckets[group]
+        delay = max(buckets[name].reserve(amount) for name, amount in amounts.items())
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _on_rate_limited(self, group: str, amounts: Dict[str, int], error: RateLimitError) -> None:
+        """Pause the whole group and slow its buckets after a 429."""
+        self._rate_limited[group] += 1
+
+        buckets = self._buckets[group]
+        for name, amount in amounts.items():
+            buckets[name].adjust(amount)
+            buckets[name].throttle()
+
+        # Back off exponentially across consecutive 429s unless upstream says otherwise
+        self._backoff[group] = min(self.max_backoff, max(1.0, self._backoff[group] * 2))
+        delay = self._retry_after(error)
+        if delay is None:
+            delay = self._jittered(self._backoff[group])
+
+        # One pause for every caller of the group instead of a storm of retries
+        self._paused_until[group] = max(self._paused_until[group], time.monotonic() + delay)
+
+    def _on_success(self, group: str) -> None:
+        """Let the group's buckets creep back to the configured rates."""
+        self._backoff[group] = 0.0
+        for bucket in self._buckets[group].values():
+            bucket.recover()
+
+    def _retry_after(self, error: RateLimitError) -> Optional[float]:
+        """
+        Read how long upstream asked us to wait.
+
+        Args:
+            error: The rate limit error
+
+        Returns:
+            Seconds to wait, or None if the response does not say
+        """
+        response = getattr(error, "response", None)
+        if response is None:
+            return None
+        headers = response.headers
+
+        retry_after_ms = headers.get("retry-after-ms")
+        if retry_after_ms:
+            try:
+                return min(self.max_backoff, float(retry_after_ms) / 1000.0)
+            except ValueError:
+                pass
+
+        retry_after = headers.get("retry-after")
+        if retry_after:
+            try:
+                return min(self.max_backoff, float(retry_after))
+            except ValueError:
+                try:
+                    return min(self.max_backoff, max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time()))
+                except (TypeError, ValueError):
+                    pass
+
+        resets = [
+            self._parse_reset(headers.get(name))
+            for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+        ]
+        resets = [reset for reset in resets if reset is not None]
+        return min(self.max_backoff, max(resets)) if resets else None
+
+    def _parse_reset(self, value: Optional[str]) -> Optional[float]:
+        """Parse a reset duration such as '1s', '6m0s' or '20ms'."""
+        if not value:
+            return None
+
+        parts = RESET_DURATION.findall(value)
+        if not parts:
+            return None
+        return sum(float(number) * RESET_UNITS[unit] for number, unit in parts)
+
+    def _jittered(self, delay: float) -> float:
+        """Spread a delay so paused callers do not retry in lockstep."""
+        return delay * random.uniform(0.5, 1.0)
+
+
+# Global rate limit scheduler instance
+rate_limit_scheduler = RateLimitScheduler(
+    chat_requests_per_minute=int(os.getenv("OPENAI_CHAT_RPM", "500")),
+    chat_tokens_per_minute=int(os.getenv("OPENAI_CHAT_TPM", "30000")),
+    speech_requests_per_minute=int(os.getenv("OPENAI_TTS_RPM", "500")),
+    speech_chars_per_minute=int(os.getenv("OPENAI_TTS_CPM", "0")),
+    max_retries=int(os.getenv("OPENAI_RATE_LIMIT_RETRIES", "5")),
+    breaker_failures=int(os.getenv("OPENAI_BREAKER_FAILURES", "5")),
+    breaker_reset_seconds=float(os.getenv("OPENAI_BREAKER_RESET_SECONDS", "30"))
+)
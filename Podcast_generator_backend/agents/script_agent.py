@@ -2,30 +2,44 @@
 Script generation agent using GPT-4 to create podcast scripts.
 """
 
-import os
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional
 from openai import AsyncOpenAI
+from agents.openai_client import openai_client_factory
+from agents.rate_limiter import RateLimitScheduler, rate_limit_scheduler
 from models.request_models import Tone, Voice
 
+# Bump whenever the prompt template changes so cached scripts are not reused
+PROMPT_VERSION = "1"
+
 
 class ScriptAgent:
     """Agent for generating podcast scripts using GPT-4."""
     
-    def __init__(self):
-        """Initialize the script agent."""
+    def __init__(self, client: Optional[AsyncOpenAI] = None, rate_limiter: Optional[RateLimitScheduler] = None):
+        """
+        Initialize the script agent.
+        
+        Args:
+            client: Optional OpenAI client (defaults to the shared application client)
+            rate_limiter: Scheduler pacing chat calls (defaults to the shared scheduler)
+        """
         self.model = "gpt-4"
-        self._client = None
+        self.prompt_version = PROMPT_VERSION
+        self._client = client
+        self.rate_limiter = rate_limiter or rate_limit_scheduler
     
     @property
-    def client(self):
-        """Lazy-load the OpenAI client."""
+    def client(self) -> AsyncOpenAI:
+        """Get the OpenAI client, falling back to the shared application client."""
         if self._client is None:
-            api_key = os.getenv("OPENAI_API_KEY")
-            if not api_key or api_key == "your_openai_api_key_here":
-                raise ValueError("OpenAI API key not configured. Please set OPENAI_API_KEY in your .env file.")
-            self._client = AsyncOpenAI(api_key=api_key)
+            self._client = openai_client_factory.get_client()
         return self._client
     
+    @client.setter
+    def client(self, client: AsyncOpenAI) -> None:
+        """Inject the OpenAI client."""
+        self._client = client
+    
     def _get_tone_instructions(self, tone: Tone) -> str:
         """
         Get specific instructions for the requested tone.
@@ -125,15 +139,15 @@ class ScriptAgent:
         - Include audience engagement phrases
         """
     
-    async def generate_script(
-        self, 
-        topic: str, 
-        tone: Tone, 
+    def _build_messages(
+        self,
+        topic: str,
+        tone: Tone,
         duration_minutes: int = 5,
         user_preferences: Optional[Dict] = None
-    ) -> str:
+    ) -> List[Dict[str, str]]:
         """
-        Generate a podcast script using GPT-4.
+        Build the chat messages for a script generation request.
         
         Args:
             topic: The podcast topic
@@ -142,7 +156,7 @@ class ScriptAgent:
             user_preferences: Optional user preferences from memory
             
         Returns:
-            Generated podcast script
+            Chat completion messages
         """
         # Build the prompt
         tone_instructions = self._get_tone_instructions(tone)
@@ -184,28 +198,185 @@ class ScriptAgent:
         
         user_prompt = f"Create a podcast script about: {topic}"
         
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+    
+    def validate_script(self, script: Optional[str]) -> str:
+        """
+        Validate a generated script.
+        
+        Args:
+            script: The generated script
+            
+        Returns:
+            The stripped script
+        """
+        script = (script or "").strip()
+        
+        # Basic validation
+        if not script or len(script) < 100:
+            raise ValueError("Generated script is too short or empty")
+        
+        return script
+    
+    async def generate_script(
+        self, 
+        topic: str, 
+        tone: Tone, 
+        duration_minutes: int = 5,
+        user_preferences: Optional[Dict] = None
+    ) -> str:
+        """
+        Generate a podcast script using GPT-4.
+        
+        Args:
+            topic: The podcast topic
+            tone: The desired tone
+            duration_minutes: Target duration in minutes
+            user_preferences: Optional user preferences from memory
+            
+        Returns:
+            Generated podcast script
+        """
+        messages = self._build_messages(topic, tone, duration_minutes, user_preferences)
+        estimated_tokens = self._estimate_tokens(messages, duration_minutes)
+        
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.7,
-                top_p=0.9
+            response = await self.rate_limiter.run_chat(
+                lambda: self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=0.7,
+                    top_p=0.9
+                ),
+                tokens=estimated_tokens
             )
             print(response)
-            script = response.choices[0].message.content.strip()
+            if response.usage:
+                self.rate_limiter.reconcile_tokens(estimated_tokens, response.usage.total_tokens)
             
-            # Basic validation
-            if not script or len(script) < 100:
-                raise ValueError("Generated script is too short or empty")
+            return self.validate_script(response.choices[0].message.content)
             
-            return script
+        except Exception as e:
+            raise Exception(f"Failed to generate script: {str(e)}")
+    
+    async def stream_script(
+        self,
+        topic: str,
+        tone: Tone,
+        duration_minutes: int = 5,
+        user_preferences: Optional[Dict] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream a podcast script from GPT-4 as it is written.
+        
+        The caller is responsible for validating the assembled script.
+        
+        Args:
+            topic: The podcast topic
+            tone: The desired tone
+            duration_minutes: Target duration in minutes
+            user_preferences: Optional user preferences from memory
             
+        Yields:
+            Script text deltas in order
+        """
+        messages = self._build_messages(topic, tone, duration_minutes, user_preferences)
+        estimated_tokens = self._estimate_tokens(messages, duration_minutes)
+        
+        try:
+            stream = await self.rate_limiter.run_chat(
+                lambda: self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=0.7,
+                    top_p=0.9,
+                    stream=True,
+                    stream_options={"include_usage": True}
+                ),
+                tokens=estimated_tokens
+            )
+            
+            async for chunk in stream:
+                if chunk.usage:
+                    self.rate_limiter.reconcile_tokens(estimated_tokens, chunk.usage.total_tokens)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+                    
         except Exception as e:
             raise Exception(f"Failed to generate script: {str(e)}")
     
+    def build_batch_request(
+        self,
+        custom_id: str,
+        topic: str,
+        tone: Tone,
+        duration_minutes: int = 5,
+        user_preferences: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Build one line of a Batch API request file for a script.
+        
+        Args:
+            custom_id: Id used to match the result to its request
+            topic: The podcast topic
+            tone: The desired tone
+            duration_minutes: Target duration in minutes
+            user_preferences: Optional user preferences from memory
+            
+        Returns:
+            The batch request
+        """
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": self.model,
+                "messages": self._build_messages(topic, tone, duration_minutes, user_preferences),
+                "temperature": 0.7,
+                "top_p": 0.9
+            }
+        }
+    
+    def parse_batch_result(self, result: Dict) -> str:
+        """
+        Extract the script from one line of a Batch API output file.
+        
+        Args:
+            result: The batch result
+            
+        Returns:
+            Validated podcast script
+        """
+        response = result.get("response") or {}
+        if result.get("error") or response.get("status_code") != 200:
+            error = result.get("error") or response.get("body")
+            raise Exception(f"Failed to generate script: {error}")
+        
+        return self.validate_script(response["body"]["choices"][0]["message"]["content"])
+    
+    def _estimate_tokens(self, messages: List[Dict[str, str]], duration_minutes: int) -> int:
+        """
+        Estimate the tokens a script generation will consume.
+        
+        Args:
+            messages: The chat messages sent to the model
+            duration_minutes: Target duration in minutes
+            
+        Returns:
+            Estimated prompt plus completion tokens
+        """
+        # Roughly 4 characters per prompt token and 150 spoken words
+        # (about 200 tokens) per minute of script
+        prompt_chars = sum(len(message["content"]) for message in messages)
+        return prompt_chars // 4 + duration_minutes * 200
+    
     def estimate_duration(self, script: str) -> float:
         """
         Estimate the duration of a script in seconds.
@@ -2,30 +2,89 @@
 Text-to-Speech agent using OpenAI's TTS-1-HD model.
 """
 
+import asyncio
 import os
-from typing import Optional
+import random
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, List, Optional
+import aiofiles
+import httpx
 from openai import AsyncOpenAI
+from agents.hedging import HedgingPolicy
+from agents.openai_client import openai_client_factory
+from agents.rate_limiter import RateLimitScheduler, rate_limit_scheduler
+from cache.audio_cache import AudioSegmentCache
 from models.request_models import Voice
+from utils.audio_utils import audio_utils
+from utils.text_utils import text_utils, ScriptSegmenter
+
+# Maximum input length accepted by a single OpenAI TTS request
+MAX_TTS_INPUT_CHARS = 4096
+
+# Formats whose encoded segments can be joined by plain concatenation
+CONCATENABLE_FORMATS = {"mp3", "aac"}
+
+# Called with the index of each segment once its file is complete
+SegmentCallback = Callable[[int], Awaitable[None]]
+
+# Read size used when joining segment files
+COPY_CHUNK_SIZE = 64 * 1024
+
+# Segment failures worth another attempt that the rate limiter does not retry
+# itself: connections dropped mid-stream and empty responses
+SEGMENT_RETRY_ERRORS = (httpx.TransportError, ValueError)
 
 
 class TTSAgent:
     """Agent for converting text to speech using OpenAI TTS."""
     
-    def __init__(self):
-        """Initialize the TTS agent."""
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        max_segment_chars: int = MAX_TTS_INPUT_CHARS,
+        segment_cache: Optional[AudioSegmentCache] = None,
+        client: Optional[AsyncOpenAI] = None,
+        rate_limiter: Optional[RateLimitScheduler] = None,
+        max_attempts: int = 3,
+        retry_backoff: float = 1.0,
+        hedging: Optional[HedgingPolicy] = None
+    ):
+        """
+        Initialize the TTS agent.
+        
+        Args:
+            max_concurrency: Maximum number of segments synthesized in parallel
+            max_segment_chars: Maximum preprocessed length of a single TTS request
+            segment_cache: Optional cache consulted before synthesizing a segment
+            client: Optional OpenAI client (defaults to the shared application client)
+            rate_limiter: Scheduler pacing TTS calls (defaults to the shared scheduler)
+            max_attempts: Attempts per segment before the episode fails
+            retry_backoff: Base delay between segment attempts in seconds
+            hedging: Optional policy for duplicating segment requests that run slow
+        """
         self.model = "tts-1-hd"
-        self._client = None
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_segment_chars = min(max_segment_chars, MAX_TTS_INPUT_CHARS)
+        self.segment_cache = segment_cache
+        self._client = client
+        self.rate_limiter = rate_limiter or rate_limit_scheduler
+        self.max_attempts = max(1, max_attempts)
+        self.retry_backoff = retry_backoff
+        self.hedging = hedging
     
     @property
-    def client(self):
-        """Lazy-load the OpenAI client."""
+    def client(self) -> AsyncOpenAI:
+        """Get the OpenAI client, falling back to the shared application client."""
         if self._client is None:
-            api_key = os.getenv("OPENAI_API_KEY")
-            if not api_key or api_key == "your_openai_api_key_here":
-                raise ValueError("OpenAI API key not configured. Please set OPENAI_API_KEY in your .env file.")
-            self._client = AsyncOpenAI(api_key=api_key)
+            self._client = openai_client_factory.get_client()
         return self._client
     
+    @client.setter
+    def client(self, client: AsyncOpenAI) -> None:
+        """Inject the OpenAI client."""
+        self._client = client
+    
     def _validate_voice(self, voice: Voice) -> str:
         """
         Validate and return the voice parameter.
@@ -75,56 +134,367 @@ class TTSAgent:
         
         return script.strip()
     
+    def _split_script(self, script: str) -> List[str]:
+        """
+        Split a script into preprocessed segments that fit a single TTS request.
+        
+        Args:
+            script: The raw script
+            
+        Returns:
+            Preprocessed segments in reading order
+        """
+        raw_segments = text_utils.split_into_segments(
+            script,
+            max_chars=self.max_segment_chars,
+            measure=lambda text: len(self._preprocess_script(text))
+        )
+        
+        return [self._preprocess_script(segment) for segment in raw_segments]
+    
+    def _new_segmenter(self) -> ScriptSegmenter:
+        """
+        Create the segmenter that decides where a script is cut into TTS requests.
+        
+        Segments close at paragraph breaks once they are a quarter of the request
+        limit, leaving headroom for preprocessing pause markers. Whole scripts and
+        streamed scripts use the same segmenter so identical text produces
+        identical segments (and segment cache hits).
+        
+        Returns:
+            A new segmenter
+        """
+        return ScriptSegmenter(
+            min_chars=self.max_segment_chars // 4,
+            max_chars=self.max_segment_chars * 3 // 4
+        )
+    
+    def _segment_script(self, script: str) -> List[str]:
+        """
+        Cut a complete script into preprocessed TTS segments.
+        
+        Args:
+            script: The raw script
+            
+        Returns:
+            Preprocessed segments in reading order
+        """
+        segmenter = self._new_segmenter()
+        raw_segments = segmenter.feed(script) + segmenter.flush()
+        
+        return [segment for raw in raw_segments for segment in self._split_script(raw)]
+    
+    async def _synthesize_segment(
+        self,
+        text: str,
+        voice_str: str,
+        output_format: str,
+        dest_path: Path
+    ) -> Path:
+        """
+        Synthesize a single segment, retrying transient failures.
+        
+        Attempts are separated by jittered exponential backoff so segments
+        that failed together do not retry in lockstep.
+        
+        Args:
+            text: Preprocessed segment text
+            voice_str: Validated voice name
+            output_format: Output format
+            dest_path: Where to store the segment
+            
+        Returns:
+            Path to the segment file
+        """
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        for attempt in range(self.max_attempts):
+            try:
+                return await self._hedged_synthesize(text, voice_str, output_format, dest_path)
+            except SEGMENT_RETRY_ERRORS:
+                if attempt == self.max_attempts - 1:
+                    raise
+                delay = self.retry_backoff * 2 ** attempt
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+    
+    async def _hedged_synthesize(
+        self,
+        text: str,
+        voice_str: str,
+        output_format: str,
+        dest_path: Path
+    ) -> Path:
+        """
+        Synthesize a segment, duplicating the request if it runs unusually long.
+        
+        Once the request has taken longer than the hedging threshold and the
+        hedge budget allows it, a second identical request is sent. Whichever
+        finishes first is kept and the other is cancelled. The request is
+        timed from when the rate limiter lets it through, so waiting out a
+        rate limit pause never triggers a hedge.
+        
+        Args:
+            text: Preprocessed segment text
+            voice_str: Validated voice name
+            output_format: Output format
+            dest_path: Where to store the segment
+            
+        Returns:
+            Path to the segment file
+        """
+        started = time.monotonic()
+        admitted = asyncio.Event()
+        
+        def on_admitted() -> None:
+            nonlocal started
+            started = time.monotonic()
+            admitted.set()
+        
+        primary_path = dest_path.with_name(dest_path.name + ".part")
+        primary = asyncio.create_task(
+            self._download(text, voice_str, output_format, primary_path, on_admitted=on_admitted)
+        )
+        attempts = {primary: primary_path}
+        
+        try:
+            threshold = self.hedging.threshold() if self.hedging else None
+            if threshold is not None:
+                admission = asyncio.create_task(admitted.wait())
+                await asyncio.wait({primary, admission}, return_when=asyncio.FIRST_COMPLETED)
+                admission.cancel()
+                if not primary.done():
+                    await asyncio.wait({primary}, timeout=started + threshold - time.monotonic())
+                if not primary.done() and self.hedging.try_hedge():
+                    hedge_path = dest_path.with_name(dest_path.name + ".hedge.part")
+                    hedge = asyncio.create_task(self._download(text, voice_str, output_format, hedge_path))
+                    attempts[hedge] = hedge_path
+            
+            pending = set(attempts)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    
+                    if self.hedging:
+                        self.hedging.record(time.monotonic() - started)
+                        if task is not primary:
+                            self.hedging.hedges_won += 1
+                    os.replace(attempts[task], dest_path)
+                    return dest_path
+            
+            raise error
+            
+        finally:
+            for task in attempts:
+                task.cancel()
+            await asyncio.gather(*attempts, return_exceptions=True)
+            for temp_path in attempts.values():
+                temp_path.unlink(missing_ok=True)
+    
+    async def _download(
+        self,
+        text: str,
+        voice_str: str,
+        output_format: str,
+        temp_path: Path,
+        on_admitted: Optional[Callable[[], None]] = None
+    ) -> None:
+        """
+        Stream one TTS response to a temporary file.
+        
+        The response body is written as it arrives, so only one network chunk
+        is held in memory at a time.
+        
+        Args:
+            text: Preprocessed segment text
+            voice_str: Validated voice name
+            output_format: Output format
+            temp_path: File receiving the audio
+            on_admitted: Optional callable invoked each time the rate limiter
+                lets the request through
+        """
+        async def download() -> int:
+            if on_admitted:
+                on_admitted()
+            bytes_written = 0
+            async with self.client.audio.speech.with_streaming_response.create(
+                model=self.model,
+                voice=voice_str,
+                input=text,
+                response_format=output_format
+            ) as response:
+                async with aiofiles.open(temp_path, 'wb') as f:
+                    async for chunk in response.iter_bytes():
+                        await f.write(chunk)
+                        bytes_written += len(chunk)
+            return bytes_written
+        
+        bytes_written = await self.rate_limiter.run_speech(download, characters=len(text))
+        if not bytes_written:
+            raise ValueError("No audio data received from TTS service")
+    
+    async def _render_segment(
+        self,
+        text: str,
+        voice_str: str,
+        output_format: str,
+        dest_path: Path
+    ) -> Path:
+        """
+        Produce a segment file, reusing cached audio for identical text when possible.
+        
+        Args:
+            text: Preprocessed segment text
+            voice_str: Validated voice name
+            output_format: Output format
+            dest_path: Where to store the segment
+            
+        Returns:
+            Path to the segment file
+        """
+        if self.segment_cache is None:
+            return await self._synthesize_segment(text, voice_str, output_format, dest_path)
+        
+        cache_key = self.segment_cache.make_key(text, voice_str, self.model, output_format)
+        try:
+            if self.segment_cache.fetch(cache_key, output_format, dest_path):
+                return dest_path
+        except OSError as e:
+            print(f"TTS segment cache lookup failed: {str(e)}")
+        
+        await self._synthesize_segment(text, voice_str, output_format, dest_path)
+        
+        try:
+            self.segment_cache.store(cache_key, output_format, dest_path)
+        except OSError as e:
+            print(f"TTS segment cache store failed: {str(e)}")
+        
+        return dest_path
+    
+    async def _join_segments(self, segment_paths: List[Path], output_path: Path) -> Path:
+        """
+        Concatenate segment files in order into a single audio file.
+        
+        Args:
+            segment_paths: Segment files in reading order
+            output_path: Where to write the joined audio
+            
+        Returns:
+            Path to the joined audio file
+        """
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = output_path.with_name(output_path.name + ".part")
+        
+        try:
+            async with aiofiles.open(temp_path, 'wb') as out:
+                for segment_path in segment_paths:
+                    async with aiofiles.open(segment_path, 'rb') as f:
+                        while chunk := await f.read(COPY_CHUNK_SIZE):
+                            await out.write(chunk)
+            
+            os.replace(temp_path, output_path)
+            return output_path
+            
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+    
     async def generate_audio(
         self, 
         script: str, 
         voice: Voice,
-        output_format: str = "mp3"
-    ) -> bytes:
+        segment_dir: Path,
+        output_path: Path,
+        output_format: str = "mp3",
+        on_segment: Optional[SegmentCallback] = None
+    ) -> Path:
         """
         Generate audio from script using OpenAI TTS.
         
+        Scripts are split at paragraph or sentence boundaries into segments that
+        fit a single TTS request, synthesized concurrently (up to max_concurrency
+        requests at a time) into segment_dir and joined in order.
+        
         Args:
             script: The podcast script
             voice: The TTS voice to use
+            segment_dir: Directory receiving the individual segment files
+            output_path: Where to write the joined audio
             output_format: Output format (mp3, opus, aac, flac)
+            on_segment: Optional coroutine called with the index of each
+                segment once its file is complete
             
         Returns:
-            Audio data as bytes
+            Path to the generated audio file
         """
         try:
             # Validate voice
             voice_str = self._validate_voice(voice)
             
-            # Preprocess script
-            processed_script = self._preprocess_script(script)
+            # Preprocess and split script
+            segments = self._segment_script(script)
             
-            # Validate script length (OpenAI TTS has limits)
-            if len(processed_script) > 4096:
-                raise ValueError("Script is too long for TTS. Maximum 4096 characters allowed.")
-            
-            if len(processed_script) < 10:
+            if sum(len(segment) for segment in segments) < 10:
                 raise ValueError("Script is too short for TTS.")
             
-            # Generate audio
-            response = await self.client.audio.speech.create(
-                model=self.model,
-                voice=voice_str,
-                input=processed_script,
-                response_format=output_format
-            )
+            if len(segments) > 1 and output_format not in CONCATENABLE_FORMATS:
+                raise ValueError(
+                    f"Script is too long for a single {output_format} TTS request. "
+                    f"Use one of: {sorted(CONCATENABLE_FORMATS)}"
+                )
+            
+            # Generate audio for all segments, bounded by the concurrency limit
+            semaphore = asyncio.Semaphore(self.max_concurrency)
             
-            # Get audio data
-            audio_data = response.content
+            async def synthesize(index: int, segment: str) -> Path:
+                segment_path = segment_dir / audio_utils.segment_filename(index, output_format)
+                async with semaphore:
+                    await self._render_segment(segment, voice_str, output_format, segment_path)
+                if on_segment:
+                    await on_segment(index)
+                return segment_path
             
-            if not audio_data:
-                raise ValueError("No audio data received from TTS service")
+            segment_paths = await asyncio.gather(
+                *(synthesize(index, segment) for index, segment in enumerate(segments))
+            )
             
-            return audio_data
+            return await self._join_segments(segment_paths, output_path)
             
         except Exception as e:
             raise Exception(f"Failed to generate audio: {str(e)}")
     
+    def start_pipeline(
+        self,
+        voice: Voice,
+        segment_dir: Path,
+        output_format: str = "mp3",
+        on_segment: Optional[SegmentCallback] = None
+    ) -> "SpeechPipeline":
+        """
+        Start a pipeline that synthesizes a script while it is still being written.
+        
+        Args:
+            voice: The TTS voice to use
+            segment_dir: Directory receiving the individual segment files
+            output_format: Output format (mp3, aac)
+            on_segment: Optional coroutine called with the index of each
+                segment once its file is complete
+            
+        Returns:
+            A pipeline accepting streamed script text
+        """
+        voice_str = self._validate_voice(voice)
+        
+        if output_format not in CONCATENABLE_FORMATS:
+            raise ValueError(
+                f"Pipelined synthesis requires one of: {sorted(CONCATENABLE_FORMATS)}"
+            )
+        
+        return SpeechPipeline(self, voice_str, segment_dir, output_format, on_segment=on_segment)
+    
     def estimate_audio_duration(self, script: str) -> float:
         """
         Estimate the duration of the generated audio in seconds.
@@ -187,4 +557,100 @@ class TTSAgent:
             }
         }
         
-        return voice_characteristics.get(voice, voice_characteristics[Voice.FABLE]) 
\ No newline at end of file
+        return voice_characteristics.get(voice, voice_characteristics[Voice.FABLE]) 
+
+
+class SpeechPipeline:
+    """Synthesizes script segments as soon as they are closed."""
+    
+    def __init__(
+        self,
+        tts_agent: TTSAgent,
+        voice_str: str,
+        segment_dir: Path,
+        output_format: str,
+        on_segment: Optional[SegmentCallback] = None
+    ):
+        """
+        Initialize the pipeline.
+        
+        Args:
+            tts_agent: The agent used to synthesize segments
+            voice_str: Validated voice name
+            segment_dir: Directory receiving the individual segment files
+            output_format: Output format
+            on_segment: Optional coroutine called with the index of each
+                segment once its file is complete
+        """
+        self.tts_agent = tts_agent
+        self.voice_str = voice_str
+        self.segment_dir = segment_dir
+        self.output_format = output_format
+        self.on_segment = on_segment
+        self._segmenter = tts_agent._new_segmenter()
+        self._semaphore = asyncio.Semaphore(tts_agent.max_concurrency)
+        self._tasks: List[asyncio.Task] = []
+        self._closed = False
+    
+    def feed(self, text: str) -> None:
+        """
+        Add streamed script text, queueing synthesis of any closed segments.
+        
+        Args:
+            text: The next chunk of script text
+        """
+        for segment in self._segmenter.feed(text):
+            self._submit(segment)
+    
+    def close(self) -> None:
+        """Mark the script as complete and queue the remaining text."""
+        if self._closed:
+            return
+        
+        self._closed = True
+        for segment in self._segmenter.flush():
+            self._submit(segment)
+    
+    async def result(self, output_path: Path) -> Path:
+        """
+        Wait for all queued segments and join them in order.
+        
+        Args:
+            output_path: Where to write the joined audio
+            
+        Returns:
+            Path to the generated audio file
+        """
+        self.close()
+        
+        try:
+            if not self._tasks:
+                raise ValueError("Script is too short for TTS.")
+            
+            segment_paths = await asyncio.gather(*self._tasks)
+            return await self.tts_agent._join_segments(segment_paths, output_path)
+            
+        except Exception as e:
+            self.cancel()
+            raise Exception(f"Failed to generate audio: {str(e)}")
+    
+    def cancel(self) -> None:
+        """Cancel any synthesis still in flight."""
+        self._closed = True
+        for task in self._tasks:
+            task.cancel()
+    
+    def _submit(self, segment: str) -> None:
+        """Queue synthesis of a closed raw segment."""
+        for text in self.tts_agent._split_script(segment):
+            index = len(self._tasks)
+            self._tasks.append(asyncio.create_task(self._synthesize(index, text)))
+    
+    async def _synthesize(self, index: int, text: str) -> Path:
+        """Synthesize one segment, bounded by the concurrency limit."""
+        segment_path = self.segment_dir / audio_utils.segment_filename(index, self.output_format)
+        async with self._semaphore:
+            await self.tts_agent._render_segment(text, self.voice_str, self.output_format, segment_path)
+        if self.on_segment:
+            await self.on_segment(index)
+        return segment_path
@@ -2,43 +2,41 @@
 FastAPI endpoints for podcast generation.
 """
 
+import math
 import os
 from pathlib import Path
 from typing import List
 from fastapi import APIRouter, HTTPException, Response, BackgroundTasks, Depends
-from fastapi.responses import FileResponse
-from models.request_models import PodcastRequest, PodcastResponse, Tone, Voice
-from workflows.podcast_workflow import podcast_workflow
+from fastapi.responses import FileResponse, StreamingResponse
+import aiofiles
+from models.request_models import PodcastRequest, JobResponse, JobStatus, BatchRequest, BatchResponse, Tone, Voice
+from jobs.job_manager import job_manager, Job, Batch, JobQueueFullError
 from memory.memory_store import memory_store
+from cache.script_cache import script_cache
+from cache.audio_cache import audio_segment_cache
+from agents.rate_limiter import rate_limit_scheduler
 from utils.audio_utils import audio_utils
-from agents.tts_agent import TTSAgent
+from workflows.podcast_workflow import podcast_workflow
 from models.user_model import User
 from models.podcast_model import Podcast
 from models.transaction_model import Transation
-from utils.dependencies import get_current_user
+from utils.dependencies import get_current_user, get_current_user_or_query
 
 router = APIRouter(prefix="/api/v1", tags=["podcast"])
 
 
-@router.post("/generate-podcast", response_model=PodcastResponse)
-async def generate_podcast(request: PodcastRequest, background_tasks: BackgroundTasks, current_user = Depends(get_current_user)):
+@router.post("/generate-podcast", response_model=JobResponse, status_code=202)
+async def generate_podcast(request: PodcastRequest, current_user = Depends(get_current_user)):
     """
-    Generate a podcast episode from a topic.
+    Enqueue a podcast episode generation.
     
     Args:
         request: The podcast generation request
-        background_tasks: FastAPI background tasks
         
     Returns:
-        Podcast generation response
+        The queued job; poll GET /api/v1/jobs/{job_id} for its progress
     """
     try:
-
-        user_id = current_user.id
-        email = current_user.email
-
-        print(user_id)
-        print(email)
         # Validate OpenAI API key
         if not os.getenv("OPENAI_API_KEY"):
             raise HTTPException(
@@ -46,18 +44,164 @@ async def generate_podcast(request: PodcastRequest, background_tasks: Background
                 detail="OpenAI API key not configured"
             )
         
-        # Generate podcast using workflow
-        response = await podcast_workflow.generate_podcast(request)
+        _ensure_openai_available()
+        job = job_manager.submit(request, user_id=str(current_user.id), credits=current_user.credits or 0)
+        return job_manager.describe(job)
+        
+    except JobQueueFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))}
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
+def _ensure_openai_available() -> None:
+    """
+    Reject new work right away while OpenAI is known to be down.
+    
+    Raises:
+        HTTPException: 503 with a Retry-After header while a circuit is open
+    """
+    retry_after = rate_limit_scheduler.circuit_retry_after()
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=503,
+            detail="OpenAI is currently unavailable, try again later",
+            headers={"Retry-After": str(math.ceil(retry_after))}
+        )
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job_status(job_id: str, current_user = Depends(get_current_user)):
+    """
+    Get the status of a podcast generation job.
+    
+    Args:
+        job_id: The job id returned by generate-podcast
+        
+    Returns:
+        Job stage, progress, result path and error
+    """
+    job = job_manager.get_job(job_id)
+    if job is None or job.user_id != str(current_user.id):
+        raise HTTPException(
+            status_code=404,
+            detail="Job not found"
+        )
+    
+    return job_manager.describe(job)
+
+
+@router.post("/jobs/{job_id}/retry", response_model=JobResponse, status_code=202)
+async def retry_job(job_id: str, current_user = Depends(get_current_user)):
+    """
+    Retry a failed podcast generation job.
+    
+    The retry resumes after the last workflow stage the failed run completed,
+    so a failure while synthesizing audio does not regenerate the script.
+    
+    Args:
+        job_id: The job id returned by generate-podcast
+        
+    Returns:
+        The queued job
+    """
+    job = job_manager.get_job(job_id)
+    if job is None or job.user_id != str(current_user.id):
+        raise HTTPException(
+            status_code=404,
+            detail="Job not found"
+        )
+    
+    _ensure_openai_available()
+    try:
+        return job_manager.describe(job_manager.retry(job))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=409,
+            detail=str(e)
+        )
+    except JobQueueFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))}
+        )
+
+
+@router.delete("/jobs/{job_id}", response_model=JobResponse)
+async def cancel_job(job_id: str, current_user = Depends(get_current_user)):
+    """
+    Cancel a queued or running podcast generation job.
+    
+    In-flight OpenAI requests are aborted and partial audio files removed.
+    A cancelled job can be retried later.
+    
+    Args:
+        job_id: The job id returned by generate-podcast
+        
+    Returns:
+        The cancelled job
+    """
+    job = job_manager.get_job(job_id)
+    if job is None or job.user_id != str(current_user.id):
+        raise HTTPException(
+            status_code=404,
+            detail="Job not found"
+        )
+    
+    try:
+        return job_manager.describe(job_manager.cancel(job))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=409,
+            detail=str(e)
+        )
+
+
+@router.post("/generate-podcast/batch", response_model=BatchResponse, status_code=202)
+async def generate_podcast_batch(request: BatchRequest, current_user = Depends(get_current_user)):
+    """
+    Enqueue several podcast episode generations as one batch.
+    
+    Args:
+        request: The episodes to generate
         
-        print(response)
-        if not response.success:
+    Returns:
+        The queued batch; poll GET /api/v1/batches/{batch_id} for per-item status
+        or stream GET /api/v1/batches/{batch_id}/results as items finish
+    """
+    try:
+        # Validate OpenAI API key
+        if not os.getenv("OPENAI_API_KEY"):
             raise HTTPException(
                 status_code=500,
-                detail=response.error_message or "Failed to generate podcast"
+                detail="OpenAI API key not configured"
             )
         
-        return response
+        _ensure_openai_available()
+        batch = job_manager.submit_batch(
+            request.items,
+            user_id=str(current_user.id),
+            credits=current_user.credits or 0,
+            mode=request.mode
+        )
+        return job_manager.describe_batch(batch)
         
+    except JobQueueFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))}
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -67,6 +211,149 @@ async def generate_podcast(request: PodcastRequest, background_tasks: Background
         )
 
 
+def _get_user_batch(batch_id: str, current_user) -> Batch:
+    """
+    Look up a batch owned by the current user.
+    
+    Args:
+        batch_id: The batch id returned by generate-podcast/batch
+        current_user: The authenticated user
+        
+    Returns:
+        The batch
+    """
+    batch = job_manager.get_batch(batch_id)
+    if batch is None or batch.user_id != str(current_user.id):
+        raise HTTPException(
+            status_code=404,
+            detail="Batch not found"
+        )
+    
+    return batch
+
+
+@router.get("/batches/{batch_id}", response_model=BatchResponse)
+async def get_batch_status(batch_id: str, current_user = Depends(get_current_user)):
+    """
+    Get the status of every item of a batch.
+    
+    Args:
+        batch_id: The batch id returned by generate-podcast/batch
+        
+    Returns:
+        Batch counts and per-item job status
+    """
+    return job_manager.describe_batch(_get_user_batch(batch_id, current_user))
+
+
+async def _stream_batch_results(batch: Batch):
+    """
+    Yield each item of a batch as soon as it finishes.
+    
+    Args:
+        batch: The batch
+        
+    Yields:
+        One JSON encoded job response per line, in completion order
+    """
+    sent = set()
+    while True:
+        for job in batch.jobs:
+            if job.is_finished and job.job_id not in sent:
+                sent.add(job.job_id)
+                yield job_manager.describe(job).model_dump_json() + "\n"
+        
+        if len(sent) == len(batch.jobs):
+            break
+        await batch.wait_for_change()
+
+
+@router.get("/batches/{batch_id}/results")
+async def stream_batch_results(batch_id: str, current_user = Depends(get_current_user)):
+    """
+    Stream the results of a batch as its items finish.
+    
+    Args:
+        batch_id: The batch id returned by generate-podcast/batch
+        
+    Returns:
+        Newline-delimited JSON response with one finished item per line
+    """
+    return StreamingResponse(
+        _stream_batch_results(_get_user_batch(batch_id, current_user)),
+        media_type="application/x-ndjson"
+    )
+
+
+async def _stream_segments(job: Job):
+    """
+    Yield a job's audio segments in order as they become available.
+    
+    The job is cancelled if the client disconnects before it finishes and
+    no other client is streaming it.
+    
+    Args:
+        job: The generation job
+        
+    Yields:
+        Encoded audio bytes of each segment
+    """
+    job_manager.attach_listener(job)
+    try:
+        index = 0
+        while True:
+            # Segments of a cancelled run are removed
+            if job.status == JobStatus.CANCELLED:
+                break
+            if index in job.segments_ready:
+                segment_path = audio_utils.get_segment_path(job.segment_job_id, index)
+                async with aiofiles.open(segment_path, 'rb') as f:
+                    yield await f.read()
+                index += 1
+            elif job.is_finished:
+                break
+            else:
+                await job.wait_for_change()
+    finally:
+        job_manager.detach_listener(job)
+
+
+@router.get("/jobs/{job_id}/audio")
+async def stream_job_audio(job_id: str, current_user = Depends(get_current_user_or_query)):
+    """
+    Stream a job's audio while it is still being generated.
+    
+    Segments are sent as a chunked MP3 response as soon as they are
+    synthesized, so playback can start before the episode is finished.
+    Since audio elements cannot send headers, the access token may also
+    be passed as the access_token query parameter.
+    
+    Args:
+        job_id: The job id returned by generate-podcast
+        
+    Returns:
+        Chunked audio response
+    """
+    job = job_manager.get_job(job_id)
+    if job is None or job.user_id != str(current_user.id):
+        raise HTTPException(
+            status_code=404,
+            detail="Job not found"
+        )
+    
+    # Segments of a finished episode are deleted once nobody streams them
+    if job.status == JobStatus.COMPLETED and not job.segments_ready:
+        return FileResponse(
+            path=audio_utils.get_file_path(job.result.audio_file_path),
+            media_type="audio/mpeg"
+        )
+    
+    return StreamingResponse(
+        _stream_segments(job),
+        media_type="audio/mpeg"
+    )
+
+
 @router.get("/download/{filename}")
 async def download_audio(filename: str):
     """
@@ -112,7 +399,7 @@ async def get_available_voices():
         List of available voices with characteristics
     """
     try:
-        tts_agent = TTSAgent()
+        tts_agent = podcast_workflow.tts_agent
         voices = []
         
         for voice in Voice:
@@ -180,21 +467,27 @@ async def get_available_tones():
 
 
 @router.get("/memory/stats")
-async def get_memory_stats():
+async def get_memory_stats(current_user = Depends(get_current_user)):
     """
-    Get memory statistics and user preferences.
+    Get memory statistics and the current user's preferences.
     
     Returns:
         Memory statistics and user preferences
     """
     try:
-        preferences = memory_store.get_user_preferences()
+        await memory_store.load(str(current_user.id))
+        preferences = memory_store.get_user_preferences(str(current_user.id))
         storage_info = audio_utils.get_storage_info()
         
         return {
             "memory_entries": memory_store.size(),
+            "memory": memory_store.stats(),
             "user_preferences": preferences,
-            "storage_info": storage_info
+            "storage_info": storage_info,
+            "script_cache": script_cache.stats(),
+            "tts_segment_cache": audio_segment_cache.stats(),
+            "rate_limits": rate_limit_scheduler.stats(),
+            "tts_hedging": podcast_workflow.tts_agent.hedging.stats() if podcast_workflow.tts_agent.hedging else None
         }
         
     except Exception as e:
@@ -205,15 +498,15 @@ async def get_memory_stats():
 
 
 @router.delete("/memory/clear")
-async def clear_memory():
+async def clear_memory(current_user = Depends(get_current_user)):
     """
-    Clear all memory entries.
+    Clear the current user's memory entries.
     
     Returns:
         Success message
     """
     try:
-        memory_store.clear()
+        await memory_store.clear(str(current_user.id))
         return {"message": "Memory cleared successfully"}
         
     except Exception as e:
@@ -0,0 +1,177 @@
+"""
+On-disk cache of synthesized TTS segments.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class AudioSegmentCache:
+    """Content-addressed TTS segment cache with an LRU byte budget."""
+
+    def __init__(self, cache_dir: str = "./cache_data/tts_segments", max_size_mb: int = 500):
+        """
+        Initialize the segment cache.
+
+        Args:
+            cache_dir: Directory holding cached segment files
+            max_size_mb: Maximum total size of cached segments in megabytes
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_size_mb * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self._entries: Optional[OrderedDict[str, int]] = None
+        self._total_bytes = 0
+
+    def make_key(self, text: str, voice: str, model: str, output_format: str) -> str:
+        """
+        Build the cache key for a segment.
+
+        Args:
+            text: Preprocessed segment text
+            voice: Voice name
+            model: TTS model name
+            output_format: Audio format
+
+        Returns:
+            Hex digest identifying the segment
+        """
+        payload = json.dumps([text, voice, model, output_format], separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def fetch(self, key: str, output_format: str, dest_path: Path) -> bool:
+        """
+        Place a cached segment at dest_path if present.
+
+        Args:
+            key: The cache key
+            output_format: Audio format
+            dest_path: Where the segment is needed
+
+        Returns:
+            True on a hit, False on a miss
+        """
+        entries = self._load()
+        cached_path = self._path(key, output_format)
+
+        if key not in entries or not cached_path.exists():
+            self._forget(key)
+            self.misses += 1
+            return False
+
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        self._link_or_copy(cached_path, dest_path)
+        # Keep recency on disk so the LRU order survives restarts
+        os.utime(cached_path)
+        entries.move_to_end(key)
+        self.hits += 1
+        self.bytes_saved += entries[key]
+        return True
+
+    def store(self, key: str, output_format: str, src_path: Path) -> None:
+        """
+        Add a synthesized segment, evicting least recently used segments beyond the budget.
+
+        Args:
+            key: The cache key
+            output_format: Audio format
+            src_path: The synthesized segment file
+        """
+        entries = self._load()
+        if key in entries:
+            entries.move_to_end(key)
+            return
+
+        cached_path = self._path(key, output_format)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._link_or_copy(src_path, cached_path)
+
+        size = cached_path.stat().st_size
+        entries[key] = size
+        self._total_bytes += size
+
+        while self._total_bytes > self.max_bytes and len(entries) > 1:
+            oldest_key = next(iter(entries))
+            self._evict(oldest_key)
+
+    def clear(self) -> None:
+        """Remove all cached segments."""
+        for key in list(self._load()):
+            self._evict(key)
+
+    def stats(self) -> dict:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with entry count, size, hits, misses, hit rate and bytes saved
+        """
+        entries = self._load()
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(entries),
+            "size_mb": round(self._total_bytes / (1024 * 1024), 2),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups * 100, 2) if lookups else 0.0,
+            "bytes_saved": self.bytes_saved
+        }
+
+    def _load(self) -> "OrderedDict[str, int]":
+        """Lazy-load the index from disk, oldest access first."""
+        if self._entries is None:
+            self._entries = OrderedDict()
+            self._total_bytes = 0
+            if self.cache_dir.exists():
+                files = sorted(
+                    (p for p in self.cache_dir.iterdir() if p.is_file() and not p.name.endswith(".part")),
+                    key=lambda p: p.stat().st_mtime
+                )
+                for file_path in files:
+                    size = file_path.stat().st_size
+                    self._entries[file_path.stem] = size
+                    self._total_bytes += size
+        return self._entries
+
+    def _path(self, key: str, output_format: str) -> Path:
+        """Get the cache file path of a key."""
+        return self.cache_dir / f"{key}.{output_format}"
+
+    def _evict(self, key: str) -> None:
+        """Delete a cached segment and drop it from the index."""
+        for file_path in self.cache_dir.glob(f"{key}.*"):
+            file_path.unlink(missing_ok=True)
+        self._forget(key)
+
+    def _forget(self, key: str) -> None:
+        """Drop a key from the index."""
+        size = self._entries.pop(key, None) if self._entries is not None else None
+        if size is not None:
+            self._total_bytes -= size
+
+    def _link_or_copy(self, src_path: Path, dest_path: Path) -> None:
+        """Hard-link src to dest, copying when linking is not possible."""
+        temp_path = dest_path.with_name(dest_path.name + ".part")
+        temp_path.unlink(missing_ok=True)
+        try:
+            os.link(src_path, temp_path)
+        except OSError:
+            shutil.copyfile(src_path, temp_path)
+        os.replace(temp_path, dest_path)
+
+
+# Global audio segment cache instance
+audio_segment_cache = AudioSegmentCache(
+    cache_dir=os.getenv("TTS_CACHE_DIR", "./cache_data/tts_segments"),
+    max_size_mb=int(os.getenv("TTS_CACHE_MAX_MB", "500"))
+)
@@ -0,0 +1,182 @@
+"""
+SQLite-backed cache of generated podcast scripts.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+from dotenv import load_dotenv
+from models.request_models import Tone
+from utils.text_utils import text_utils
+
+load_dotenv()
+
+
+class ScriptCache:
+    """Content-addressed script cache with LRU eviction and a TTL."""
+
+    def __init__(self, db_path: str = "./cache_data/script_cache.sqlite3", max_entries: int = 1000, ttl_hours: int = 168):
+        """
+        Initialize the script cache.
+
+        Args:
+            db_path: Path of the SQLite database file
+            max_entries: Maximum number of cached scripts
+            ttl_hours: Time to live for cached scripts in hours
+        """
+        self.db_path = Path(db_path)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_hours * 3600
+        self.hits = 0
+        self.misses = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        # Lookups and stores run in worker threads sharing the connection
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Lazy-open the database connection."""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scripts (
+                    key TEXT PRIMARY KEY,
+                    script TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_scripts_last_used ON scripts (last_used_at)")
+            self._conn.commit()
+        return self._conn
+
+    def make_key(self, topic: str, tone: Tone, duration_minutes: int, model: str, prompt_version: str) -> str:
+        """
+        Build the cache key for a script request.
+
+        Args:
+            topic: The podcast topic
+            tone: The requested tone
+            duration_minutes: Target duration in minutes
+            model: Name of the generating model
+            prompt_version: Version of the prompt template
+
+        Returns:
+            Hex digest identifying the request
+        """
+        normalized_topic = text_utils.normalize_topic(topic)
+        tone_str = tone.value if hasattr(tone, 'value') else str(tone)
+        payload = json.dumps(
+            [normalized_topic, tone_str, duration_minutes, model, prompt_version],
+            separators=(",", ":")
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached script.
+
+        Args:
+            key: The cache key
+
+        Returns:
+            The cached script, or None on a miss
+        """
+        current_time = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT script, created_at FROM scripts WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or current_time - row[1] > self.ttl_seconds:
+                self.misses += 1
+                return None
+
+            self.conn.execute("UPDATE scripts SET last_used_at = ? WHERE key = ?", (current_time, key))
+            self.conn.commit()
+            self.hits += 1
+        return row[0]
+
+    def contains(self, key: str) -> bool:
+        """
+        Check for a live cached script without counting a lookup.
+
+        Args:
+            key: The cache key
+
+        Returns:
+            True if a script is cached and not expired
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM scripts WHERE key = ? AND created_at >= ?",
+                (key, time.time() - self.ttl_seconds)
+            ).fetchone()
+        return row is not None
+
+    def put(self, key: str, script: str) -> None:
+        """
+        Store a script, evicting the least recently used entries beyond capacity.
+
+        Args:
+            key: The cache key
+            script: The generated script
+        """
+        current_time = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO scripts (key, script, created_at, last_used_at) VALUES (?, ?, ?, ?)",
+                (key, script, current_time, current_time)
+            )
+            self.conn.execute("DELETE FROM scripts WHERE created_at < ?", (current_time - self.ttl_seconds,))
+            self.conn.execute(
+                """
+                DELETE FROM scripts WHERE key IN (
+                    SELECT key FROM scripts ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,)
+            )
+            self.conn.commit()
+
+    def clear(self) -> None:
+        """Remove all cached scripts."""
+        with self._lock:
+            self.conn.execute("DELETE FROM scripts")
+            self.conn.commit()
+
+    def size(self) -> int:
+        """Get the number of cached scripts."""
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM scripts").fetchone()[0]
+
+    def stats(self) -> dict:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with entry count, hits, misses and hit rate
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": self.size(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups * 100, 2) if lookups else 0.0
+        }
+
+
+# Global script cache instance
+script_cache = ScriptCache(
+    db_path=os.getenv("SCRIPT_CACHE_DB", "./cache_data/script_cache.sqlite3"),
+    max_entries=int(os.getenv("SCRIPT_CACHE_MAX_ENTRIES", "1000")),
+    ttl_hours=int(os.getenv("SCRIPT_CACHE_TTL_HOURS", "168"))
+)
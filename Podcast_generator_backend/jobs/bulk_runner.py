@@ -0,0 +1,168 @@
+"""
+Bulk script generation through a batch processing service.
+"""
+
+import asyncio
+import json
+import uuid
+from pathlib import Path
+from typing import Callable, List, Optional, Set, Tuple
+from agents.batch_client import TERMINAL_BATCH_STATUSES
+from agents.script_agent import ScriptAgent
+from memory.memory_store import memory_store
+
+# Called with the script, or None and an error message, once a job's script is known
+BulkCallback = Callable[[Optional[str], Optional[str]], None]
+
+
+class BulkScriptRunner:
+    """
+    Collects script prompts of many jobs into batch files.
+
+    Jobs added within the collection window are written to one JSONL request
+    file and submitted to the batch client. The runner polls the batch until
+    it finishes, then hands each job its script.
+    """
+
+    def __init__(
+        self,
+        batch_client,
+        script_agent: ScriptAgent,
+        work_dir: str = "./cache_data/bulk",
+        max_items: int = 1000,
+        collect_seconds: float = 10.0,
+        poll_seconds: float = 30.0
+    ):
+        """
+        Initialize the runner.
+
+        Args:
+            batch_client: Client submitting request files (see agents.batch_client)
+            script_agent: Agent building the script prompts and parsing results
+            work_dir: Directory for request and result files
+            max_items: Maximum number of scripts per batch file
+            collect_seconds: How long to gather jobs before submitting a batch
+            poll_seconds: Interval between batch status checks
+        """
+        self.batch_client = batch_client
+        self.script_agent = script_agent
+        self.work_dir = Path(work_dir)
+        self.max_items = max(1, max_items)
+        self.collect_seconds = collect_seconds
+        self.poll_seconds = poll_seconds
+        self._pending: List[Tuple[object, BulkCallback]] = []
+        self._added = asyncio.Event()
+        self._collector: Optional[asyncio.Task] = None
+        self._batches: Set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        """Start collecting jobs on the running event loop."""
+        if self._collector is None:
+            self._collector = asyncio.create_task(self._collect(), name="bulk-script-collector")
+
+    async def stop(self) -> None:
+        """Stop collecting and abandon batches that are still running."""
+        tasks = list(self._batches)
+        if self._collector is not None:
+            tasks.append(self._collector)
+
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._collector = None
+        self._batches.clear()
+
+    def add(self, job, callback: BulkCallback) -> None:
+        """
+        Queue a job for the next batch.
+
+        Args:
+            job: The job needing a script
+            callback: Called with the script or an error message
+        """
+        self._pending.append((job, callback))
+        self._added.set()
+
+    def pending(self) -> int:
+        """Get the number of jobs waiting for a batch to be submitted."""
+        return len(self._pending)
+
+    async def _collect(self) -> None:
+        """Submit pending jobs in batches until cancelled."""
+        while True:
+            while not self._pending:
+                self._added.clear()
+                await self._added.wait()
+
+            # Let more jobs arrive so they share one batch file
+            if len(self._pending) < self.max_items:
+                await asyncio.sleep(self.collect_seconds)
+
+            items = self._pending[:self.max_items]
+            del self._pending[:self.max_items]
+
+            task = asyncio.create_task(self._run_batch(items))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, items: List[Tuple[object, BulkCallback]]) -> None:
+        """
+        Generate the scripts of one batch of jobs.
+
+        Args:
+            items: The jobs and their callbacks
+        """
+        callbacks = {job.job_id: callback for job, callback in items}
+        name = uuid.uuid4().hex
+        input_path = self.work_dir / f"{name}.input.jsonl"
+        output_path = self.work_dir / f"{name}.output.jsonl"
+
+        try:
+            self.work_dir.mkdir(parents=True, exist_ok=True)
+            for job, _ in items:
+                await memory_store.load(job.user_id)
+            with open(input_path, 'w', encoding='utf-8') as f:
+                for job, _ in items:
+                    request = self.script_agent.build_batch_request(
+                        custom_id=job.job_id,
+                        topic=job.request.topic,
+                        tone=job.request.tone,
+                        duration_minutes=job.request.duration_minutes,
+                        user_preferences=memory_store.get_user_preferences(job.user_id)
+                    )
+                    f.write(json.dumps(request) + "\n")
+
+            batch_id = await self.batch_client.submit(input_path)
+            status = await self.batch_client.status(batch_id)
+            while status not in TERMINAL_BATCH_STATUSES:
+                await asyncio.sleep(self.poll_seconds)
+                status = await self.batch_client.status(batch_id)
+
+            if status != "completed":
+                raise Exception(f"Batch {batch_id} ended with status {status}")
+
+            await self.batch_client.download(batch_id, output_path)
+            with open(output_path, 'r', encoding='utf-8') as f:
+                results = [json.loads(line) for line in f if line.strip()]
+
+        except Exception as e:
+            for callback in callbacks.values():
+                callback(None, f"Bulk script generation failed: {str(e)}")
+            return
+
+        finally:
+            input_path.unlink(missing_ok=True)
+            output_path.unlink(missing_ok=True)
+
+        for result in results:
+            callback = callbacks.pop(result.get("custom_id"), None)
+            if callback is None:
+                continue
+            try:
+                callback(self.script_agent.parse_batch_result(result), None)
+            except Exception as e:
+                callback(None, str(e))
+
+        for callback in callbacks.values():
+            callback(None, "Failed to generate script: no result returned by the batch")
@@ -0,0 +1,986 @@
+"""
+Background job manager that runs podcast generations on a bounded worker pool.
+"""
+
+import asyncio
+import functools
+import os
+import time
+import uuid
+from typing import Dict, List, Optional, Set
+from dotenv import load_dotenv
+from models.request_models import PodcastRequest, PodcastResponse, JobResponse, JobStatus, CacheMode, BatchResponse, ExecutionMode
+from agents.batch_client import create_batch_client
+from cache.script_cache import script_cache
+from jobs.bulk_runner import BulkScriptRunner
+from jobs.scheduler import FairShareScheduler
+from utils.audio_utils import audio_utils
+from utils.text_utils import text_utils
+from workflows.podcast_workflow import podcast_workflow
+
+load_dotenv()
+
+
+class JobQueueFullError(Exception):
+    """Raised when the job queue cannot accept more work."""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        """
+        Initialize the error.
+
+        Args:
+            message: Why the work was rejected
+            retry_after: Estimated seconds until the work would be accepted
+        """
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Job:
+    """A single podcast generation job and its progress."""
+
+    def __init__(
+        self,
+        request: PodcastRequest,
+        user_id: Optional[str] = None,
+        leader: Optional["Job"] = None,
+        job_id: Optional[str] = None
+    ):
+        """
+        Initialize a job.
+
+        Args:
+            request: The podcast generation request
+            user_id: Id of the user that submitted the job
+            leader: In-flight identical job whose result this job shares
+            job_id: Optional id of an earlier run this job continues
+        """
+        self.job_id = job_id or uuid.uuid4().hex
+        self.request = request
+        self.user_id = user_id
+        self.credits = 0
+        self.attempts = 0
+        # Followers mirror their leader and read its audio segments
+        self.leader = leader
+        self.segment_job_id = leader.segment_job_id if leader else self.job_id
+        self.followers: List["Job"] = []
+        self.status = JobStatus.QUEUED
+        self.stage: Optional[str] = None
+        self.progress = 0.0
+        self.result: Optional[PodcastResponse] = None
+        self.error_message: Optional[str] = None
+        self.segments_ready: Set[int] = set()
+        # Script generated ahead of the workflow run, as in bulk mode
+        self.script: Optional[str] = None
+        self.batch: Optional["Batch"] = None
+        # Task running the workflow while a worker has the job
+        self.task: Optional[asyncio.Task] = None
+        # Number of clients streaming the job's audio
+        self.listeners = 0
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self._changed = asyncio.Event()
+
+    @property
+    def is_finished(self) -> bool:
+        """Whether the job has reached a terminal state."""
+        return self.status in (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+    def update_progress(self, stage: str, progress: float) -> None:
+        """
+        Record a completed workflow stage.
+
+        Args:
+            stage: Name of the workflow node that finished
+            progress: Completed fraction of the pipeline
+        """
+        self.stage = stage
+        self.progress = max(self.progress, min(progress, 1.0))
+        self.updated_at = time.time()
+
+        for follower in self.followers:
+            follower.update_progress(stage, progress)
+
+    def mark_running(self) -> None:
+        """Record that a worker has started the job."""
+        if self.status != JobStatus.CANCELLED:
+            self.status = JobStatus.RUNNING
+            self.updated_at = time.time()
+
+        for follower in self.followers:
+            follower.mark_running()
+
+    def finish(self, result: PodcastResponse) -> None:
+        """
+        Record the outcome of the job.
+
+        A cancelled job keeps its state; its followers still get the result.
+
+        Args:
+            result: The workflow response
+        """
+        if self.status != JobStatus.CANCELLED:
+            self.result = result
+            if result.success:
+                self.status = JobStatus.COMPLETED
+                self.progress = 1.0
+            else:
+                self.status = JobStatus.FAILED
+                self.error_message = result.error_message or "Failed to generate podcast"
+            self.updated_at = time.time()
+            self.notify_changed()
+            if self.batch is not None:
+                self.batch.notify_changed()
+
+        for follower in self.followers:
+            follower.finish(result)
+
+    def mark_cancelled(self) -> None:
+        """Record that the submitter no longer wants the job."""
+        self.status = JobStatus.CANCELLED
+        self.error_message = "Job was cancelled"
+        self.updated_at = time.time()
+        self.notify_changed()
+        if self.batch is not None:
+            self.batch.notify_changed()
+
+    def mark_segment_ready(self, index: int) -> None:
+        """
+        Record that an audio segment has been saved and can be streamed.
+
+        Args:
+            index: Position of the segment in the episode
+        """
+        self.segments_ready.add(index)
+        self.notify_changed()
+
+        for follower in self.followers:
+            follower.mark_segment_ready(index)
+
+    def discard_segments(self) -> None:
+        """Record that the audio segments were deleted, leaving only the finished episode."""
+        self.segments_ready = set()
+
+        for follower in self.followers:
+            follower.discard_segments()
+
+    def notify_changed(self) -> None:
+        """Wake everyone waiting for new segments or a terminal state."""
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait_for_change(self) -> None:
+        """Wait until a segment becomes ready or the job finishes."""
+        await self._changed.wait()
+
+    def to_response(self, queue_position: Optional[int] = None) -> JobResponse:
+        """
+        Build the API representation of the job.
+        
+        Args:
+            queue_position: Place of the job in the queue while it waits for a worker
+
+        Returns:
+            The job response
+        """
+        return JobResponse(
+            job_id=self.job_id,
+            status=self.status,
+            stage=self.stage,
+            progress=round(self.progress, 3),
+            queue_position=queue_position,
+            audio_file_path=self.result.audio_file_path if self.result else None,
+            duration_seconds=self.result.duration_seconds if self.result else None,
+            error_message=self.error_message,
+            topic=self.request.topic,
+            voice_used=self.request.voice.value,
+            created_at=self.created_at,
+            updated_at=self.updated_at
+        )
+
+
+class Batch:
+    """Several jobs submitted together and tracked as one unit."""
+
+    def __init__(self, jobs: List[Job], user_id: Optional[str] = None):
+        """
+        Initialize a batch.
+
+        Args:
+            jobs: The jobs of the batch, in request order
+            user_id: Id of the user that submitted the batch
+        """
+        self.batch_id = uuid.uuid4().hex
+        self.jobs = jobs
+        self.user_id = user_id
+        self.created_at = time.time()
+        self._changed = asyncio.Event()
+
+        for job in jobs:
+            job.batch = self
+
+    @property
+    def is_finished(self) -> bool:
+        """Whether every job of the batch has reached a terminal state."""
+        return all(job.is_finished for job in self.jobs)
+
+    def notify_changed(self) -> None:
+        """Wake everyone waiting for another item to finish."""
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait_for_change(self) -> None:
+        """Wait until another item of the batch finishes."""
+        await self._changed.wait()
+
+
+class JobManager:
+    """Fair-share queue of generation jobs consumed by a fixed pool of async workers."""
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_queue_size: int = 100,
+        ttl_hours: int = 24,
+        max_jobs_per_user: int = 2,
+        paid_weight: float = 4.0,
+        bulk_runner: Optional[BulkScriptRunner] = None,
+        max_attempts: int = 2,
+        cancel_on_disconnect: bool = True,
+        disconnect_grace_seconds: float = 10.0,
+        max_in_flight: int = 50,
+        max_backlog_minutes: int = 300
+    ):
+        """
+        Initialize the job manager.
+
+        Args:
+            max_workers: Number of generations allowed to run concurrently
+            max_queue_size: Maximum number of jobs waiting for a worker
+            ttl_hours: How long finished jobs stay queryable in hours
+            max_jobs_per_user: Number of generations of one user allowed to run concurrently
+            paid_weight: Share of the workers given to users with credits, relative to free users
+            bulk_runner: Runner generating the scripts of bulk batches
+            max_attempts: Workflow runs per job before it is reported as failed; each
+                further run resumes from the last checkpoint of the previous one
+            cancel_on_disconnect: Whether a job is cancelled once every client
+                streaming its audio has disconnected
+            disconnect_grace_seconds: How long a client has to reconnect before
+                its job is cancelled
+            max_in_flight: Maximum number of jobs queued or running at once (0 for no limit)
+            max_backlog_minutes: Maximum episode minutes queued or running at once
+                (0 for no limit), so long episodes are shed before short ones
+        """
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.ttl_seconds = ttl_hours * 3600
+        self.max_jobs_per_user = max_jobs_per_user
+        self.paid_weight = paid_weight
+        self.bulk_runner = bulk_runner
+        self.max_attempts = max(1, max_attempts)
+        self.cancel_on_disconnect = cancel_on_disconnect
+        self.disconnect_grace_seconds = disconnect_grace_seconds
+        self.max_in_flight = max_in_flight
+        self.max_backlog_minutes = max_backlog_minutes
+        # Work admitted to the workers and how fast it drains
+        self._running = 0
+        # Bulk jobs admitted while their scripts are still being generated
+        self._bulk_waiting = 0
+        self._backlog_minutes = 0
+        self._seconds_per_minute = 20.0
+        self._jobs: Dict[str, Job] = {}
+        self._batches: Dict[str, Batch] = {}
+        self._in_flight: Dict[tuple, Job] = {}
+        # Clients reading each run's segment directory, and finished runs they hold up
+        self._segment_readers: Dict[str, int] = {}
+        self._spent_segments: Set[str] = set()
+        self._scheduler: Optional[FairShareScheduler] = None
+        self._workers: List[asyncio.Task] = []
+        self._lease_keeper: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Start the worker pool on the running event loop."""
+        if self._workers:
+            return
+
+        self._scheduler = FairShareScheduler(max_per_user=self.max_jobs_per_user)
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"podcast-job-worker-{i}")
+            for i in range(self.max_workers)
+        ]
+        if self.bulk_runner:
+            self.bulk_runner.start()
+
+        await self._recover_interrupted_runs()
+        self._lease_keeper = asyncio.create_task(self._keep_leases(), name="podcast-run-lease-keeper")
+
+    async def _recover_interrupted_runs(self) -> None:
+        """Continue runs that a dead process, this one before a restart included, left unfinished."""
+        try:
+            for job_id, request, metadata in await podcast_workflow.recover_interrupted_runs():
+                if job_id in self._jobs:
+                    continue
+                job = Job(request, user_id=metadata.get("user_id"), job_id=job_id)
+                self._jobs[job.job_id] = job
+                self._schedule(job, metadata.get("credits", 0))
+        except Exception as e:
+            print(f"Failed to recover interrupted runs: {str(e)}")
+
+    async def _keep_leases(self) -> None:
+        """
+        Renew the leases of this process's runs, and take over runs whose
+        process died once their leases expire, until cancelled.
+        """
+        lease_seconds = podcast_workflow.lease_seconds
+        next_recovery = time.monotonic() + lease_seconds
+        while True:
+            await asyncio.sleep(lease_seconds / 3)
+            try:
+                await podcast_workflow.renew_leases()
+            except Exception as e:
+                print(f"Failed to renew run leases: {str(e)}")
+
+            if time.monotonic() >= next_recovery:
+                next_recovery = time.monotonic() + lease_seconds
+                await self._recover_interrupted_runs()
+
+    async def stop(self) -> None:
+        """Stop the worker pool, abandoning queued and running jobs."""
+        if self.bulk_runner:
+            await self.bulk_runner.stop()
+
+        if self._lease_keeper is not None:
+            self._lease_keeper.cancel()
+            await asyncio.gather(self._lease_keeper, return_exceptions=True)
+            self._lease_keeper = None
+
+        # Cancelling a worker also cancels the run it is waiting on
+        for worker in self._workers:
+            worker.cancel()
+
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._scheduler = None
+        self._backlog_minutes = 0
+        self._bulk_waiting = 0
+
+    def submit(self, request: PodcastRequest, user_id: Optional[str] = None, credits: int = 0) -> Job:
+        """
+        Enqueue a podcast generation.
+
+        Jobs are scheduled fairly between users, charging each job its target
+        duration. Users with credits get a larger share of the workers.
+
+        A request identical to one the same user already has queued or running
+        attaches to that job instead of starting another workflow run, and
+        shares its result. Requests asking for a fresh script always run on
+        their own.
+
+        Args:
+            request: The podcast generation request
+            user_id: Id of the user that submitted the job
+            credits: Credits of the user, which decide their priority tier
+
+        Returns:
+            The queued job
+
+        Raises:
+            JobQueueFullError: If the queue is at capacity
+        """
+        if self._scheduler is None:
+            raise RuntimeError("Job manager is not running")
+
+        self._cleanup_expired()
+        return self._enqueue(request, user_id, credits)
+
+    def submit_batch(
+        self,
+        requests: List[PodcastRequest],
+        user_id: Optional[str] = None,
+        credits: int = 0,
+        mode: ExecutionMode = ExecutionMode.INTERACTIVE
+    ) -> Batch:
+        """
+        Enqueue several podcast generations as one batch.
+
+        Items are scheduled like individual jobs of the submitting user, so
+        they share that user's fair share and concurrency cap. Identical items
+        run once. The whole batch is rejected if the queue cannot hold it.
+
+        In bulk mode, items without a cached script first get their script
+        from the bulk runner and are only queued for the workflow once it
+        arrives.
+
+        Args:
+            requests: The podcast generation requests
+            user_id: Id of the user that submitted the batch
+            credits: Credits of the user, which decide their priority tier
+            mode: How the scripts of the batch are generated
+
+        Returns:
+            The queued batch
+
+        Raises:
+            JobQueueFullError: If the queue cannot hold every item
+        """
+        if self._scheduler is None:
+            raise RuntimeError("Job manager is not running")
+
+        if mode == ExecutionMode.BULK and self.bulk_runner is None:
+            raise RuntimeError("Bulk mode is not configured")
+
+        self._cleanup_expired()
+        self._admit(requests)
+
+        jobs = []
+        for request in requests:
+            if mode == ExecutionMode.BULK and not self._has_cached_script(request):
+                jobs.append(self._enqueue_bulk(request, user_id, credits))
+            else:
+                jobs.append(self._enqueue(request, user_id, credits))
+
+        batch = Batch(jobs, user_id=user_id)
+        self._batches[batch.batch_id] = batch
+        return batch
+
+    def _enqueue_bulk(self, request: PodcastRequest, user_id: Optional[str], credits: int) -> Job:
+        """
+        Hand a job to the bulk runner, queuing it once its script is generated.
+
+        The job's work is reserved while the script is generated, so a finished
+        batch never pushes the queue past the limits it was admitted under.
+        """
+        job = Job(request, user_id=user_id)
+        self._jobs[job.job_id] = job
+        self._bulk_waiting += 1
+        self._backlog_minutes += self._job_cost(request)
+        self.bulk_runner.add(job, functools.partial(self._on_bulk_script, job, credits))
+        return job
+
+    def _on_bulk_script(self, job: Job, credits: int, script: Optional[str], error: Optional[str]) -> None:
+        """
+        Queue a bulk job for the workflow once its script is known.
+
+        Args:
+            job: The bulk job
+            credits: Credits of the user that submitted the job
+            script: The generated script, or None on failure
+            error: Why script generation failed
+        """
+        # Scheduling charges the reserved work again
+        if self._scheduler is not None:
+            self._bulk_waiting -= 1
+            self._backlog_minutes -= self._job_cost(job.request)
+
+        if job.is_finished:
+            # Cancelled while the batch was running
+            if script is not None and podcast_workflow.keep_cancelled_stages:
+                self._cache_script(job, script)
+            return
+
+        if script is None or self._scheduler is None:
+            job.finish(PodcastResponse(
+                success=False,
+                error_message=error or "Job manager is not running",
+                topic=job.request.topic,
+                voice_used=job.request.voice.value
+            ))
+            return
+
+        self._cache_script(job, script)
+        job.script = script
+        self._schedule(job, credits)
+
+    def _cache_script(self, job: Job, script: str) -> None:
+        """Store a bulk-generated script where the workflow would look for it, in the background."""
+        key = self._script_cache_key(job.request)
+
+        async def store():
+            try:
+                await asyncio.to_thread(script_cache.put, key, script)
+            except Exception as e:
+                print(f"Script cache store failed: {str(e)}")
+
+        asyncio.create_task(store())
+
+    def _has_cached_script(self, request: PodcastRequest) -> bool:
+        """Whether the workflow would reuse a cached script for the request."""
+        if request.cache_mode != CacheMode.REUSE:
+            return False
+
+        try:
+            return script_cache.contains(self._script_cache_key(request))
+        except Exception as e:
+            print(f"Script cache lookup failed: {str(e)}")
+            return False
+
+    def _script_cache_key(self, request: PodcastRequest) -> str:
+        """Build the script cache key the workflow uses for a request."""
+        script_agent = podcast_workflow.script_agent
+        return script_cache.make_key(
+            topic=request.topic,
+            tone=request.tone,
+            duration_minutes=request.duration_minutes,
+            model=script_agent.model,
+            prompt_version=script_agent.prompt_version
+        )
+
+    def _schedule(self, job: Job, credits: int) -> None:
+        """Hand a job to the fair-share scheduler."""
+        job.credits = credits
+        weight = self.paid_weight if credits > 0 else 1.0
+        cost = self._job_cost(job.request)
+        self._backlog_minutes += cost
+        self._scheduler.put(job, cost=cost, weight=weight)
+
+    def _job_cost(self, request: PodcastRequest) -> int:
+        """Estimate the work of a request in episode minutes."""
+        return request.duration_minutes or 1
+
+    def _admit(self, requests: List[PodcastRequest]) -> None:
+        """
+        Shed new work the workers cannot take on right now.
+
+        Requests are rejected when the queue depth, the number of jobs in
+        flight or the queued and running episode minutes would exceed their
+        limits. Near saturation the minutes budget still admits short episodes
+        while rejecting long ones.
+
+        Args:
+            requests: The requests about to be queued
+
+        Raises:
+            JobQueueFullError: If the requests must be shed, with an estimate
+                of when they would be admitted
+        """
+        queued = self._scheduler.size() + self._bulk_waiting
+        in_flight = queued + self._running
+        work = sum(self._job_cost(request) for request in requests)
+        average = self._backlog_minutes / in_flight if in_flight else work / len(requests)
+
+        if queued + len(requests) > self.max_queue_size:
+            excess = average * (queued + len(requests) - self.max_queue_size)
+        elif self.max_in_flight and in_flight + len(requests) > self.max_in_flight:
+            excess = average * (in_flight + len(requests) - self.max_in_flight)
+        elif self.max_backlog_minutes and self._backlog_minutes + work > self.max_backlog_minutes:
+            excess = self._backlog_minutes + work - self.max_backlog_minutes
+        else:
+            return
+
+        # Time for the workers to finish enough of the backlog to make room
+        retry_after = excess * self._seconds_per_minute / max(1, self.max_workers)
+        raise JobQueueFullError(
+            "Too many podcast generations in progress, try again later",
+            retry_after=min(600.0, max(1.0, retry_after))
+        )
+
+    def retry(self, job: Job) -> Job:
+        """
+        Queue a failed or cancelled job again.
+
+        The new run resumes after the last node the earlier run completed, so
+        for example a TTS failure does not regenerate the script.
+
+        Args:
+            job: The failed or cancelled job
+
+        Returns:
+            The queued job
+
+        Raises:
+            ValueError: If the job has not failed or been cancelled
+            JobQueueFullError: If the queue is at capacity
+        """
+        if self._scheduler is None:
+            raise RuntimeError("Job manager is not running")
+        if job.status not in (JobStatus.FAILED, JobStatus.CANCELLED):
+            raise ValueError("Only failed or cancelled jobs can be retried")
+        if job.task is not None or self._scheduler.position(job) is not None:
+            raise ValueError("Job is still running for identical requests")
+        self._admit([job.request])
+
+        # A retried follower runs the workflow itself
+        job.leader = None
+        job.segment_job_id = job.job_id
+        job.followers = []
+        job.status = JobStatus.QUEUED
+        job.stage = None
+        job.progress = 0.0
+        job.result = None
+        job.error_message = None
+        job.segments_ready = set()
+        job.attempts = 0
+        self._spent_segments.discard(job.job_id)
+        job.updated_at = time.time()
+
+        self._schedule(job, job.credits)
+        return job
+
+    def _enqueue(self, request: PodcastRequest, user_id: Optional[str], credits: int) -> Job:
+        """Queue a job or attach it to an identical in-flight one."""
+        key = self._single_flight_key(request, user_id)
+        leader = self._in_flight.get(key) if key else None
+        # A cancelled leader only finishes for the requests already attached
+        if leader is not None and leader.status != JobStatus.CANCELLED:
+            job = Job(request, user_id=user_id, leader=leader)
+            job.status = leader.status
+            job.stage = leader.stage
+            job.progress = leader.progress
+            job.segments_ready = set(leader.segments_ready)
+            leader.followers.append(job)
+            self._jobs[job.job_id] = job
+            return job
+
+        self._admit([request])
+
+        job = Job(request, user_id=user_id)
+        self._schedule(job, credits)
+
+        self._jobs[job.job_id] = job
+        if key:
+            self._in_flight[key] = job
+        return job
+
+    def cancel(self, job: Job) -> Job:
+        """
+        Cancel a queued or running job.
+
+        A queued job is taken out of the queue. A running job has its workflow
+        task cancelled, which aborts the OpenAI requests in flight and removes
+        partially written audio. Whether completed stages are kept for a retry
+        is decided by the workflow's keep_cancelled_stages policy. A job that
+        identical requests are attached to keeps running for them.
+
+        Args:
+            job: The job to cancel
+
+        Returns:
+            The cancelled job
+
+        Raises:
+            ValueError: If the job has already finished
+        """
+        if job.is_finished:
+            raise ValueError("Job has already finished")
+
+        job.mark_cancelled()
+
+        leader = job.leader
+        if leader is not None:
+            if job in leader.followers:
+                leader.followers.remove(job)
+            self._stop_if_unwanted(leader)
+        else:
+            self._stop_if_unwanted(job)
+
+        return job
+
+    def _stop_if_unwanted(self, job: Job) -> None:
+        """Stop a cancelled job's run once no attached request needs it anymore."""
+        if job.status != JobStatus.CANCELLED or job.followers:
+            return
+
+        key = self._single_flight_key(job.request, job.user_id)
+        if key and self._in_flight.get(key) is job:
+            del self._in_flight[key]
+
+        if self._scheduler is not None and self._scheduler.remove(job):
+            self._backlog_minutes -= self._job_cost(job.request)
+            return
+        if job.task is not None:
+            job.task.cancel()
+
+    def attach_listener(self, job: Job) -> None:
+        """
+        Record that a client started streaming a job's audio.
+
+        Args:
+            job: The streamed job
+        """
+        job.listeners += 1
+        self._segment_readers[job.segment_job_id] = self._segment_readers.get(job.segment_job_id, 0) + 1
+
+    def detach_listener(self, job: Job) -> None:
+        """
+        Record that a client stopped streaming a job's audio.
+
+        Once the last client is gone, the job is cancelled unless a client
+        reconnects within the grace period. Segments of a finished run are
+        deleted once nobody reads them anymore.
+
+        Args:
+            job: The streamed job
+        """
+        job.listeners -= 1
+
+        segment_job_id = job.segment_job_id
+        readers = self._segment_readers.get(segment_job_id, 0) - 1
+        if readers > 0:
+            self._segment_readers[segment_job_id] = readers
+        else:
+            self._segment_readers.pop(segment_job_id, None)
+            if segment_job_id in self._spent_segments:
+                self._remove_segments(segment_job_id)
+
+        if job.listeners > 0 or job.is_finished or not self.cancel_on_disconnect:
+            return
+
+        def cancel_abandoned() -> None:
+            if job.listeners == 0 and not job.is_finished:
+                self.cancel(job)
+
+        asyncio.get_running_loop().call_later(self.disconnect_grace_seconds, cancel_abandoned)
+
+    def get_job(self, job_id: str) -> Optional[Job]:
+        """
+        Look up a job by id.
+
+        Args:
+            job_id: The job id
+
+        Returns:
+            The job, or None if unknown or expired
+        """
+        return self._jobs.get(job_id)
+
+    def get_batch(self, batch_id: str) -> Optional[Batch]:
+        """
+        Look up a batch by id.
+
+        Args:
+            batch_id: The batch id
+
+        Returns:
+            The batch, or None if unknown or expired
+        """
+        return self._batches.get(batch_id)
+
+    def queue_position(self, job: Job) -> Optional[int]:
+        """
+        Get the place of a job in the queue.
+
+        Args:
+            job: The job
+
+        Returns:
+            1-based position, or None if the job is not waiting for a worker
+        """
+        if job.status != JobStatus.QUEUED or self._scheduler is None:
+            return None
+
+        # Followers wait on their leader's place in the queue
+        scheduled = self._jobs.get(job.segment_job_id, job)
+        return self._scheduler.position(scheduled)
+
+    def describe(self, job: Job) -> JobResponse:
+        """
+        Build the API representation of a job including its queue position.
+
+        Args:
+            job: The job
+
+        Returns:
+            The job response
+        """
+        return job.to_response(self.queue_position(job))
+
+    def describe_batch(self, batch: Batch) -> BatchResponse:
+        """
+        Build the API representation of a batch.
+
+        Args:
+            batch: The batch
+
+        Returns:
+            The batch response with the status of every item
+        """
+        return BatchResponse(
+            batch_id=batch.batch_id,
+            total=len(batch.jobs),
+            completed=sum(1 for job in batch.jobs if job.status == JobStatus.COMPLETED),
+            failed=sum(1 for job in batch.jobs if job.status == JobStatus.FAILED),
+            cancelled=sum(1 for job in batch.jobs if job.status == JobStatus.CANCELLED),
+            items=[self.describe(job) for job in batch.jobs],
+            created_at=batch.created_at
+        )
+
+    def _single_flight_key(self, request: PodcastRequest, user_id: Optional[str]) -> Optional[tuple]:
+        """
+        Build the key under which identical requests share one run.
+
+        Runs are only shared within one user, since each run checks, records
+        memory and saves the episode for the user it belongs to. Identical
+        requests of different users still share the cached script and TTS
+        segments.
+
+        Args:
+            request: The podcast generation request
+            user_id: Id of the user that submitted the request
+
+        Returns:
+            The key, or None if the request must not be shared
+        """
+        if request.cache_mode != CacheMode.REUSE:
+            return None
+
+        return (
+            user_id or "",
+            text_utils.normalize_topic(request.topic),
+            request.tone.value,
+            request.voice.value,
+            request.duration_minutes
+        )
+
+    def queue_size(self) -> int:
+        """Get the number of jobs waiting for a worker."""
+        return self._scheduler.size() if self._scheduler else 0
+
+    async def _worker(self) -> None:
+        """Consume jobs from the scheduler until cancelled."""
+        scheduler = self._scheduler
+        while True:
+            job = await scheduler.get()
+            self._running += 1
+            started = time.monotonic()
+            # The run gets its own task so cancelling the job leaves the worker alive
+            task = job.task = asyncio.create_task(self._run_job(job))
+            try:
+                await asyncio.wait({task})
+            finally:
+                task.cancel()
+                job.task = None
+                scheduler.release(job)
+                self._running -= 1
+                cost = self._job_cost(job.request)
+                self._backlog_minutes -= cost
+
+            # Runs that went all the way tell how fast the backlog drains
+            if job.result is not None and job.result.success:
+                elapsed = (time.monotonic() - started) / cost
+                self._seconds_per_minute = 0.8 * self._seconds_per_minute + 0.2 * elapsed
+
+    async def _run_job(self, job: Job) -> None:
+        """
+        Run the podcast workflow for a job and record its outcome.
+
+        Args:
+            job: The job to run
+        """
+        job.mark_running()
+
+        # Another worker process sharing the checkpoints may hold the run
+        try:
+            claimed = await podcast_workflow.claim_run(job.job_id)
+        except Exception as e:
+            print(f"Failed to lease run: {str(e)}")
+            claimed = True
+        if not claimed:
+            job.finish(PodcastResponse(
+                success=False,
+                error_message="Job is being run by another worker",
+                topic=job.request.topic,
+                voice_used=job.request.voice.value
+            ))
+            return
+
+        while True:
+            job.attempts += 1
+            try:
+                result = await podcast_workflow.generate_podcast(
+                    job.request,
+                    progress_callback=job.update_progress,
+                    job_id=job.job_id,
+                    segment_callback=job.mark_segment_ready,
+                    script=job.script,
+                    metadata={"user_id": job.user_id, "credits": job.credits},
+                    user_id=job.user_id
+                )
+            except Exception as e:
+                result = PodcastResponse(
+                    success=False,
+                    error_message=f"Job execution failed: {str(e)}",
+                    topic=job.request.topic,
+                    voice_used=job.request.voice.value
+                )
+
+            # Further attempts resume from the failed run's last checkpoint
+            if result.success or job.attempts >= self.max_attempts:
+                break
+
+        key = self._single_flight_key(job.request, job.user_id)
+        if key and self._in_flight.get(key) is job:
+            del self._in_flight[key]
+
+        job.finish(result)
+
+        # The finished episode replaces the segments, unless they are still being streamed
+        if self._segment_readers.get(job.job_id):
+            self._spent_segments.add(job.job_id)
+        else:
+            self._remove_segments(job.job_id)
+
+    def _remove_segments(self, segment_job_id: str) -> None:
+        """Delete the segment directory of a finished run."""
+        self._spent_segments.discard(segment_job_id)
+        audio_utils.remove_segment_dir(segment_job_id)
+
+        job = self._jobs.get(segment_job_id)
+        if job is not None:
+            job.discard_segments()
+
+    def _cleanup_expired(self) -> None:
+        """Forget finished jobs older than the TTL."""
+        current_time = time.time()
+        expired_ids = [
+            job_id for job_id, job in self._jobs.items()
+            if job.is_finished and current_time - job.updated_at > self.ttl_seconds
+        ]
+
+        for job_id in expired_ids:
+            job = self._jobs.pop(job_id)
+            if job.status in (JobStatus.FAILED, JobStatus.CANCELLED):
+                self._discard_checkpoints(job_id)
+
+        expired_batch_ids = [
+            batch_id for batch_id, batch in self._batches.items()
+            if batch.is_finished and current_time - max(job.updated_at for job in batch.jobs) > self.ttl_seconds
+        ]
+
+        for batch_id in expired_batch_ids:
+            del self._batches[batch_id]
+
+    def _discard_checkpoints(self, job_id: str) -> None:
+        """Drop the checkpoints kept for retrying a job in the background."""
+        async def discard():
+            try:
+                await podcast_workflow.discard_checkpoints(job_id)
+            except Exception as e:
+                print(f"Failed to discard checkpoints: {str(e)}")
+
+        asyncio.create_task(discard())
+
+
+# Global job manager instance
+job_manager = JobManager(
+    max_workers=int(os.getenv("JOB_MAX_WORKERS", "4")),
+    max_queue_size=int(os.getenv("JOB_MAX_QUEUE_SIZE", "100")),
+    ttl_hours=int(os.getenv("JOB_TTL_HOURS", "24")),
+    max_jobs_per_user=int(os.getenv("JOB_MAX_PER_USER", "2")),
+    paid_weight=float(os.getenv("JOB_PAID_WEIGHT", "4")),
+    bulk_runner=BulkScriptRunner(
+        batch_client=create_batch_client(
+            backend=os.getenv("BULK_BACKEND", "openai"),
+            work_dir=os.getenv("BULK_LOCAL_DIR", "./cache_data/bulk/local")
+        ),
+        script_agent=podcast_workflow.script_agent,
+        work_dir=os.getenv("BULK_WORK_DIR", "./cache_data/bulk"),
+        max_items=int(os.getenv("BULK_MAX_ITEMS", "1000")),
+        collect_seconds=float(os.getenv("BULK_COLLECT_SECONDS", "10")),
+        poll_seconds=float(os.getenv("BULK_POLL_SECONDS", "30"))
+    ),
+    max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "2")),
+    max_in_flight=int(os.getenv("JOB_MAX_IN_FLIGHT", "50")),
+    max_backlog_minutes=int(os.getenv("JOB_MAX_BACKLOG_MINUTES", "300")),
+    cancel_on_disconnect=os.getenv("JOB_CANCEL_ON_DISCONNECT", "true").lower() == "true",
+    disconnect_grace_seconds=float(os.getenv("JOB_DISCONNECT_GRACE_SECONDS", "10"))
+)
@@ -0,0 +1,176 @@
+"""
+Fair-share scheduling of queued generation jobs across users.
+"""
+
+import asyncio
+import heapq
+import itertools
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+# Virtual start, virtual finish and arrival order of a queued job
+Tags = Tuple[float, float, int]
+
+
+class UserQueue:
+    """Jobs one user is waiting on and how many of theirs are running."""
+
+    def __init__(self):
+        """Initialize an empty user queue."""
+        self.jobs: Deque = deque()
+        self.running = 0
+        self.last_finish = 0.0
+        self.ready = False
+
+
+class FairShareScheduler:
+    """
+    Weighted fair queue of jobs with one queue per user.
+
+    Each job is charged its cost divided by its user's weight in virtual time,
+    starting where the user's previous job ended or at the current virtual
+    time, whichever is later. Workers always take the queued job with the
+    earliest virtual finish among users below their concurrency cap, so a
+    user who bursts many long episodes only delays their own later jobs.
+    """
+
+    def __init__(self, max_per_user: int = 2):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_per_user: Maximum number of jobs of one user running at once
+        """
+        self.max_per_user = max(1, max_per_user)
+        self._users: Dict[str, UserQueue] = {}
+        self._tags: Dict[str, Tags] = {}
+        # Heads of the queues of users below their cap, by virtual finish
+        self._ready: List[Tuple[float, int, str]] = []
+        self._virtual_time = 0.0
+        self._sequence = itertools.count()
+        self._available = asyncio.Event()
+
+    def put(self, job, cost: float, weight: float) -> None:
+        """
+        Queue a job.
+
+        Args:
+            job: The job to queue
+            cost: Amount of work the job represents
+            weight: Share of the workers the job's user is entitled to
+        """
+        user_key = job.user_id or ""
+        user = self._users.setdefault(user_key, UserQueue())
+
+        virtual_start = max(self._virtual_time, user.last_finish)
+        virtual_finish = virtual_start + cost / weight
+        user.last_finish = virtual_finish
+
+        self._tags[job.job_id] = (virtual_start, virtual_finish, next(self._sequence))
+        user.jobs.append(job)
+        self._mark_ready(user_key, user)
+
+    async def get(self):
+        """
+        Wait for the next job to run.
+
+        Returns:
+            The queued job with the earliest virtual finish
+        """
+        while True:
+            while not self._ready:
+                self._available.clear()
+                await self._available.wait()
+
+            _, sequence, user_key = heapq.heappop(self._ready)
+            user = self._users.get(user_key)
+            # Entries of jobs removed from the head of a queue are skipped
+            if user is not None and user.jobs and self._tags[user.jobs[0].job_id][2] == sequence:
+                break
+
+        user.ready = False
+
+        job = user.jobs.popleft()
+        virtual_start, _, _ = self._tags.pop(job.job_id)
+        self._virtual_time = max(self._virtual_time, virtual_start)
+        user.running += 1
+
+        self._mark_ready(user_key, user)
+        return job
+
+    def release(self, job) -> None:
+        """
+        Record that a job taken with get has finished running.
+
+        Args:
+            job: The finished job
+        """
+        user_key = job.user_id or ""
+        user = self._users.get(user_key)
+        if user is None:
+            return
+
+        user.running -= 1
+        self._mark_ready(user_key, user)
+
+        # Idle users whose debt has been paid off need no state
+        if not user.jobs and not user.running and user.last_finish <= self._virtual_time:
+            del self._users[user_key]
+
+    def remove(self, job) -> bool:
+        """
+        Take a job out of the queue before it runs.
+
+        Args:
+            job: The queued job
+
+        Returns:
+            True if the job was queued and is now removed
+        """
+        if self._tags.pop(job.job_id, None) is None:
+            return False
+
+        user_key = job.user_id or ""
+        user = self._users[user_key]
+        was_head = user.jobs[0] is job
+        user.jobs.remove(job)
+
+        if was_head and user.ready:
+            user.ready = False
+            self._mark_ready(user_key, user)
+
+        return True
+
+    def position(self, job) -> Optional[int]:
+        """
+        Get the place of a queued job in the current dispatch order.
+
+        Args:
+            job: The queued job
+
+        Returns:
+            1-based position, or None if the job is not queued
+        """
+        tags = self._tags.get(job.job_id)
+        if tags is None:
+            return None
+
+        _, virtual_finish, sequence = tags
+        return 1 + sum(
+            1 for _, other_finish, other_sequence in self._tags.values()
+            if (other_finish, other_sequence) < (virtual_finish, sequence)
+        )
+
+    def size(self) -> int:
+        """Get the number of queued jobs."""
+        return len(self._tags)
+
+    def _mark_ready(self, user_key: str, user: UserQueue) -> None:
+        """Offer the user's next job to the workers if the user is below the cap."""
+        if user.ready or not user.jobs or user.running >= self.max_per_user:
+            return
+
+        _, virtual_finish, sequence = self._tags[user.jobs[0].job_id]
+        heapq.heappush(self._ready, (virtual_finish, sequence, user_key))
+        user.ready = True
+        self._available.set()
@@ -13,6 +13,10 @@ from api.podcast import router as podcast_router
 from api.order import router as order_router
 from utils.audio_utils import audio_utils
 from memory.memory_store import memory_store
+from jobs.job_manager import job_manager
+from workflows.podcast_workflow import podcast_workflow
+from agents.openai_client import openai_client_factory
+from agents.rate_limiter import rate_limit_scheduler
 from db import init_db
 from api import auth
 import sys
@@ -38,10 +42,26 @@ async def lifespan(app: FastAPI):
     if deleted_count > 0:
         print(f"🧹 Cleaned up {deleted_count} old audio files")
     
+    # Share one pooled OpenAI client between the agents
+    try:
+        podcast_workflow.use_client(openai_client_factory.get_client())
+    except ValueError as e:
+        print(f"⚠️ {e}")
+    
+    # Start writing generation history to the shared memory backend
+    memory_store.start()
+    
+    # Start the generation worker pool
+    await job_manager.start()
+    
     yield
     
     # Shutdown
     print("🛑 Shutting down AI Podcast Generator...")
+    await job_manager.stop()
+    await memory_store.stop()
+    await podcast_workflow.close()
+    await openai_client_factory.aclose()
 
 
 # Create FastAPI app
@@ -79,6 +99,13 @@ async def root():
         "description": "Generate high-quality podcast episodes using GPT-4 and OpenAI TTS",
         "endpoints": {
             "generate_podcast": "POST /api/v1/generate-podcast",
+            "generate_podcast_batch": "POST /api/v1/generate-podcast/batch",
+            "job_status": "GET /api/v1/jobs/{job_id}",
+            "retry_job": "POST /api/v1/jobs/{job_id}/retry",
+            "cancel_job": "DELETE /api/v1/jobs/{job_id}",
+            "batch_status": "GET /api/v1/batches/{batch_id}",
+            "batch_results": "GET /api/v1/batches/{batch_id}/results",
+            "stream_audio": "GET /api/v1/jobs/{job_id}/audio",
             "download_audio": "GET /api/v1/download/{filename}",
             "get_voices": "GET /api/v1/voices",
             "get_tones": "GET /api/v1/tones",
@@ -116,11 +143,16 @@ async def health_check():
                 }
             )
         
+        # Open circuits mean OpenAI is failing; new generations are rejected until it recovers
+        circuits = rate_limit_scheduler.circuit_states()
+        
         return {
-            "status": "healthy",
+            "status": "healthy" if all(state == "closed" for state in circuits.values()) else "degraded",
             "openai_configured": bool(openai_key),
+            "openai_circuits": circuits,
             "audio_directory": str(audio_utils.output_dir.absolute()),
-            "memory_entries": memory_store.size()
+            "memory_entries": memory_store.size(),
+            "queued_jobs": job_manager.queue_size()
         }
         
     except Exception as e:
@@ -141,7 +173,8 @@ async def http_exception_handler(request, exc):
         content={
             "error": exc.detail,
             "status_code": exc.status_code
-        }
+        },
+        headers=getattr(exc, "headers", None)
     )
 
 
@@ -0,0 +1,237 @@
+"""
+Persistent backends shared by the memory stores of several worker processes.
+"""
+
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from models.request_models import MemoryEntry
+
+# Entries to persist, each with the id of the user it belongs to
+EntryBatch = List[Tuple[str, MemoryEntry]]
+
+
+class MemoryBackend(ABC):
+    """
+    Interface of a persistent memory backend.
+
+    Every write and clear is recorded in a change log with the id of the
+    process that made it, so each process can find out which users' cached
+    histories other processes have changed.
+    """
+
+    @abstractmethod
+    def load(self, user_id: str, limit: int, since: float) -> List[MemoryEntry]:
+        """
+        Load the most recent entries of a user.
+
+        Args:
+            user_id: Id of the user
+            limit: Maximum number of entries to load
+            since: Oldest entry timestamp to load
+
+        Returns:
+            Entries in the order they were written
+        """
+
+    @abstractmethod
+    def write(self, entries: EntryBatch, writer: str) -> None:
+        """
+        Persist a batch of entries.
+
+        Args:
+            entries: The entries and the users they belong to
+            writer: Id of the writing process
+        """
+
+    @abstractmethod
+    def prune(self, users: List[str], keep: int, expired_before: float) -> None:
+        """
+        Delete entries that are expired or beyond what a user's history keeps.
+
+        Args:
+            users: Users whose histories are trimmed to the newest entries
+            keep: Number of entries kept per user
+            expired_before: Entries with older timestamps are deleted for all users
+        """
+
+    @abstractmethod
+    def clear(self, user_id: Optional[str], writer: str) -> None:
+        """
+        Delete the entries of one user, or of everyone.
+
+        Args:
+            user_id: Id of the user, or None for all users
+            writer: Id of the clearing process
+        """
+
+    @abstractmethod
+    def changes(self, after: int, writer: str) -> Tuple[List[Optional[str]], int]:
+        """
+        Find users whose entries other processes changed.
+
+        Args:
+            after: Change log position of the previous call
+            writer: Id of the calling process, whose own changes are skipped
+
+        Returns:
+            The changed user ids (None meaning every user) and the new position
+        """
+
+    def close(self) -> None:
+        """Release the backend's resources."""
+
+
+class SQLiteMemoryBackend(MemoryBackend):
+    """Memory backend in a SQLite file that worker processes on one host share."""
+
+    def __init__(self, db_path: str = "./cache_data/memory.sqlite3", change_log_hours: int = 24):
+        """
+        Initialize the SQLite backend.
+
+        Args:
+            db_path: Path of the SQLite database file
+            change_log_hours: How long change log records are kept in hours
+        """
+        self.db_path = Path(db_path)
+        self.change_log_seconds = change_log_hours * 3600
+        self._conn: Optional[sqlite3.Connection] = None
+        # Loads, flushes and clears run in threads of their own
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Lazy-open the database connection."""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=10.0)
+            # Let readers in other processes proceed while one process writes
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS memory_entries (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL,
+                    timestamp REAL NOT NULL,
+                    entry TEXT NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_memory_entries_user ON memory_entries (user_id, id)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_memory_entries_timestamp ON memory_entries (timestamp)")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS memory_changes (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT,
+                    writer TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.commit()
+        return self._conn
+
+    def load(self, user_id: str, limit: int, since: float) -> List[MemoryEntry]:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT entry FROM memory_entries WHERE user_id = ? AND timestamp >= ? ORDER BY id DESC LIMIT ?",
+                (user_id, since, limit)
+            ).fetchall()
+        return [MemoryEntry.model_validate_json(entry) for entry, in reversed(rows)]
+
+    def write(self, entries: EntryBatch, writer: str) -> None:
+        now = time.time()
+        users = list(dict.fromkeys(user_id for user_id, _ in entries))
+        with self._lock:
+            self.conn.executemany(
+                "INSERT INTO memory_entries (user_id, timestamp, entry) VALUES (?, ?, ?)",
+                [(user_id, entry.timestamp, entry.model_dump_json()) for user_id, entry in entries]
+            )
+            self.conn.executemany(
+                "INSERT INTO memory_changes (user_id, writer, created_at) VALUES (?, ?, ?)",
+                [(user_id, writer, now) for user_id in users]
+            )
+            self.conn.commit()
+
+    def prune(self, users: List[str], keep: int, expired_before: float) -> None:
+        with self._lock:
+            self.conn.execute("DELETE FROM memory_entries WHERE timestamp < ?", (expired_before,))
+            for user_id in users:
+                self.conn.execute(
+                    """
+                    DELETE FROM memory_entries WHERE user_id = ? AND id <= (
+                        SELECT id FROM memory_entries WHERE user_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?
+                    )
+                    """,
+                    (user_id, user_id, keep)
+                )
+            self.conn.execute(
+                "DELETE FROM memory_changes WHERE created_at < ?",
+                (time.time() - self.change_log_seconds,)
+            )
+            self.conn.commit()
+
+    def clear(self, user_id: Optional[str], writer: str) -> None:
+        with self._lock:
+            if user_id is None:
+                self.conn.execute("DELETE FROM memory_entries")
+            else:
+                self.conn.execute("DELETE FROM memory_entries WHERE user_id = ?", (user_id,))
+            self.conn.execute(
+                "INSERT INTO memory_changes (user_id, writer, created_at) VALUES (?, ?, ?)",
+                (user_id, writer, time.time())
+            )
+            self.conn.commit()
+
+    def changes(self, after: int, writer: str) -> Tuple[List[Optional[str]], int]:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, user_id, writer FROM memory_changes WHERE id > ? ORDER BY id",
+                (after,)
+            ).fetchall()
+        if not rows:
+            return [], after
+
+        users = list(dict.fromkeys(user_id for _, user_id, change_writer in rows if change_writer != writer))
+        return users, rows[-1][0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get backend statistics.
+
+        Returns:
+            Dictionary with the number of persisted entries and users
+        """
+        with self._lock:
+            entries, users = self.conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT user_id) FROM memory_entries"
+            ).fetchone()
+        return {"entries": entries, "users": users}
+
+
+def create_memory_backend(backend: str = "sqlite", db_path: str = "./cache_data/memory.sqlite3") -> Optional[MemoryBackend]:
+    """
+    Create the memory backend for a backend name.
+
+    Args:
+        backend: sqlite for a shared SQLite file or memory for no persistence
+        db_path: Path of the SQLite database file
+
+    Returns:
+        The backend, or None to keep history in process memory only
+    """
+    if backend == "memory":
+        return None
+    if backend == "sqlite":
+        return SQLiteMemoryBackend(db_path)
+    raise ValueError(f"Unknown memory backend: {backend}")
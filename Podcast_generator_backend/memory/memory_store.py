@@ -2,14 +2,234 @@
 Simple in-memory memory store for podcast generation history.
 """
 
+import asyncio
+import bisect
+import functools
+import heapq
+import itertools
+import os
+import re
 import time
-from typing import Dict, List, Optional
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from collections import OrderedDict
+from dotenv import load_dotenv
+from memory.backends import EntryBatch, MemoryBackend, create_memory_backend
 from models.request_models import MemoryEntry, Tone, Voice
 
+load_dotenv()
+
+
+class RankedCounter:
+    """
+    Counts of values with constant-time access to the most frequent one.
+    
+    Values are grouped in buckets by count. Counts only ever change by one,
+    so the highest non-empty bucket can be tracked without searching.
+    """
+    
+    def __init__(self):
+        """Initialize an empty counter."""
+        self._counts: Dict[Any, int] = {}
+        # Values per count, in the order they reached it
+        self._buckets: Dict[int, Dict[Any, None]] = {}
+        self._max = 0
+    
+    def increment(self, value: Any) -> None:
+        """
+        Count one more occurrence of a value.
+        
+        Args:
+            value: The value
+        """
+        count = self._counts.get(value, 0)
+        self._move(value, count, count + 1)
+        if count + 1 > self._max:
+            self._max = count + 1
+    
+    def decrement(self, value: Any) -> None:
+        """
+        Count one less occurrence of a value.
+        
+        Args:
+            value: The value
+        """
+        count = self._counts.get(value, 0)
+        if count == 0:
+            return
+        
+        self._move(value, count, count - 1)
+        if count == self._max and not self._buckets.get(count):
+            self._max = count - 1
+    
+    def most_common(self) -> Optional[Any]:
+        """Get the most frequent value, or None if nothing is counted."""
+        if self._max == 0:
+            return None
+        return next(iter(self._buckets[self._max]))
+    
+    def as_dict(self) -> Dict[Any, int]:
+        """Get the count of every value."""
+        return dict(self._counts)
+    
+    def clear(self) -> None:
+        """Forget all counts."""
+        self._counts.clear()
+        self._buckets.clear()
+        self._max = 0
+    
+    def _move(self, value: Any, old: int, new: int) -> None:
+        """Move a value from the bucket of its old count to that of its new one."""
+        if old:
+            bucket = self._buckets[old]
+            del bucket[value]
+            if not bucket:
+                del self._buckets[old]
+        
+        if new:
+            self._counts[value] = new
+            self._buckets.setdefault(new, {})[value] = None
+        else:
+            del self._counts[value]
+
+
+class TopicIndex:
+    """
+    Inverted index from the words of topics to entry keys.
+    
+    Topics are lowercased and split into words, each kept under a sorted
+    list of the distinct words. A query word finds the words it starts by
+    bisecting that list, so prefixes are matched without indexing every
+    prefix, and the index holds one posting per indexed word of an entry.
+    Only the first max_words words of a topic, cut to max_word_length
+    characters, are indexed, which bounds the footprint of each entry.
+    """
+    
+    def __init__(self, max_words: int = 16, max_word_length: int = 32):
+        """
+        Initialize an empty index.
+        
+        Args:
+            max_words: Distinct words indexed per topic
+            max_word_length: Characters of a word that are indexed
+        """
+        self.max_words = max_words
+        self.max_word_length = max_word_length
+        # Keys of the entries containing each word, and the words in sorted order
+        self._postings: Dict[str, Dict[str, None]] = {}
+        self._words: List[str] = []
+        # Order in which each entry was added and the words it is indexed under
+        self._entries: Dict[str, Tuple[int, Tuple[str, ...]]] = {}
+        self._sequence = itertools.count()
+    
+    def tokenize(self, text: str) -> List[str]:
+        """Split text into its distinct lowercase words, as far as they are indexed."""
+        words = (word[:self.max_word_length] for word in re.findall(r"\w+", text.lower()))
+        return list(itertools.islice(dict.fromkeys(words), self.max_words))
+    
+    def add(self, key: str, topic: str) -> None:
+        """
+        Index an entry.
+        
+        Args:
+            key: Key of the entry
+            topic: Topic of the entry
+        """
+        words = tuple(self.tokenize(topic))
+        self._entries[key] = (next(self._sequence), words)
+        for word in words:
+            posting = self._postings.get(word)
+            if posting is None:
+                posting = self._postings[word] = {}
+                bisect.insort(self._words, word)
+            posting[key] = None
+    
+    def remove(self, key: str) -> None:
+        """
+        Remove an entry from the index.
+        
+        Args:
+            key: Key of the entry
+        """
+        indexed = self._entries.pop(key, None)
+        if indexed is None:
+            return
+        
+        for word in indexed[1]:
+            posting = self._postings[word]
+            del posting[key]
+            if not posting:
+                del self._postings[word]
+                del self._words[bisect.bisect_left(self._words, word)]
+    
+    def search(self, query: str) -> Optional[List[str]]:
+        """
+        Find entries whose topic has a word starting with each word of the query.
+        
+        Args:
+            query: The words or word prefixes to search for
+            
+        Returns:
+            Keys of the matching entries in the order they were added,
+            or None if the query has no words
+        """
+        prefixes = self.tokenize(query)
+        if not prefixes:
+            return None
+        
+        # Collect the entries of the most selective query word
+        candidates: Dict[str, None] = {}
+        smallest = None
+        for prefix in prefixes:
+            postings = self._postings_of(prefix)
+            size = sum(len(posting) for posting in postings)
+            if size == 0:
+                return []
+            if smallest is None or size < smallest[0]:
+                smallest = (size, prefix, postings)
+        
+        _, chosen, postings = smallest
+        for posting in postings:
+            candidates.update(posting)
+        
+        # Check the other query words against each candidate's own words
+        others = [prefix for prefix in prefixes if prefix != chosen]
+        matches = [
+            key for key in candidates
+            if all(any(word.startswith(prefix) for word in self._entries[key][1]) for prefix in others)
+        ]
+        matches.sort(key=lambda key: self._entries[key][0])
+        return matches
+    
+    def clear(self) -> None:
+        """Remove all entries from the index."""
+        self._postings.clear()
+        self._words.clear()
+        self._entries.clear()
+    
+    def _postings_of(self, prefix: str) -> List[Dict[str, None]]:
+        """Get the postings of every indexed word starting with a prefix."""
+        postings = []
+        index = bisect.bisect_left(self._words, prefix)
+        while index < len(self._words) and self._words[index].startswith(prefix):
+            postings.append(self._postings[self._words[index]])
+            index += 1
+        return postings
+
 
 class MemoryStore:
-    """Simple in-memory store with TTL and capacity management."""
+    """
+    Simple in-memory store with TTL and capacity management.
+    
+    Expiry times are kept in a min-heap, so each call only pops the entries
+    that have expired since the last one instead of scanning the store.
+    Entries evicted for capacity leave their heap item behind; it is skipped
+    when popped, and the heap is rebuilt once such items dominate it.
+    
+    Preference aggregates and the topic and voice indexes are updated
+    whenever an entry is added, evicted or expires, so reading them does
+    not touch the entries that do not match.
+    """
     
     def __init__(self, max_entries: int = 100, ttl_hours: int = 24):
         """
@@ -22,6 +242,15 @@ class MemoryStore:
         self.max_entries = max_entries
         self.ttl_seconds = ttl_hours * 3600
         self._store: OrderedDict[str, MemoryEntry] = OrderedDict()
+        # Expiry time and key of each entry, earliest first
+        self._expiry: List[Tuple[float, str]] = []
+        # Running aggregates behind get_user_preferences
+        self._voice_counts = RankedCounter()
+        self._tone_counts = RankedCounter()
+        self._successes = 0
+        # Secondary indexes behind the topic and voice lookups
+        self._topic_index = TopicIndex()
+        self._by_voice: Dict[Voice, Dict[str, None]] = {}
     
     def add_entry(self, entry: MemoryEntry) -> None:
         """
@@ -37,11 +266,23 @@ class MemoryStore:
         key = f"{entry.topic}_{entry.tone}_{entry.voice}_{entry.timestamp}"
         
         # Add to store
+        replaced = self._store.get(key)
+        if replaced is None:
+            heapq.heappush(self._expiry, (entry.timestamp + self.ttl_seconds, key))
+            # The key covers topic and voice, so a replaced entry stays indexed as is
+            self._index(key, entry)
+        else:
+            self._uncount(replaced)
         self._store[key] = entry
+        self._count(entry)
         
         # Remove oldest entry if we exceed max_entries
         if len(self._store) > self.max_entries:
-            self._store.popitem(last=False)
+            evicted_key, evicted = self._store.popitem(last=False)
+            self._uncount(evicted)
+            self._unindex(evicted_key, evicted)
+            if len(self._expiry) > 2 * len(self._store):
+                self._compact_expiry()
     
     def get_recent_entries(self, limit: int = 10) -> List[MemoryEntry]:
         """
@@ -54,12 +295,19 @@ class MemoryStore:
             List of recent memory entries
         """
         self._cleanup_expired()
-        return list(self._store.values())[-limit:]
+        if limit <= 0:
+            return []
+        recent = list(itertools.islice(reversed(self._store.values()), limit))
+        recent.reverse()
+        return recent
     
     def get_entries_by_topic(self, topic: str) -> List[MemoryEntry]:
         """
         Get entries that match a specific topic.
         
+        Every word of the query must be a word, or the start of a word, of
+        the entry's topic, ignoring case, so partially typed topics match.
+        
         Args:
             topic: The topic to search for
             
@@ -67,7 +315,10 @@ class MemoryStore:
             List of matching memory entries
         """
         self._cleanup_expired()
-        return [entry for entry in self._store.values() if topic.lower() in entry.topic.lower()]
+        keys = self._topic_index.search(topic)
+        if keys is None:
+            return list(self._store.values())
+        return [self._store[key] for key in keys]
     
     def get_entries_by_voice(self, voice: Voice) -> List[MemoryEntry]:
         """
@@ -80,7 +331,7 @@ class MemoryStore:
             List of matching memory entries
         """
         self._cleanup_expired()
-        return [entry for entry in self._store.values() if entry.voice == voice]
+        return [self._store[key] for key in self._by_voice.get(voice, ())]
     
     def get_user_preferences(self) -> Dict[str, any]:
         """
@@ -94,44 +345,75 @@ class MemoryStore:
         if not self._store:
             return {}
         
-        # Count preferences
-        voice_counts = {}
-        tone_counts = {}
-        success_rate = 0
         total_entries = len(self._store)
-        
-        for entry in self._store.values():
-            voice_counts[entry.voice] = voice_counts.get(entry.voice, 0) + 1
-            tone_counts[entry.tone] = tone_counts.get(entry.tone, 0) + 1
-            if entry.success:
-                success_rate += 1
-        
-        # Calculate percentages
-        success_rate = (success_rate / total_entries) * 100 if total_entries > 0 else 0
+        success_rate = (self._successes / total_entries) * 100
         
         return {
-            "preferred_voice": max(voice_counts.items(), key=lambda x: x[1])[0] if voice_counts else None,
-            "preferred_tone": max(tone_counts.items(), key=lambda x: x[1])[0] if tone_counts else None,
+            "preferred_voice": self._voice_counts.most_common(),
+            "preferred_tone": self._tone_counts.most_common(),
             "success_rate": round(success_rate, 2),
             "total_generations": total_entries,
-            "voice_distribution": voice_counts,
-            "tone_distribution": tone_counts
+            "voice_distribution": self._voice_counts.as_dict(),
+            "tone_distribution": self._tone_counts.as_dict()
         }
     
+    def _count(self, entry: MemoryEntry) -> None:
+        """Add an entry to the preference aggregates."""
+        self._voice_counts.increment(entry.voice)
+        self._tone_counts.increment(entry.tone)
+        if entry.success:
+            self._successes += 1
+    
+    def _uncount(self, entry: MemoryEntry) -> None:
+        """Remove an entry from the preference aggregates."""
+        self._voice_counts.decrement(entry.voice)
+        self._tone_counts.decrement(entry.tone)
+        if entry.success:
+            self._successes -= 1
+    
+    def _index(self, key: str, entry: MemoryEntry) -> None:
+        """Add an entry to the topic and voice indexes."""
+        self._topic_index.add(key, entry.topic)
+        self._by_voice.setdefault(entry.voice, {})[key] = None
+    
+    def _unindex(self, key: str, entry: MemoryEntry) -> None:
+        """Remove an entry from the topic and voice indexes."""
+        self._topic_index.remove(key)
+        keys = self._by_voice.get(entry.voice)
+        if keys is not None:
+            keys.pop(key, None)
+            if not keys:
+                del self._by_voice[entry.voice]
+    
     def _cleanup_expired(self) -> None:
         """Remove expired entries from the store."""
         current_time = time.time()
-        expired_keys = [
-            key for key, entry in self._store.items()
-            if current_time - entry.timestamp > self.ttl_seconds
-        ]
-        
-        for key in expired_keys:
-            del self._store[key]
+        while self._expiry and self._expiry[0][0] < current_time:
+            _, key = heapq.heappop(self._expiry)
+            # Entries already evicted for capacity are gone
+            entry = self._store.pop(key, None)
+            if entry is not None:
+                self._uncount(entry)
+                self._unindex(key, entry)
+    
+    def _compact_expiry(self) -> None:
+        """Rebuild the expiry heap from the entries still in the store."""
+        self._expiry = [(entry.timestamp + self.ttl_seconds, key) for key, entry in self._store.items()]
+        heapq.heapify(self._expiry)
+    
+    def next_expiry(self) -> Optional[float]:
+        """Get a time no later than when the next entry expires, or None if empty."""
+        return self._expiry[0][0] if self._expiry else None
     
     def clear(self) -> None:
         """Clear all entries from the store."""
         self._store.clear()
+        self._expiry.clear()
+        self._voice_counts.clear()
+        self._tone_counts.clear()
+        self._successes = 0
+        self._topic_index.clear()
+        self._by_voice.clear()
     
     def size(self) -> int:
         """Get the current number of entries in the store."""
@@ -139,5 +421,410 @@ class MemoryStore:
         return len(self._store)
 
 
+class PartitionedMemoryStore:
+    """
+    Generation history partitioned by user.
+    
+    Every user gets their own MemoryStore shard with its own limits, so one
+    heavy user cannot evict anyone else's history and preferences reflect
+    only that user's generations. Shards are kept in least-recently-used
+    order. Once all shards together hold more entries than the global
+    budget, the shards used longest ago are dropped whole.
+    
+    A heap of shard expiry times lets each call expire entries of idle
+    shards too, so the entry count stays exact and empty shards are freed.
+    
+    With a backend the shards are a cache of the persisted histories that
+    every worker process shares. Callers await load before reading a user's
+    history, which reads it from the backend in a thread on a miss. New
+    entries are buffered and written in batches by a background flusher,
+    and after each flush the shards other processes have changed are
+    dropped so they are loaded again on next use.
+    """
+    
+    def __init__(
+        self,
+        max_entries_per_user: int = 100,
+        ttl_hours: int = 24,
+        max_total_entries: int = 100000,
+        backend: Optional[MemoryBackend] = None,
+        flush_seconds: float = 1.0,
+        flush_batch: int = 100
+    ):
+        """
+        Initialize the partitioned store.
+        
+        Args:
+            max_entries_per_user: Maximum number of entries of one user
+            ttl_hours: Time to live for entries in hours
+            max_total_entries: Maximum number of entries across all users
+            backend: Persistent backend shared with other processes, None for none
+            flush_seconds: Interval between writes of buffered entries
+            flush_batch: Buffered entries that trigger a write before the interval ends
+        """
+        self.max_entries_per_user = max_entries_per_user
+        self.ttl_hours = ttl_hours
+        self.max_total_entries = max_total_entries
+        self.backend = backend
+        self.flush_seconds = flush_seconds
+        self.flush_batch = max(1, flush_batch)
+        self._shards: OrderedDict[str, MemoryStore] = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._total = 0
+        # When some entry of a shard may expire, earliest first
+        self._expiry: List[Tuple[float, str]] = []
+        self.evicted_shards = 0
+        # Users the backend has no history for, so misses do not hit it each time
+        self._absent: OrderedDict[str, None] = OrderedDict()
+        self._writer = uuid.uuid4().hex
+        self._pending: EntryBatch = []
+        self._flushing: EntryBatch = []
+        self._cursor = 0
+        self._flush_requested = asyncio.Event()
+        self._flusher: Optional[asyncio.Task] = None
+        # Backend reads in progress, shared by concurrent loads of one user
+        self._loading: Dict[str, asyncio.Task] = {}
+        self.flushed_entries = 0
+        self.dropped_writes = 0
+    
+    def start(self) -> None:
+        """Start writing buffered entries to the backend on the running event loop."""
+        if self.backend is None or self._flusher is not None:
+            return
+        
+        try:
+            # Changes made before this process started are already in the backend
+            _, self._cursor = self.backend.changes(0, self._writer)
+        except Exception as e:
+            print(f"Failed to read memory change log: {str(e)}")
+        self._flusher = asyncio.create_task(self._flush_loop(), name="memory-flusher")
+    
+    async def stop(self) -> None:
+        """Stop the flusher and write the entries still buffered."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        
+        if self.backend is not None:
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Failed to flush memory entries: {str(e)}")
+            self.backend.close()
+    
+    async def flush(self) -> None:
+        """Write buffered entries to the backend and drop shards other processes changed."""
+        if self.backend is None:
+            return
+        
+        if self._pending:
+            batch, self._pending = self._pending, []
+            self._flushing = batch
+            try:
+                await asyncio.to_thread(self.backend.write, batch, self._writer)
+            except Exception:
+                self._pending[:0] = batch
+                raise
+            finally:
+                self._flushing = []
+            self.flushed_entries += len(batch)
+            
+            users = list(dict.fromkeys(user_key for user_key, _ in batch))
+            await asyncio.to_thread(
+                self.backend.prune, users, self.max_entries_per_user, time.time() - self.ttl_hours * 3600
+            )
+        
+        users, self._cursor = await asyncio.to_thread(self.backend.changes, self._cursor, self._writer)
+        for user_key in users:
+            self._invalidate(user_key)
+    
+    async def load(self, user_id: Optional[str] = None) -> None:
+        """
+        Make sure a user's history is cached, reading it from the backend on a miss.
+        
+        Args:
+            user_id: Id of the user
+        """
+        user_key = user_id or ""
+        if self.backend is None or user_key in self._shards or user_key in self._absent:
+            return
+        
+        task = self._loading.get(user_key)
+        if task is None:
+            task = asyncio.create_task(asyncio.to_thread(
+                self.backend.load, user_key, self.max_entries_per_user, time.time() - self.ttl_hours * 3600
+            ))
+            self._loading[user_key] = task
+            task.add_done_callback(lambda _: self._loading.pop(user_key, None))
+            task.add_done_callback(functools.partial(self._populate, user_key))
+        
+        try:
+            await asyncio.shield(task)
+        except Exception as e:
+            print(f"Failed to load memory of user {user_key}: {str(e)}")
+    
+    def add_entry(self, entry: MemoryEntry, user_id: Optional[str] = None) -> None:
+        """
+        Add a new memory entry to a user's history.
+        
+        Args:
+            entry: The memory entry to add
+            user_id: Id of the user the entry belongs to
+        """
+        self._cleanup_expired()
+        
+        user_key = user_id or ""
+        shard = self._shards.get(user_key)
+        if shard is None:
+            if self.backend is not None and user_key not in self._absent:
+                # Only persist, since the rest of the history is not cached to add to
+                self._persist(user_key, entry)
+                return
+            shard = self._new_shard(user_key)
+        self._shards.move_to_end(user_key)
+        self._absent.pop(user_key, None)
+        
+        shard.add_entry(entry)
+        self._sync(user_key, shard)
+        self._schedule_expiry(shard.ttl_seconds + entry.timestamp, user_key)
+        self._evict()
+        self._persist(user_key, entry)
+    
+    def get_recent_entries(self, limit: int = 10, user_id: Optional[str] = None) -> List[MemoryEntry]:
+        """
+        Get a user's recent memory entries.
+        
+        Args:
+            limit: Maximum number of entries to return
+            user_id: Id of the user
+            
+        Returns:
+            List of recent memory entries
+        """
+        return self._read(user_id, lambda shard: shard.get_recent_entries(limit), [])
+    
+    def get_entries_by_topic(self, topic: str, user_id: Optional[str] = None) -> List[MemoryEntry]:
+        """
+        Get a user's entries that match a specific topic.
+        
+        Args:
+            topic: The topic to search for
+            user_id: Id of the user
+            
+        Returns:
+            List of matching memory entries
+        """
+        return self._read(user_id, lambda shard: shard.get_entries_by_topic(topic), [])
+    
+    def get_entries_by_voice(self, voice: Voice, user_id: Optional[str] = None) -> List[MemoryEntry]:
+        """
+        Get a user's entries that used a specific voice.
+        
+        Args:
+            voice: The voice to search for
+            user_id: Id of the user
+            
+        Returns:
+            List of matching memory entries
+        """
+        return self._read(user_id, lambda shard: shard.get_entries_by_voice(voice), [])
+    
+    def get_user_preferences(self, user_id: Optional[str] = None) -> Dict[str, any]:
+        """
+        Analyze a user's preferences based on their memory entries.
+        
+        Args:
+            user_id: Id of the user
+            
+        Returns:
+            Dictionary with user preferences
+        """
+        return self._read(user_id, lambda shard: shard.get_user_preferences(), {})
+    
+    async def clear(self, user_id: Optional[str] = None) -> None:
+        """
+        Clear all entries of one user, or of everyone.
+        
+        Args:
+            user_id: Id of the user, or None to clear every shard
+        """
+        if user_id is None:
+            self._pending.clear()
+        else:
+            self._pending = [(user_key, entry) for user_key, entry in self._pending if user_key != user_id]
+        self._invalidate(user_id)
+        
+        if self.backend is not None:
+            await asyncio.to_thread(self.backend.clear, user_id, self._writer)
+    
+    def size(self) -> int:
+        """Get the current number of entries across all users."""
+        self._cleanup_expired()
+        return self._total
+    
+    def stats(self) -> dict:
+        """
+        Get partitioning statistics.
+        
+        Returns:
+            Dictionary with entry and shard counts and the configured limits
+        """
+        return {
+            "entries": self.size(),
+            "users": len(self._shards),
+            "max_entries_per_user": self.max_entries_per_user,
+            "max_total_entries": self.max_total_entries,
+            "evicted_users": self.evicted_shards,
+            "backend": type(self.backend).__name__ if self.backend is not None else None,
+            "pending_writes": len(self._pending),
+            "flushed_entries": self.flushed_entries,
+            "dropped_writes": self.dropped_writes
+        }
+    
+    def _read(self, user_id: Optional[str], read: Callable[[MemoryStore], Any], default: Any) -> Any:
+        """Run a lookup against a user's shard, marking it as recently used."""
+        self._cleanup_expired()
+        
+        user_key = user_id or ""
+        shard = self._shards.get(user_key)
+        if shard is None:
+            return default
+        
+        self._shards.move_to_end(user_key)
+        result = read(shard)
+        self._sync(user_key, shard)
+        return result
+    
+    def _new_shard(self, user_key: str) -> MemoryStore:
+        """Create an empty shard for a user."""
+        shard = MemoryStore(max_entries=self.max_entries_per_user, ttl_hours=self.ttl_hours)
+        self._shards[user_key] = shard
+        self._sizes[user_key] = 0
+        return shard
+    
+    def _populate(self, user_key: str, task: asyncio.Task) -> None:
+        """Cache the history a backend read returned for a user."""
+        if task.cancelled() or task.exception() is not None or user_key in self._shards:
+            return
+        
+        # Entries of this process that are not written yet are newer than the loaded ones
+        entries = task.result()
+        entries += [entry for pending_key, entry in self._flushing + self._pending if pending_key == user_key]
+        if not entries:
+            self._absent[user_key] = None
+            if len(self._absent) > self.max_total_entries:
+                self._absent.popitem(last=False)
+            return
+        
+        shard = self._new_shard(user_key)
+        for entry in entries:
+            shard.add_entry(entry)
+        self._sync(user_key, shard)
+        if user_key in self._shards:
+            self._schedule_expiry(shard.next_expiry(), user_key)
+            self._evict()
+    
+    def _evict(self) -> None:
+        """Drop whole shards of the least recently active users while over the global budget."""
+        while self._total > self.max_total_entries and len(self._shards) > 1:
+            evicted_key, _ = self._shards.popitem(last=False)
+            self._total -= self._sizes.pop(evicted_key)
+            self.evicted_shards += 1
+    
+    def _invalidate(self, user_key: Optional[str]) -> None:
+        """Forget the cached shard of a user, or of everyone for None."""
+        if user_key is None:
+            self._shards.clear()
+            self._sizes.clear()
+            self._expiry.clear()
+            self._absent.clear()
+            self._total = 0
+            return
+        
+        self._absent.pop(user_key, None)
+        if user_key in self._shards:
+            del self._shards[user_key]
+            self._total -= self._sizes.pop(user_key)
+    
+    def _persist(self, user_key: str, entry: MemoryEntry) -> None:
+        """Buffer an entry for the flusher, or write it right away while no flusher runs."""
+        if self.backend is None:
+            return
+        
+        if self._flusher is None:
+            try:
+                self.backend.write([(user_key, entry)], self._writer)
+            except Exception as e:
+                print(f"Failed to persist memory entry: {str(e)}")
+            return
+        
+        self._pending.append((user_key, entry))
+        # Shed the oldest writes rather than grow without bound while the backend is down
+        if len(self._pending) > self.max_total_entries:
+            del self._pending[0]
+            self.dropped_writes += 1
+        if len(self._pending) >= self.flush_batch:
+            self._flush_requested.set()
+    
+    async def _flush_loop(self) -> None:
+        """Flush buffered entries periodically, or early once a batch is full, until cancelled."""
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Failed to flush memory entries: {str(e)}")
+    
+    def _sync(self, user_key: str, shard: MemoryStore) -> None:
+        """Account for entries a shard added, evicted or expired, freeing it once empty."""
+        size = shard.size()
+        self._total += size - self._sizes[user_key]
+        self._sizes[user_key] = size
+        if size == 0:
+            del self._shards[user_key]
+            del self._sizes[user_key]
+    
+    def _schedule_expiry(self, expires_at: float, user_key: str) -> None:
+        """Remember to expire entries of a shard, rebuilding the heap once stale items dominate it."""
+        heapq.heappush(self._expiry, (expires_at, user_key))
+        
+        if len(self._expiry) > 2 * len(self._shards) + 16:
+            self._expiry = [
+                (shard.next_expiry(), user_key)
+                for user_key, shard in self._shards.items()
+                if shard.next_expiry() is not None
+            ]
+            heapq.heapify(self._expiry)
+    
+    def _cleanup_expired(self) -> None:
+        """Expire entries of every shard whose next expiry has passed."""
+        current_time = time.time()
+        while self._expiry and self._expiry[0][0] < current_time:
+            _, user_key = heapq.heappop(self._expiry)
+            shard = self._shards.get(user_key)
+            if shard is None:
+                continue
+            
+            self._sync(user_key, shard)
+            if user_key in self._shards:
+                heapq.heappush(self._expiry, (shard.next_expiry(), user_key))
+
+
 # Global memory store instance
-memory_store = MemoryStore() 
\ No newline at end of file
+memory_store = PartitionedMemoryStore(
+    max_entries_per_user=int(os.getenv("MEMORY_MAX_ENTRIES", "100")),
+    ttl_hours=int(os.getenv("MEMORY_TTL_HOURS", "24")),
+    max_total_entries=int(os.getenv("MEMORY_MAX_TOTAL_ENTRIES", "100000")),
+    backend=create_memory_backend(
+        backend=os.getenv("MEMORY_BACKEND", "sqlite"),
+        db_path=os.getenv("MEMORY_DB", "./cache_data/memory.sqlite3")
+    ),
+    flush_seconds=float(os.getenv("MEMORY_FLUSH_SECONDS", "1.0")),
+    flush_batch=int(os.getenv("MEMORY_FLUSH_BATCH", "100"))
+) 
\ No newline at end of file
@@ -3,7 +3,7 @@ Pydantic models for request and response validation.
 """
 
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field, validator
 
 
@@ -27,12 +27,19 @@ class Voice(str, Enum):
     SHIMMER = "shimmer"
 
 
+class CacheMode(str, Enum):
+    """Whether a generation may reuse a cached script."""
+    REUSE = "reuse"
+    FRESH = "fresh"
+
+
 class PodcastRequest(BaseModel):
     """Request model for podcast generation."""
     topic: str = Field(..., min_length=1, max_length=500, description="The podcast topic")
     tone: Tone = Field(default=Tone.CONVERSATIONAL, description="The desired tone of the podcast")
     voice: Voice = Field(default=Voice.FABLE, description="The TTS voice to use")
     duration_minutes: Optional[int] = Field(default=5, ge=1, le=30, description="Target duration in minutes")
+    cache_mode: CacheMode = Field(default=CacheMode.REUSE, description="Reuse a cached script for identical requests or always generate a fresh one")
 
     @validator('topic')
     def validate_topic(cls, v):
@@ -59,4 +66,54 @@ class MemoryEntry(BaseModel):
     voice: Voice
     timestamp: float
     duration_seconds: float
-    success: bool 
\ No newline at end of file
+    success: bool 
+
+class JobStatus(str, Enum):
+    """Lifecycle states of a podcast generation job."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class JobResponse(BaseModel):
+    """Response model describing a podcast generation job."""
+    job_id: str = Field(..., description="Unique identifier of the job")
+    status: JobStatus = Field(..., description="Current lifecycle state of the job")
+    stage: Optional[str] = Field(None, description="Last completed workflow stage")
+    progress: float = Field(0.0, ge=0.0, le=1.0, description="Completed fraction of the pipeline")
+    queue_position: Optional[int] = Field(None, description="1-based place in the queue while the job waits for a worker")
+    audio_file_path: Optional[str] = Field(None, description="Path to the generated audio file once completed")
+    duration_seconds: Optional[float] = Field(None, description="Duration of the generated audio")
+    error_message: Optional[str] = Field(None, description="Error message if the job failed")
+    topic: Optional[str] = Field(None, description="The requested topic")
+    voice_used: Optional[str] = Field(None, description="The voice that was requested")
+    created_at: float = Field(..., description="Unix timestamp when the job was enqueued")
+    updated_at: float = Field(..., description="Unix timestamp of the last status change")
+
+
+class ExecutionMode(str, Enum):
+    """How the scripts of a batch are generated."""
+    INTERACTIVE = "interactive"
+    BULK = "bulk"
+
+
+class BatchRequest(BaseModel):
+    """Request model for generating several podcast episodes as one unit."""
+    items: List[PodcastRequest] = Field(..., min_length=1, max_length=50, description="Episodes to generate")
+    mode: ExecutionMode = Field(
+        default=ExecutionMode.INTERACTIVE,
+        description="interactive to generate scripts right away, bulk to trade latency for cost through the Batch API"
+    )
+
+
+class BatchResponse(BaseModel):
+    """Response model describing a batch of podcast generation jobs."""
+    batch_id: str = Field(..., description="Unique identifier of the batch")
+    total: int = Field(..., description="Number of items in the batch")
+    completed: int = Field(0, description="Number of items that finished successfully")
+    failed: int = Field(0, description="Number of items that failed")
+    cancelled: int = Field(0, description="Number of items that were cancelled")
+    items: List[JobResponse] = Field(..., description="Status of each item, in request order")
+    created_at: float = Field(..., description="Unix timestamp when the batch was enqueued")
@@ -0,0 +1,301 @@
+"""
+Tests of bulk script generation, run end to end against the local batch stand-in.
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import jobs.bulk_runner as bulk_runner_module
+import jobs.job_manager as job_manager_module
+from agents.batch_client import LocalBatchClient
+from agents.script_agent import ScriptAgent
+from cache.script_cache import ScriptCache
+from jobs.bulk_runner import BulkScriptRunner
+from jobs.job_manager import JobManager
+from memory.memory_store import PartitionedMemoryStore
+from models.request_models import ExecutionMode, JobStatus, PodcastRequest, PodcastResponse, Tone
+from workflows.podcast_workflow import podcast_workflow
+
+
+class PollingBatchClient(LocalBatchClient):
+    """Local stand-in that reports a batch as running for a few status checks."""
+
+    def __init__(self, work_dir, checks_until_done: int = 2, final_status: str = "completed"):
+        super().__init__(work_dir)
+        self.checks_until_done = checks_until_done
+        self.final_status = final_status
+        self.status_checks = 0
+
+    async def status(self, batch_id: str) -> str:
+        self.status_checks += 1
+        if self.status_checks <= self.checks_until_done:
+            return "in_progress"
+        if self.final_status != "completed":
+            return self.final_status
+        return await super().status(batch_id)
+
+
+def make_request(topic: str, **kwargs) -> PodcastRequest:
+    return PodcastRequest(topic=topic, tone=Tone.CONVERSATIONAL, duration_minutes=1, **kwargs)
+
+
+def make_job(job_id: str, topic: str) -> SimpleNamespace:
+    return SimpleNamespace(job_id=job_id, request=make_request(topic), user_id="user-1")
+
+
+def make_runner(batch_client, tmp_path) -> BulkScriptRunner:
+    return BulkScriptRunner(
+        batch_client=batch_client,
+        script_agent=ScriptAgent(),
+        work_dir=str(tmp_path / "bulk"),
+        collect_seconds=0,
+        poll_seconds=0
+    )
+
+
+async def failing_responder(body):
+    raise RuntimeError("model unavailable")
+
+
+@pytest.fixture(autouse=True)
+def isolated_stores(tmp_path, monkeypatch):
+    """Keep the memory and script caches of the tests out of the working directory."""
+    monkeypatch.setattr(bulk_runner_module, "memory_store", PartitionedMemoryStore())
+    cache = ScriptCache(db_path=str(tmp_path / "script_cache.sqlite3"))
+    monkeypatch.setattr(job_manager_module, "script_cache", cache)
+    yield cache
+    if cache._conn is not None:
+        cache._conn.close()
+
+
+@pytest.fixture
+def workflow_runs(monkeypatch):
+    """Replace the workflow with one that records the scripts it is given."""
+    runs = []
+
+    async def generate_podcast(request, script=None, **kwargs):
+        runs.append((request.topic, script))
+        return PodcastResponse(
+            success=True,
+            audio_file_path="episode.mp3",
+            topic=request.topic,
+            voice_used=request.voice.value
+        )
+
+    async def recover_interrupted_runs():
+        return []
+
+    monkeypatch.setattr(podcast_workflow, "generate_podcast", generate_podcast)
+    monkeypatch.setattr(podcast_workflow, "recover_interrupted_runs", recover_interrupted_runs)
+    # Leases are kept in the checkpoint database, which a single process does not need
+    monkeypatch.setattr(podcast_workflow, "checkpoint_db", "")
+    return runs
+
+
+async def wait_for_batch(batch, timeout: float = 10.0) -> None:
+    async def wait():
+        while not batch.is_finished:
+            await batch.wait_for_change()
+
+    await asyncio.wait_for(wait(), timeout)
+
+
+def test_local_batch_client_writes_batch_api_output(tmp_path):
+    """The stand-in answers every request line in the Batch API output format."""
+    agent = ScriptAgent()
+    input_path = tmp_path / "input.jsonl"
+    with open(input_path, 'w', encoding='utf-8') as f:
+        for custom_id, topic in [("a", "Tide pools"), ("b", "Comets")]:
+            request = agent.build_batch_request(custom_id, topic, Tone.CONVERSATIONAL, 1)
+            f.write(json.dumps(request) + "\n")
+
+    async def run():
+        client = LocalBatchClient(tmp_path / "local")
+        batch_id = await client.submit(input_path)
+        assert await client.status(batch_id) == "completed"
+        assert await client.status("missing_batch") == "failed"
+
+        output_path = tmp_path / "output.jsonl"
+        await client.download(batch_id, output_path)
+        with open(output_path, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    results = asyncio.run(run())
+
+    assert [result["custom_id"] for result in results] == ["a", "b"]
+    for result in results:
+        assert result["error"] is None
+        assert result["response"]["status_code"] == 200
+        assert result["response"]["body"]["choices"][0]["message"]["role"] == "assistant"
+        assert len(agent.parse_batch_result(result)) >= 100
+
+
+def test_local_batch_client_reports_responder_errors(tmp_path):
+    """A failing responder produces an error line that parses as a failure."""
+    agent = ScriptAgent()
+    input_path = tmp_path / "input.jsonl"
+    with open(input_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(agent.build_batch_request("a", "Tide pools", Tone.CONVERSATIONAL, 1)) + "\n")
+
+    async def run():
+        client = LocalBatchClient(tmp_path / "local", responder=failing_responder)
+        batch_id = await client.submit(input_path)
+        await client.status(batch_id)
+        await client.download(batch_id, tmp_path / "output.jsonl")
+
+    asyncio.run(run())
+    with open(tmp_path / "output.jsonl", 'r', encoding='utf-8') as f:
+        result = json.loads(f.readline())
+
+    assert result["response"] is None
+    assert result["error"]["message"] == "model unavailable"
+    with pytest.raises(Exception, match="model unavailable"):
+        agent.parse_batch_result(result)
+
+
+def test_bulk_runner_polls_until_batch_completes(tmp_path):
+    """The runner keeps polling a running batch and then hands out every script."""
+    client = PollingBatchClient(tmp_path / "local", checks_until_done=2)
+    runner = make_runner(client, tmp_path)
+    jobs = [make_job("job-a", "Tide pools"), make_job("job-b", "Comets")]
+    scripts = {}
+
+    async def run():
+        runner.start()
+        done = asyncio.Event()
+
+        def callback(job_id, script, error):
+            scripts[job_id] = (script, error)
+            if len(scripts) == len(jobs):
+                done.set()
+
+        for job in jobs:
+            runner.add(job, lambda script, error, job_id=job.job_id: callback(job_id, script, error))
+        await asyncio.wait_for(done.wait(), 10.0)
+        await runner.stop()
+
+    asyncio.run(run())
+
+    assert client.status_checks == 3
+    for job in jobs:
+        script, error = scripts[job.job_id]
+        assert error is None
+        assert job.request.topic in script
+    # Request and result files are removed once the batch is handled
+    assert list((tmp_path / "bulk").glob("*.jsonl")) == []
+
+
+def test_bulk_runner_fails_every_job_of_a_failed_batch(tmp_path):
+    """Every job of a batch that ends unsuccessfully gets an error."""
+    client = PollingBatchClient(tmp_path / "local", checks_until_done=1, final_status="expired")
+    runner = make_runner(client, tmp_path)
+    results = []
+
+    async def run():
+        runner.start()
+        done = asyncio.Event()
+
+        def callback(script, error):
+            results.append((script, error))
+            if len(results) == 2:
+                done.set()
+
+        runner.add(make_job("job-a", "Tide pools"), callback)
+        runner.add(make_job("job-b", "Comets"), callback)
+        await asyncio.wait_for(done.wait(), 10.0)
+        await runner.stop()
+
+    asyncio.run(run())
+
+    assert [script for script, _ in results] == [None, None]
+    assert all("ended with status expired" in error for _, error in results)
+
+
+def test_submit_batch_in_bulk_mode_runs_jobs_with_batch_scripts(tmp_path, workflow_runs, isolated_stores):
+    """Bulk items are queued for the workflow with the scripts the batch produced."""
+    manager = JobManager(max_workers=2, bulk_runner=make_runner(LocalBatchClient(tmp_path / "local"), tmp_path))
+    requests = [make_request("Tide pools"), make_request("Comets"), make_request("Volcanoes")]
+
+    async def run():
+        await manager.start()
+        try:
+            batch = manager.submit_batch(requests, user_id="user-1", mode=ExecutionMode.BULK)
+            assert manager._bulk_waiting == len(requests)
+            await wait_for_batch(batch)
+            # Scripts are stored in the cache in the background
+            keys = [manager._script_cache_key(request) for request in requests]
+            while not all(isolated_stores.contains(key) for key in keys):
+                await asyncio.sleep(0.01)
+            return batch
+        finally:
+            await manager.stop()
+
+    batch = asyncio.run(asyncio.wait_for(run(), 10.0))
+
+    assert [job.status for job in batch.jobs] == [JobStatus.COMPLETED] * len(requests)
+    assert sorted(topic for topic, _ in workflow_runs) == sorted(request.topic for request in requests)
+    for topic, script in workflow_runs:
+        assert topic in script
+    assert manager._bulk_waiting == 0
+
+
+def test_submit_batch_in_bulk_mode_fails_jobs_without_scripts(tmp_path, workflow_runs):
+    """Items whose scripts the batch could not produce fail without running the workflow."""
+    client = LocalBatchClient(tmp_path / "local", responder=failing_responder)
+    manager = JobManager(max_workers=2, bulk_runner=make_runner(client, tmp_path))
+
+    async def run():
+        await manager.start()
+        try:
+            batch = manager.submit_batch([make_request("Tide pools")], user_id="user-1", mode=ExecutionMode.BULK)
+            await wait_for_batch(batch)
+            return batch
+        finally:
+            await manager.stop()
+
+    batch = asyncio.run(run())
+
+    assert batch.jobs[0].status == JobStatus.FAILED
+    assert "model unavailable" in batch.jobs[0].result.error_message
+    assert workflow_runs == []
+
+
+def test_submit_batch_in_bulk_mode_skips_cached_scripts(tmp_path, workflow_runs, isolated_stores):
+    """Items with a cached script go straight to the workflow."""
+    manager = JobManager(max_workers=2, bulk_runner=make_runner(LocalBatchClient(tmp_path / "local"), tmp_path))
+    request = make_request("Tide pools")
+    isolated_stores.put(manager._script_cache_key(request), "A cached script. " * 10)
+
+    async def run():
+        await manager.start()
+        try:
+            batch = manager.submit_batch([request], user_id="user-1", mode=ExecutionMode.BULK)
+            assert manager.bulk_runner.pending() == 0
+            await wait_for_batch(batch)
+            return batch
+        finally:
+            await manager.stop()
+
+    batch = asyncio.run(run())
+
+    assert batch.jobs[0].status == JobStatus.COMPLETED
+    # The workflow finds the script in the cache itself
+    assert workflow_runs == [("Tide pools", None)]
+
+
+def test_submit_batch_in_bulk_mode_requires_a_runner(workflow_runs):
+    """Bulk batches are refused when no bulk runner is configured."""
+    manager = JobManager()
+
+    async def run():
+        await manager.start()
+        try:
+            manager.submit_batch([make_request("Tide pools")], mode=ExecutionMode.BULK)
+        finally:
+            await manager.stop()
+
+    with pytest.raises(RuntimeError, match="Bulk mode is not configured"):
+        asyncio.run(run())
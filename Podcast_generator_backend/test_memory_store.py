@@ -0,0 +1,220 @@
+"""
+Tests of the memory store: expiry, aggregates, budgets, persistence and topic search.
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import memory.memory_store as memory_store_module
+from memory.backends import SQLiteMemoryBackend
+from memory.memory_store import MemoryStore, PartitionedMemoryStore, RankedCounter
+from models.request_models import MemoryEntry, Tone, Voice
+
+START = 1_000_000.0
+HOUR = 3600
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Let tests move the store's clock forward."""
+    clock = SimpleNamespace(now=START)
+    monkeypatch.setattr(memory_store_module, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def make_entry(
+    topic: str = "Deep sea creatures",
+    timestamp: float = START,
+    voice: Voice = Voice.ALLOY,
+    tone: Tone = Tone.CASUAL,
+    success: bool = True
+) -> MemoryEntry:
+    return MemoryEntry(
+        topic=topic,
+        tone=tone,
+        voice=voice,
+        timestamp=timestamp,
+        duration_seconds=60.0,
+        success=success
+    )
+
+
+def topics(entries) -> list:
+    return [entry.topic for entry in entries]
+
+
+def test_entries_expire_in_timestamp_order(clock):
+    """Entries expire by age regardless of the order they were added in."""
+    store = MemoryStore(max_entries=10, ttl_hours=1)
+    store.add_entry(make_entry("Third", START + 30, voice=Voice.NOVA))
+    store.add_entry(make_entry("First", START + 10))
+    store.add_entry(make_entry("Second", START + 20))
+
+    clock.now = START + HOUR + 15
+    assert topics(store.get_recent_entries()) == ["Third", "Second"]
+
+    clock.now = START + HOUR + 25
+    assert topics(store.get_recent_entries()) == ["Third"]
+    assert store.get_entries_by_voice(Voice.ALLOY) == []
+    assert store.get_user_preferences()["voice_distribution"] == {Voice.NOVA: 1}
+
+    clock.now = START + HOUR + 35
+    assert store.size() == 0
+    assert store.get_user_preferences() == {}
+
+
+def test_preferences_follow_capacity_eviction(clock):
+    """Evicted entries leave the preference aggregates and indexes."""
+    store = MemoryStore(max_entries=2, ttl_hours=1)
+    store.add_entry(make_entry("Comets", START, voice=Voice.ALLOY, tone=Tone.CASUAL, success=False))
+    store.add_entry(make_entry("Tide pools", START + 1, voice=Voice.NOVA, tone=Tone.EDUCATIONAL))
+    store.add_entry(make_entry("Volcanoes", START + 2, voice=Voice.NOVA, tone=Tone.STORYTELLING))
+
+    preferences = store.get_user_preferences()
+    assert preferences["preferred_voice"] == Voice.NOVA
+    assert preferences["voice_distribution"] == {Voice.NOVA: 2}
+    assert preferences["tone_distribution"] == {Tone.EDUCATIONAL: 1, Tone.STORYTELLING: 1}
+    assert preferences["success_rate"] == 100.0
+    assert preferences["total_generations"] == 2
+    assert store.get_entries_by_voice(Voice.ALLOY) == []
+    assert store.get_entries_by_topic("comets") == []
+
+    # Expired heap items of evicted entries are skipped
+    clock.now = START + HOUR + 1.5
+    assert topics(store.get_recent_entries()) == ["Volcanoes"]
+    assert store.get_user_preferences()["tone_distribution"] == {Tone.STORYTELLING: 1}
+
+
+def test_ranked_counter_tracks_most_common_value():
+    """The most common value follows increments and decrements."""
+    counter = RankedCounter()
+    for value in ["a", "b", "b", "c"]:
+        counter.increment(value)
+    assert counter.most_common() == "b"
+
+    counter.decrement("b")
+    counter.decrement("b")
+    assert counter.most_common() in ("a", "c")
+    assert counter.as_dict() == {"a": 1, "c": 1}
+
+    counter.decrement("a")
+    counter.decrement("c")
+    assert counter.most_common() is None
+    assert counter.as_dict() == {}
+
+
+def test_topic_search_matches_word_prefixes(clock):
+    """Every query word must start some word of a topic, ignoring case."""
+    store = MemoryStore(max_entries=10, ttl_hours=1)
+    store.add_entry(make_entry("Deep sea creatures", START))
+    store.add_entry(make_entry("Deep space probes", START + 1))
+    store.add_entry(make_entry("Sea shanties", START + 2))
+
+    assert topics(store.get_entries_by_topic("dee sea")) == ["Deep sea creatures"]
+    assert topics(store.get_entries_by_topic("SP")) == ["Deep space probes"]
+    assert topics(store.get_entries_by_topic("sea")) == ["Deep sea creatures", "Sea shanties"]
+    assert topics(store.get_entries_by_topic("deep")) == ["Deep sea creatures", "Deep space probes"]
+    assert store.get_entries_by_topic("whales") == []
+    assert topics(store.get_entries_by_topic("")) == ["Deep sea creatures", "Deep space probes", "Sea shanties"]
+
+    # Words inside a word do not match
+    assert store.get_entries_by_topic("ace") == []
+
+
+def test_partitioned_store_caps_each_user(clock):
+    """A user's history is capped without touching other users."""
+    store = PartitionedMemoryStore(max_entries_per_user=2, max_total_entries=100)
+    for i in range(3):
+        store.add_entry(make_entry(f"Topic {i}", START + i, voice=Voice.NOVA), user_id="heavy")
+    store.add_entry(make_entry("Comets", START), user_id="light")
+
+    assert topics(store.get_recent_entries(user_id="heavy")) == ["Topic 1", "Topic 2"]
+    assert topics(store.get_recent_entries(user_id="light")) == ["Comets"]
+    assert store.get_user_preferences(user_id="light")["preferred_voice"] == Voice.ALLOY
+    assert store.size() == 3
+
+
+def test_partitioned_store_evicts_least_recently_used_users(clock):
+    """Over the global budget the shards used longest ago are dropped."""
+    store = PartitionedMemoryStore(max_entries_per_user=2, max_total_entries=5)
+    for user_id in ["a", "b"]:
+        store.add_entry(make_entry("Comets", START), user_id=user_id)
+        store.add_entry(make_entry("Tide pools", START + 1), user_id=user_id)
+
+    # Reading a's history makes b the least recently used user
+    store.get_recent_entries(user_id="a")
+    store.add_entry(make_entry("Comets", START), user_id="c")
+    store.add_entry(make_entry("Tide pools", START + 1), user_id="c")
+
+    assert store.get_recent_entries(user_id="b") == []
+    assert len(store.get_recent_entries(user_id="a")) == 2
+    assert store.size() == 4
+    assert store.stats()["users"] == 2
+    assert store.stats()["evicted_users"] == 1
+
+
+def test_partitioned_store_frees_expired_shards(clock):
+    """Shards of idle users are emptied and dropped once their entries expire."""
+    store = PartitionedMemoryStore(max_entries_per_user=5, ttl_hours=1)
+    store.add_entry(make_entry("Comets", START), user_id="idle")
+    store.add_entry(make_entry("Tide pools", START + 60), user_id="active")
+
+    clock.now = START + HOUR + 30
+    assert store.size() == 1
+    assert store.stats()["users"] == 1
+    assert topics(store.get_recent_entries(user_id="active")) == ["Tide pools"]
+
+
+def test_flushed_entries_reload_in_another_process(tmp_path):
+    """Two stores sharing a backend see each other's flushed entries and clears."""
+    db_path = str(tmp_path / "memory.sqlite3")
+
+    async def run():
+        first = PartitionedMemoryStore(max_entries_per_user=2, backend=SQLiteMemoryBackend(db_path), flush_seconds=60)
+        second = PartitionedMemoryStore(max_entries_per_user=2, backend=SQLiteMemoryBackend(db_path), flush_seconds=60)
+        first.start()
+        second.start()
+        try:
+            now = time.time()
+            await first.load("user-1")
+            for i in range(3):
+                first.add_entry(make_entry(f"Topic {i}", now + i), user_id="user-1")
+            # Buffered entries are not visible elsewhere until flushed
+            await second.load("user-1")
+            assert second.get_recent_entries(user_id="user-1") == []
+            await first.flush()
+
+            # Absent users are only reloaded once the change log mentions them
+            await second.flush()
+            await second.load("user-1")
+            assert topics(second.get_recent_entries(user_id="user-1")) == ["Topic 1", "Topic 2"]
+            assert second.get_user_preferences(user_id="user-1") == first.get_user_preferences(user_id="user-1")
+
+            second.add_entry(make_entry("Comets", now + 3, voice=Voice.NOVA), user_id="user-1")
+            await second.flush()
+            await first.flush()
+            await first.load("user-1")
+            assert topics(first.get_recent_entries(user_id="user-1")) == ["Topic 2", "Comets"]
+            assert first.get_user_preferences(user_id="user-1")["voice_distribution"] == {
+                Voice.ALLOY: 1, Voice.NOVA: 1
+            }
+
+            await second.clear("user-1")
+            await first.flush()
+            await first.load("user-1")
+            assert first.get_recent_entries(user_id="user-1") == []
+        finally:
+            await first.stop()
+            await second.stop()
+
+    asyncio.run(run())
+
+    # Entries written by a store without a flusher reach the backend right away
+    backend = SQLiteMemoryBackend(db_path)
+    store = PartitionedMemoryStore(backend=backend)
+    store.add_entry(make_entry("Volcanoes", time.time()), user_id="user-2")
+    assert topics(backend.load("user-2", 10, 0)) == ["Volcanoes"]
+    backend.close()
@@ -0,0 +1,75 @@
+"""
+Tests of run leases between worker processes sharing a checkpoint database.
+"""
+
+import asyncio
+
+from langgraph.checkpoint.base import empty_checkpoint
+
+from workflows.podcast_workflow import PodcastWorkflow
+
+
+def make_workflow(db_path: str) -> PodcastWorkflow:
+    workflow = PodcastWorkflow()
+    workflow.checkpoint_db = db_path
+    return workflow
+
+
+async def write_checkpoint(workflow: PodcastWorkflow, job_id: str) -> None:
+    await workflow._get_graph()
+    config = {"configurable": {"thread_id": job_id, "checkpoint_ns": ""}}
+    await workflow._checkpointer.aput(config, empty_checkpoint(), {}, {})
+
+
+async def thread_exists(workflow: PodcastWorkflow, job_id: str) -> bool:
+    config = {"configurable": {"thread_id": job_id}}
+    return await workflow._checkpointer.aget_tuple(config) is not None
+
+
+def test_a_run_is_leased_to_one_process(tmp_path):
+    """A run held by a live process cannot be claimed by another."""
+    db_path = str(tmp_path / "checkpoints.sqlite3")
+
+    async def run():
+        first, second = make_workflow(db_path), make_workflow(db_path)
+        try:
+            assert await first.claim_run("job-1")
+            assert await first.claim_run("job-1")
+            assert not await second.claim_run("job-1")
+
+            await first.release_run("job-1")
+            assert await second.claim_run("job-1")
+            assert not await first.claim_run("job-1")
+        finally:
+            await first.close()
+            await second.close()
+
+    asyncio.run(run())
+
+
+def test_recovery_skips_runs_of_live_processes(tmp_path):
+    """Only runs whose lease expired are recovered or dropped by another process."""
+    db_path = str(tmp_path / "checkpoints.sqlite3")
+
+    async def run():
+        first, second = make_workflow(db_path), make_workflow(db_path)
+        try:
+            assert await first.claim_run("job-1")
+            await write_checkpoint(first, "job-1")
+
+            assert await second.recover_interrupted_runs() == []
+            await second.discard_checkpoints("job-1")
+            assert await thread_exists(first, "job-1")
+
+            # The first process stops renewing its lease
+            first.lease_seconds = -1
+            await first.renew_leases()
+
+            # The finished run is dropped by the process that took it over
+            assert await second.recover_interrupted_runs() == []
+            assert not await thread_exists(second, "job-1")
+        finally:
+            await first.close()
+            await second.close()
+
+    asyncio.run(run())
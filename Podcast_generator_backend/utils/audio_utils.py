@@ -4,6 +4,7 @@ Audio utility functions for file management and validation.
 
 import os
 import re
+import shutil
 import time
 from pathlib import Path
 from typing import Optional
@@ -23,7 +24,13 @@ class AudioUtils:
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
     
-    def generate_filename(self, topic: str, voice: str, timestamp: Optional[float] = None) -> str:
+    def generate_filename(
+        self,
+        topic: str,
+        voice: str,
+        timestamp: Optional[float] = None,
+        unique_id: Optional[str] = None
+    ) -> str:
         """
         Generate a unique filename for the audio file.
         
@@ -31,6 +38,8 @@ class AudioUtils:
             topic: The podcast topic
             voice: The TTS voice used
             timestamp: Optional timestamp (uses current time if not provided)
+            unique_id: Optional id (such as the job id) keeping episodes of the
+                same topic and voice generated in the same second apart
             
         Returns:
             Generated filename
@@ -46,6 +55,8 @@ class AudioUtils:
         # Format timestamp
         date_str = time.strftime("%Y%m%d_%H%M%S", time.localtime(timestamp))
         
+        if unique_id:
+            return f"{clean_topic}_{voice}_{date_str}_{unique_id[:8]}.mp3"
         return f"{clean_topic}_{voice}_{date_str}.mp3"
     
     def get_file_path(self, filename: str) -> Path:
@@ -79,6 +90,67 @@ class AudioUtils:
         
         return file_path
     
+    def get_segment_dir(self, job_id: str) -> Path:
+        """
+        Get the directory holding the synthesized segments of a job.
+        
+        Args:
+            job_id: The job id
+            
+        Returns:
+            Path to the segment directory
+        """
+        return self.output_dir / "segments" / job_id
+    
+    def segment_filename(self, index: int, output_format: str = "mp3") -> str:
+        """
+        Get the filename of a segment within its segment directory.
+        
+        Args:
+            index: Position of the segment in the episode
+            output_format: Audio format of the segment
+            
+        Returns:
+            Segment filename
+        """
+        return f"{index:05d}.{output_format}"
+    
+    def get_segment_path(self, job_id: str, index: int, output_format: str = "mp3") -> Path:
+        """
+        Get the path of a single synthesized segment.
+        
+        Args:
+            job_id: The job id
+            index: Position of the segment in the episode
+            output_format: Audio format of the segment
+            
+        Returns:
+            Path to the segment file
+        """
+        return self.get_segment_dir(job_id) / self.segment_filename(index, output_format)
+    
+    def remove_segment_dir(self, job_id: str) -> None:
+        """
+        Delete the synthesized segments of a job.
+        
+        Args:
+            job_id: The job id
+        """
+        shutil.rmtree(self.get_segment_dir(job_id), ignore_errors=True)
+    
+    def get_temp_path(self, job_id: str, output_format: str = "mp3") -> Path:
+        """
+        Get the path an episode is assembled at before it is given its final name.
+        
+        Args:
+            job_id: The job id
+            output_format: Audio format of the episode
+            
+        Returns:
+            Path to the temporary episode file
+        """
+        return self.output_dir / f"{job_id}.{output_format}.part"
+    
     def validate_audio_file(self, file_path: Path) -> bool:
         """
         Validate that an audio file exists and is readable.
@@ -142,7 +214,7 @@ class AudioUtils:
         max_age_seconds = max_age_hours * 3600
         deleted_count = 0
         
-        for file_path in self.output_dir.glob("*.mp3"):
+        for file_path in [*self.output_dir.glob("*.mp3"), *self.output_dir.glob("*.part")]:
             file_age = current_time - file_path.stat().st_mtime
             
             if file_age > max_age_seconds:
@@ -153,6 +225,13 @@ class AudioUtils:
                     # File might be in use, skip it
                     continue
         
+        # Remove segment directories of old streamed jobs
+        segments_root = self.output_dir / "segments"
+        if segments_root.exists():
+            for segment_dir in segments_root.iterdir():
+                if current_time - segment_dir.stat().st_mtime > max_age_seconds:
+                    shutil.rmtree(segment_dir, ignore_errors=True)
+        
         return deleted_count
     
     def get_storage_info(self) -> dict:
@@ -1,3 +1,4 @@
+from typing import Optional
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from utils.auth_utils import decode_access_token
@@ -5,6 +6,7 @@ from models.user_model import User
 from jose import jwt, JWTError
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login", auto_error=False)
 
 SECRET_KEY = "123456"
 ALGORITHM = "HS256"
@@ -26,3 +28,11 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
 
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
+
+# Audio elements cannot send headers, so media URLs may carry the token as a query parameter
+def get_current_user_or_query(token: Optional[str] = Depends(optional_oauth2_scheme), access_token: Optional[str] = None):
+    token = token or access_token
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+
+    return get_current_user(token)
@@ -0,0 +1,203 @@
+"""
+Text utility functions for splitting scripts into TTS-sized segments.
+"""
+
+import re
+from typing import Callable, List, Optional
+
+PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+')
+
+
+class TextUtils:
+    """Utility class for script segmentation."""
+
+    def normalize_topic(self, topic: str) -> str:
+        """
+        Normalize a topic so trivially different spellings compare equal.
+
+        Args:
+            topic: The podcast topic
+
+        Returns:
+            Lowercased topic with collapsed whitespace and no trailing punctuation
+        """
+        return re.sub(r'\s+', ' ', topic.strip().lower()).rstrip(' .!?')
+
+    def split_paragraphs(self, text: str) -> List[str]:
+        """
+        Split text into non-empty paragraphs.
+
+        Args:
+            text: The text to split
+
+        Returns:
+            List of paragraphs
+        """
+        return [p.strip() for p in PARAGRAPH_BREAK.split(text) if p.strip()]
+
+    def split_sentences(self, text: str) -> List[str]:
+        """
+        Split text into non-empty sentences.
+
+        Args:
+            text: The text to split
+
+        Returns:
+            List of sentences
+        """
+        return [s.strip() for s in SENTENCE_BREAK.split(text) if s.strip()]
+
+    def split_into_segments(
+        self,
+        text: str,
+        max_chars: int,
+        measure: Optional[Callable[[str], int]] = None
+    ) -> List[str]:
+        """
+        Split text into segments no longer than max_chars.
+
+        Paragraphs are kept together where possible, oversized paragraphs are
+        split at sentence boundaries and oversized sentences at word boundaries.
+        Consecutive pieces are packed greedily into each segment.
+
+        Args:
+            text: The text to split
+            max_chars: Maximum measured length of a segment
+            measure: Optional function returning the effective length of a piece
+                of text (defaults to len)
+
+        Returns:
+            List of segments in reading order
+        """
+        measure = measure or len
+
+        pieces = []
+        for paragraph in self.split_paragraphs(text):
+            if measure(paragraph) <= max_chars:
+                pieces.append((paragraph, "\n\n"))
+                continue
+
+            sentences = self.split_sentences(paragraph)
+            for i, sentence in enumerate(sentences):
+                separator = "\n\n" if i == len(sentences) - 1 else " "
+                if measure(sentence) <= max_chars:
+                    pieces.append((sentence, separator))
+                else:
+                    pieces.extend(
+                        (chunk, " ") for chunk in self._split_words(sentence, max_chars, measure)
+                    )
+
+        segments = []
+        current = ""
+        current_separator = ""
+        for piece, separator in pieces:
+            candidate = f"{current}{current_separator}{piece}" if current else piece
+            if current and measure(candidate) > max_chars:
+                segments.append(current)
+                candidate = piece
+            current = candidate
+            current_separator = separator
+
+        if current:
+            segments.append(current)
+
+        return segments
+
+    def _split_words(self, text: str, max_chars: int, measure: Callable[[str], int]) -> List[str]:
+        """Split a single oversized sentence at word boundaries."""
+        chunks = []
+        current = ""
+        for word in text.split():
+            candidate = f"{current} {word}" if current else word
+            if current and measure(candidate) > max_chars:
+                chunks.append(current)
+                candidate = word
+            current = candidate
+
+        if current:
+            chunks.append(current)
+
+        return chunks
+
+
+class ScriptSegmenter:
+    """Incrementally cut streamed script text into closed segments."""
+
+    def __init__(self, min_chars: int = 400, max_chars: int = 3000):
+        """
+        Initialize the segmenter.
+
+        Args:
+            min_chars: Minimum segment length before a paragraph break closes it
+            max_chars: Length at which a segment is closed at the last sentence
+                boundary even without a paragraph break
+        """
+        self.min_chars = min_chars
+        self.max_chars = max(max_chars, min_chars)
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        """
+        Add streamed text and return any segments it closed.
+
+        Args:
+            text: The next chunk of script text
+
+        Returns:
+            Closed segments in reading order
+        """
+        self._buffer += text
+
+        segments = []
+        while True:
+            segment = self._next_segment()
+            if segment is None:
+                break
+            if segment:
+                segments.append(segment)
+
+        return segments
+
+    def flush(self) -> List[str]:
+        """
+        Close the segmenter and return the remaining text.
+
+        Returns:
+            The final segment, if any text remains
+        """
+        remaining = self._buffer.strip()
+        self._buffer = ""
+        return [remaining] if remaining else []
+
+    def _next_segment(self) -> Optional[str]:
+        """Cut the next closed segment off the buffer, or return None."""
+        # Prefer closing at the first paragraph break past the minimum length
+        paragraph_break = PARAGRAPH_BREAK.search(self._buffer, self.min_chars)
+        if paragraph_break and paragraph_break.start() <= self.max_chars:
+            return self._cut(paragraph_break.start(), paragraph_break.end())
+
+        if len(self._buffer) < self.max_chars:
+            return None
+
+        # Too long without a paragraph break: close at the last sentence end
+        cut = None
+        for sentence_break in SENTENCE_BREAK.finditer(self._buffer, 0, self.max_chars):
+            cut = sentence_break
+        if cut is None:
+            whitespace = self._buffer.rfind(" ", 0, self.max_chars)
+            if whitespace <= 0:
+                return self._cut(self.max_chars, self.max_chars)
+            return self._cut(whitespace, whitespace + 1)
+
+        return self._cut(cut.start(), cut.end())
+
+    def _cut(self, end: int, resume: int) -> str:
+        """Remove and return the buffer up to end, resuming at resume."""
+        segment = self._buffer[:end].strip()
+        self._buffer = self._buffer[resume:]
+        return segment
+
+
+# Global text utils instance
+text_utils = TextUtils()
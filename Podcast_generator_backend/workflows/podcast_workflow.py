@@ -2,28 +2,64 @@
 LangGraph workflow for podcast generation with memory and tool calling.
 """
 
+import asyncio
+import contextlib
+import os
 import time
-from typing import Dict, Any, TypedDict, Annotated
-from langgraph.graph import StateGraph, END
+import uuid
+from pathlib import Path
+from typing import Dict, Any, TypedDict, Annotated, Callable, List, Optional, Tuple
+import aiosqlite
+from bson import ObjectId
+from openai import AsyncOpenAI
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from langgraph.graph import StateGraph, START, END
+from langgraph.types import StateSnapshot
 from langgraph.prebuilt import ToolNode
+from agents.hedging import HedgingPolicy
 from agents.script_agent import ScriptAgent
-from agents.tts_agent import TTSAgent
+from agents.tts_agent import TTSAgent, SpeechPipeline, SegmentCallback
 from memory.memory_store import memory_store
+from cache.script_cache import script_cache
+from cache.audio_cache import audio_segment_cache
 from utils.audio_utils import audio_utils
-from models.request_models import PodcastRequest, PodcastResponse, MemoryEntry, Tone, Voice
+from models.request_models import PodcastRequest, PodcastResponse, MemoryEntry, CacheMode, Tone, Voice
+from models.podcast_model import Podcast
+from models.user_model import User
 
 
 class WorkflowState(TypedDict,total=False):
     """State for the podcast generation workflow."""
     request: Annotated[PodcastRequest, "request"]
+    job_id: str
     script: str
-    audio_data: bytes
+    audio_temp_path: str
     audio_file_path: str
     duration_seconds: float
     success: bool
     error_message: str
     user_preferences: Dict[str, Any]
     timestamp: float
+    user_id: Optional[str]
+    podcast_id: str
+
+
+# Fraction of the pipeline that is complete once a node has finished
+STAGE_PROGRESS = {
+    "get_user_preferences": 0.05,
+    "check_user": 0.05,
+    "generate_script": 0.4,
+    "generate_audio": 0.9,
+    "save_audio": 0.95,
+    "update_memory": 1.0,
+    "persist_podcast": 1.0,
+    "handle_error": 1.0,
+}
+
+ProgressCallback = Callable[[str, float], None]
+
+# Called with the index of each audio segment once it is saved for streaming
+SegmentReadyCallback = Callable[[int], None]
 
 
 class PodcastWorkflow:
@@ -32,34 +68,65 @@ class PodcastWorkflow:
     def __init__(self):
         """Initialize the workflow."""
         self.script_agent = ScriptAgent()
-        self.tts_agent = TTSAgent()
+        self.tts_agent = TTSAgent(
+            max_concurrency=int(os.getenv("TTS_MAX_CONCURRENCY", "4")),
+            segment_cache=audio_segment_cache,
+            max_attempts=int(os.getenv("TTS_MAX_ATTEMPTS", "3")),
+            hedging=HedgingPolicy(
+                percentile=float(os.getenv("TTS_HEDGE_PERCENTILE", "0.95")),
+                budget_ratio=float(os.getenv("TTS_HEDGE_BUDGET_RATIO", "0.1"))
+            ) if os.getenv("TTS_HEDGING", "true").lower() == "true" else None
+        )
+        # Stream the script into TTS so synthesis overlaps script generation
+        self.pipeline_tts = os.getenv("TTS_PIPELINE", "true").lower() == "true"
+        self._pipelines: Dict[str, SpeechPipeline] = {}
+        self._segment_listeners: Dict[str, SegmentReadyCallback] = {}
         self.graph = self._build_graph()
+        # Runs are checkpointed per job id so a retry resumes after the last completed node
+        self.checkpoint_db = os.getenv("WORKFLOW_CHECKPOINT_DB", "./cache_data/workflow_checkpoints.sqlite3")
+        self._checkpointer: Optional[AsyncSqliteSaver] = None
+        self._checkpointed_graph = None
+        self._checkpoint_lock = asyncio.Lock()
+        # Worker processes sharing the database lease the runs they own, renewing
+        # the leases while alive, so only runs of a dead process are recovered
+        self.lease_seconds = float(os.getenv("WORKFLOW_LEASE_SECONDS", "60"))
+        self._owner = uuid.uuid4().hex
+        # Whether a cancelled run keeps its completed stages so a retry resumes after them
+        self.keep_cancelled_stages = os.getenv("WORKFLOW_KEEP_CANCELLED_STAGES", "true").lower() == "true"
+    
+    def use_client(self, client: AsyncOpenAI) -> None:
+        """
+        Share one OpenAI client between the agents.
+        
+        Args:
+            client: The OpenAI client to inject
+        """
+        self.script_agent.client = client
+        self.tts_agent.client = client
     
-    def _build_graph(self) -> StateGraph:
-        """Build the LangGraph workflow."""
+    def _build_graph(self, checkpointer: Optional[AsyncSqliteSaver] = None) -> StateGraph:
+        """Build the LangGraph workflow, optionally persisting its checkpoints."""
         
         # Create the state graph
         workflow = StateGraph(WorkflowState)
         
         # Add nodes
         workflow.add_node("get_user_preferences", self._get_user_preferences)
+        workflow.add_node("check_user", self._check_user)
         workflow.add_node("generate_script", self._generate_script)
         workflow.add_node("generate_audio", self._generate_audio)
         workflow.add_node("save_audio", self._save_audio)
         workflow.add_node("update_memory", self._update_memory)
+        workflow.add_node("persist_podcast", self._persist_podcast)
         workflow.add_node("handle_error", self._handle_error)
         
-        # Define the workflow
-        workflow.set_entry_point("get_user_preferences")
+        # The preference lookup and the user check run side by side;
+        # script generation waits for both
+        workflow.add_edge(START, "get_user_preferences")
+        workflow.add_edge(START, "check_user")
+        workflow.add_edge(["get_user_preferences", "check_user"], "generate_script")
         
-        # Add edges
-        workflow.add_edge("get_user_preferences", "generate_script")
-        workflow.add_edge("generate_script", "generate_audio")
-        workflow.add_edge("generate_audio", "save_audio")
-        workflow.add_edge("save_audio", "update_memory")
-        workflow.add_edge("update_memory", END)
-        
-        # Add conditional edges for error handling
+        # Script, audio and saving form the critical path, each step failing over to error handling
         workflow.add_conditional_edges(
             "generate_script",
             self._should_continue,
@@ -78,163 +145,442 @@ class PodcastWorkflow:
             }
         )
         
+        # Bookkeeping of a saved episode fans out and joins at the end
         workflow.add_conditional_edges(
             "save_audio",
-            self._should_continue,
-            {
-                "continue": "update_memory",
-                "error": "handle_error"
-            }
+            self._after_save,
+            ["update_memory", "persist_podcast", "handle_error"]
         )
         
+        workflow.add_edge("update_memory", END)
+        workflow.add_edge("persist_podcast", END)
         workflow.add_edge("handle_error", END)
         
-        return workflow.compile()
+        return workflow.compile(checkpointer=checkpointer)
+    
+    async def _get_graph(self):
+        """Get the graph, opening the checkpoint database on first use."""
+        if not self.checkpoint_db:
+            return self.graph
+        
+        async with self._checkpoint_lock:
+            if self._checkpointed_graph is None:
+                Path(self.checkpoint_db).parent.mkdir(parents=True, exist_ok=True)
+                conn = await aiosqlite.connect(self.checkpoint_db)
+                checkpointer = AsyncSqliteSaver(conn)
+                try:
+                    await checkpointer.setup()
+                    await conn.execute(
+                        """
+                        CREATE TABLE IF NOT EXISTS run_leases (
+                            job_id TEXT PRIMARY KEY,
+                            owner TEXT NOT NULL,
+                            expires_at REAL NOT NULL
+                        )
+                        """
+                    )
+                    await conn.commit()
+                except BaseException:
+                    await conn.close()
+                    raise
+                self._checkpointer = checkpointer
+                self._checkpointed_graph = self._build_graph(checkpointer)
+        
+        return self._checkpointed_graph
+    
+    async def close(self) -> None:
+        """Close the checkpoint database."""
+        async with self._checkpoint_lock:
+            if self._checkpointer is not None:
+                await self._checkpointer.conn.close()
+                self._checkpointer = None
+                self._checkpointed_graph = None
+    
+    async def _resume_point(self, graph, job_id: str) -> Optional[StateSnapshot]:
+        """
+        Find the checkpoint a run of the job should continue from.
+        
+        Args:
+            graph: The checkpointed graph
+            job_id: Id of the run
+            
+        Returns:
+            The latest checkpoint taken after a successful node, or None to start over
+        """
+        config = {"configurable": {"thread_id": job_id}}
+        async for snapshot in graph.aget_state_history(config):
+            values = snapshot.values
+            if not snapshot.next or "handle_error" in snapshot.next or not values.get("success"):
+                continue
+            # The spooled episode is gone once the failed run was cleaned up
+            temp_path = values.get("audio_temp_path")
+            if temp_path and not Path(temp_path).exists():
+                continue
+            return snapshot
+        
+        return None
+    
+    async def discard_checkpoints(self, job_id: str) -> None:
+        """
+        Forget the checkpoints of a run.
+        
+        Args:
+            job_id: Id of the run
+        """
+        if not self.checkpoint_db:
+            return
+        
+        # Checkpoints of a run another live process holds are not ours to drop
+        if not await self._lease(job_id, take_own=True):
+            return
+        await self._checkpointer.adelete_thread(job_id)
+        await self.release_run(job_id)
+    
+    async def claim_run(self, job_id: str) -> bool:
+        """
+        Lease a run to this process before running it.
+        
+        The lease is kept, and renewed by renew_leases, until the run's
+        checkpoints are discarded, so other processes sharing the checkpoint
+        database neither resume nor delete the run in the meantime.
+        
+        Args:
+            job_id: Id of the run
+            
+        Returns:
+            False if another live process holds the run
+        """
+        return await self._lease(job_id, take_own=True)
     
-    def _get_user_preferences(self, state: WorkflowState) -> WorkflowState:
-        """Get user preferences from memory."""
+    async def release_run(self, job_id: str) -> None:
+        """
+        Give up this process's lease on a run.
+        
+        Args:
+            job_id: Id of the run
+        """
+        if not self.checkpoint_db:
+            return
+        
+        await self._get_graph()
+        async with self._checkpointer.lock:
+            conn = self._checkpointer.conn
+            await conn.execute("DELETE FROM run_leases WHERE job_id = ? AND owner = ?", (job_id, self._owner))
+            await conn.commit()
+    
+    async def renew_leases(self) -> None:
+        """Extend the leases of every run this process holds."""
+        if not self.checkpoint_db:
+            return
+        
+        await self._get_graph()
+        async with self._checkpointer.lock:
+            conn = self._checkpointer.conn
+            await conn.execute(
+                "UPDATE run_leases SET expires_at = ? WHERE owner = ?",
+                (time.time() + self.lease_seconds, self._owner)
+            )
+            await conn.commit()
+    
+    async def _lease(self, job_id: str, take_own: bool) -> bool:
+        """Atomically lease a run that is unleased, expired or, if take_own, already ours."""
+        if not self.checkpoint_db:
+            return True
+        
+        await self._get_graph()
+        now = time.time()
+        async with self._checkpointer.lock:
+            conn = self._checkpointer.conn
+            cursor = await conn.execute(
+                """
+                INSERT INTO run_leases (job_id, owner, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT (job_id) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+                WHERE run_leases.expires_at < ? OR (? AND run_leases.owner = excluded.owner)
+                """,
+                (job_id, self._owner, now + self.lease_seconds, now, take_own)
+            )
+            claimed = cursor.rowcount > 0
+            await conn.commit()
+        return claimed
+    
+    async def recover_interrupted_runs(self) -> List[Tuple[str, PodcastRequest, Dict[str, Any]]]:
+        """
+        Find runs that were interrupted before reaching the end of the graph.
+        
+        Only runs whose lease has expired, because the process running them
+        died, are considered; each is leased to this process before it is
+        returned. Checkpoints of such runs that did reach the end, but failed,
+        are dropped since nothing is left to retry them.
+        
+        Returns:
+            Job id, request and run metadata of each interrupted run
+        """
+        if not self.checkpoint_db:
+            return []
+        
+        graph = await self._get_graph()
+        job_ids = []
+        async for checkpoint in self._checkpointer.alist(None):
+            job_id = checkpoint.config["configurable"]["thread_id"]
+            if job_id not in job_ids:
+                job_ids.append(job_id)
+        
+        interrupted = []
+        for job_id in job_ids:
+            # Runs of live processes, this one included, are left alone
+            if not await self._lease(job_id, take_own=False):
+                continue
+            
+            latest = await graph.aget_state({"configurable": {"thread_id": job_id}})
+            request = latest.values.get("request")
+            if latest.next and request is not None:
+                interrupted.append((job_id, request, dict(latest.metadata or {})))
+            else:
+                await self.discard_checkpoints(job_id)
+        
+        # Leases of dead processes' runs that never wrote a checkpoint
+        async with self._checkpointer.lock:
+            conn = self._checkpointer.conn
+            await conn.execute("DELETE FROM run_leases WHERE expires_at < ?", (time.time(),))
+            await conn.commit()
+        
+        return interrupted
+    
+    async def _get_user_preferences(self, state: WorkflowState) -> Dict[str, Any]:
+        """Get the requesting user's preferences from memory."""
         try:
-            user_preferences = memory_store.get_user_preferences()
-            state["user_preferences"] = user_preferences
-            state["timestamp"] = time.time()
-            state["success"] = True
-            state["error_message"] = ""
-            print("Returning state keys from generate_script: user preference", state.keys())
-
-            return state
+            await memory_store.load(state.get("user_id"))
+            return {"user_preferences": memory_store.get_user_preferences(state.get("user_id"))}
         except Exception as e:
-            state["success"] = False
-            state["error_message"] = f"Failed to get user preferences: {str(e)}"
-            return state
+            # The script can be written without preferences
+            print(f"Failed to get user preferences: {str(e)}")
+            return {"user_preferences": {}}
     
-    def _generate_script(self, state: WorkflowState) -> WorkflowState:
+    async def _check_user(self, state: WorkflowState) -> Dict[str, Any]:
+        """Check that the user who requested the run still has an account."""
+        user_id = state.get("user_id")
+        if not user_id:
+            return {"success": True, "error_message": ""}
+        
+        try:
+            user = await asyncio.to_thread(lambda: User.objects(id=user_id).first())
+        except Exception as e:
+            return {"success": False, "error_message": f"Failed to check user: {str(e)}"}
+        
+        if user is None:
+            return {"success": False, "error_message": "User account no longer exists"}
+        return {"success": True, "error_message": ""}
+    
+    async def _generate_script(self, state: WorkflowState) -> Dict[str, Any]:
         """Generate the podcast script."""
+        # A failed user check reaches error handling before any tokens are spent
+        if not state.get("success"):
+            return {}
+        
         try:
             request = state["request"]
             user_preferences = state.get("user_preferences", {})
             
-            import asyncio
-            script = None
-            try:
-                script = asyncio.run(self.script_agent.generate_script(
-                    topic=request.topic,
-                    tone=request.tone,
-                    duration_minutes=request.duration_minutes,
-                    user_preferences=user_preferences
-                ))
-            except Exception as e:
-                state["success"] = False
-                state["error_message"] = f"Failed to generate script: {str(e)}"
-                return state
-            state["script"] = script
-            state["success"] = True
-            state["error_message"] = ""
-            print("Returning state keys from generate_script: generate script", state.keys())
-
-            return state
+            cache_key = script_cache.make_key(
+                topic=request.topic,
+                tone=request.tone,
+                duration_minutes=request.duration_minutes,
+                model=self.script_agent.model,
+                prompt_version=self.script_agent.prompt_version
+            )
+            
+            # A script generated beforehand (e.g. in bulk) is used as is
+            script = state.get("script") or None
+            if script is None and request.cache_mode == CacheMode.REUSE:
+                try:
+                    script = await asyncio.to_thread(script_cache.get, cache_key)
+                except Exception as e:
+                    print(f"Script cache lookup failed: {str(e)}")
+            
+            if script is None:
+                if self.pipeline_tts:
+                    script = await self._stream_script_to_tts(state)
+                else:
+                    script = await self.script_agent.generate_script(
+                        topic=request.topic,
+                        tone=request.tone,
+                        duration_minutes=request.duration_minutes,
+                        user_preferences=user_preferences
+                    )
+                
+                try:
+                    await asyncio.to_thread(script_cache.put, cache_key, script)
+                except Exception as e:
+                    print(f"Script cache store failed: {str(e)}")
+            
+            return {"script": script, "success": True, "error_message": ""}
             
         except Exception as e:
-            state["success"] = False
-            state["error_message"] = f"Failed to generate script: {str(e)}"
-            return state
+            return {"success": False, "error_message": f"Failed to generate script: {str(e)}"}
     
-    def _generate_audio(self, state: WorkflowState) -> WorkflowState:
+    async def _stream_script_to_tts(self, state: WorkflowState) -> str:
+        """
+        Stream the script from GPT-4, feeding closed segments into a TTS pipeline.
+        
+        The pipeline is kept for the generate_audio node, which awaits its result.
+        
+        Args:
+            state: The workflow state
+            
+        Returns:
+            The complete, validated script
+        """
+        request = state["request"]
+        pipeline = self.tts_agent.start_pipeline(
+            voice=request.voice,
+            segment_dir=audio_utils.get_segment_dir(state["job_id"]),
+            output_format="mp3",
+            on_segment=self._segment_notifier(state["job_id"])
+        )
+        self._pipelines[state["job_id"]] = pipeline
+        
+        try:
+            chunks = []
+            async for delta in self.script_agent.stream_script(
+                topic=request.topic,
+                tone=request.tone,
+                duration_minutes=request.duration_minutes,
+                user_preferences=state.get("user_preferences", {})
+            ):
+                chunks.append(delta)
+                pipeline.feed(delta)
+            
+            script = self.script_agent.validate_script("".join(chunks))
+            pipeline.close()
+            return script
+            
+        except Exception:
+            self._discard_pipeline(state["job_id"])
+            raise
+    
+    def _segment_notifier(self, job_id: str) -> Optional[SegmentCallback]:
+        """
+        Build a callback announcing each finished segment for progressive playback.
+        
+        Args:
+            job_id: The run id
+            
+        Returns:
+            The callback, or None if nobody is listening for segments of this run
+        """
+        listener = self._segment_listeners.get(job_id)
+        if listener is None:
+            return None
+        
+        async def notify(index: int) -> None:
+            listener(index)
+        
+        return notify
+    
+    def _discard_pipeline(self, job_id: str) -> None:
+        """Cancel and forget the TTS pipeline of a run, if any."""
+        pipeline = self._pipelines.pop(job_id, None)
+        if pipeline is not None:
+            pipeline.cancel()
+    
+    async def _generate_audio(self, state: WorkflowState) -> Dict[str, Any]:
         """Generate audio from the script."""
         try:
-            print("Returning state keys from generate_script: generate audio", state.keys())
             request = state["request"]
-            script = state["script"]
             
-            import asyncio
-            audio_data = None
-            try:
-                audio_data = asyncio.run(self.tts_agent.generate_audio(
-                    script=script,
+            # Audio is spooled to disk; only the file reference goes into state
+            temp_path = audio_utils.get_temp_path(state["job_id"])
+            pipeline = self._pipelines.pop(state["job_id"], None)
+            if pipeline is not None:
+                # Most segments were synthesized while the script was streaming
+                await pipeline.result(temp_path)
+            else:
+                await self.tts_agent.generate_audio(
+                    script=state["script"],
                     voice=request.voice,
-                    output_format="mp3"
-                ))
-            except Exception as e:
-                state["success"] = False
-                state["error_message"] = f"Failed to generate audio: {str(e)}"
-                print("Returning state keys from generate_audio error: ", state.keys())
-                return state
-            state["audio_data"] = audio_data
-            state["success"] = True
-            state["error_message"] = ""
-            print("Returning state keys from generate_script:", state.keys())
-
-            return state
+                    segment_dir=audio_utils.get_segment_dir(state["job_id"]),
+                    output_path=temp_path,
+                    output_format="mp3",
+                    on_segment=self._segment_notifier(state["job_id"])
+                )
+            
+            return {"audio_temp_path": str(temp_path), "success": True, "error_message": ""}
             
         except Exception as e:
-            state["success"] = False
-            state["error_message"] = f"Failed to generate audio: {str(e)}"
-            return state
+            return {"success": False, "error_message": f"Failed to generate audio: {str(e)}"}
     
-    def _save_audio(self, state: WorkflowState) -> WorkflowState:
+    async def _save_audio(self, state: WorkflowState) -> Dict[str, Any]:
         """Save the audio file."""
         try:
             request = state["request"]
-            audio_data = state["audio_data"]
-            timestamp = state["timestamp"]
             
             # Generate filename
             filename = audio_utils.generate_filename(
                 topic=request.topic,
                 voice=request.voice.value,
-                timestamp=timestamp
+                timestamp=state["timestamp"],
+                unique_id=state["job_id"]
             )
-            file_path = audio_utils.get_file_path(filename)
-            # print(file_path)
-            file_path.parent.mkdir(exist_ok=True)
-            # Write the actual audio data to the file
-            with open(file_path, "wb") as f:
-                f.write(audio_data)
-            # Calculate duration
-            duration_seconds = self.tts_agent.estimate_audio_duration(state["script"])
-
-            state["audio_file_path"] = str(filename)
-            state["duration_seconds"] = duration_seconds
-            state["success"] = True
-            state["error_message"] = ""
-            print("Returning state keys from generate_script:", state.keys())
-
-            return state
+            # Atomically move the finished episode to its final name
+            os.replace(state["audio_temp_path"], audio_utils.get_file_path(filename))
+            
+            return {
+                "audio_file_path": str(filename),
+                "duration_seconds": self.tts_agent.estimate_audio_duration(state["script"]),
+                "success": True,
+                "error_message": ""
+            }
             
         except Exception as e:
-            state["success"] = False
-            state["error_message"] = f"Failed to save audio: {str(e)}"
-            return state
+            return {"success": False, "error_message": f"Failed to save audio: {str(e)}"}
     
-    def _update_memory(self, state: WorkflowState) -> WorkflowState:
+    async def _update_memory(self, state: WorkflowState) -> Dict[str, Any]:
         """Update memory with the generation result."""
         try:
             request = state["request"]
-            timestamp = state["timestamp"]
-            duration_seconds = state["duration_seconds"]
-            success = state["success"]
             
             # Create memory entry
             memory_entry = MemoryEntry(
                 topic=request.topic,
                 tone=request.tone,
                 voice=request.voice,
-                timestamp=timestamp,
-                duration_seconds=duration_seconds,
-                success=success
+                timestamp=state["timestamp"],
+                duration_seconds=state["duration_seconds"],
+                success=state["success"]
             )
             
             # Add to memory
-            memory_store.add_entry(memory_entry)
-            print("Returning state keys from generate_script:", state.keys())
-
-            return state
+            memory_store.add_entry(memory_entry, user_id=state.get("user_id"))
+            return {}
             
         except Exception as e:
             # Don't fail the workflow for memory errors
-            state["error_message"] = f"Warning: Failed to update memory: {str(e)}"
-            return state
+            return {"error_message": f"Warning: Failed to update memory: {str(e)}"}
+    
+    async def _persist_podcast(self, state: WorkflowState) -> Dict[str, Any]:
+        """Record the saved episode in the user's podcast history."""
+        user_id = state.get("user_id")
+        if not user_id:
+            return {}
+        
+        try:
+            request = state["request"]
+            podcast = Podcast(
+                title=request.topic,
+                topic=request.topic,
+                audio_url=state["audio_file_path"],
+                transcript=state["script"],
+                duration_seconds=state["duration_seconds"],
+                created_by=ObjectId(user_id)
+            )
+            await asyncio.to_thread(podcast.save)
+            return {"podcast_id": str(podcast.id)}
+        except Exception as e:
+            # The episode is on disk either way
+            print(f"Failed to persist podcast: {str(e)}")
+            return {}
     
-    def _handle_error(self, state: WorkflowState) -> WorkflowState:
+    async def _handle_error(self, state: WorkflowState) -> Dict[str, Any]:
         """Handle errors in the workflow."""
         # Update memory with failed attempt
         try:
@@ -250,43 +596,104 @@ class PodcastWorkflow:
                 success=False
             )
             
-            memory_store.add_entry(memory_entry)
+            memory_store.add_entry(memory_entry, user_id=state.get("user_id"))
         except:
             pass  # Ignore memory errors in error handling
-        print("Returning state keys from generate_script:", state.keys())
-
-        return state
+        
+        # Drop a spooled episode that never got its final name
+        temp_path = state.get("audio_temp_path")
+        if temp_path:
+            Path(temp_path).unlink(missing_ok=True)
+        
+        return {}
     
     def _should_continue(self, state: WorkflowState) -> str:
         """Determine if the workflow should continue or handle error."""
         return "continue" if state["success"] else "error"
     
-    async def generate_podcast(self, request: PodcastRequest) -> PodcastResponse:
+    def _after_save(self, state: WorkflowState) -> List[str]:
+        """Fan out to the bookkeeping of a saved episode, or handle the error."""
+        if not state["success"]:
+            return ["handle_error"]
+        return ["update_memory", "persist_podcast"]
+    
+    async def generate_podcast(
+        self,
+        request: PodcastRequest,
+        progress_callback: Optional[ProgressCallback] = None,
+        job_id: Optional[str] = None,
+        segment_callback: Optional[SegmentReadyCallback] = None,
+        script: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        user_id: Optional[str] = None
+    ) -> PodcastResponse:
         """
         Generate a podcast using the workflow.
         
         Args:
             request: The podcast generation request
+            progress_callback: Optional callable invoked with (stage, progress)
+                after each workflow node completes
+            job_id: Optional id identifying this run (generated if omitted)
+            segment_callback: Optional callable invoked with the index of each
+                audio segment once it is saved under audio_utils.get_segment_dir
+            script: Optional script generated beforehand, skipping script generation
+            metadata: Optional data stored with the run's checkpoints
+            user_id: Optional id of the requesting user, whose account is checked
+                before the script is generated and who owns the saved episode
+            
+        If an earlier run with the same job id failed or was interrupted, the
+        workflow resumes after its last successfully completed node instead of
+        starting over, so a TTS failure does not regenerate the script.
+        
+        Cancelling the calling task aborts the OpenAI requests in flight and
+        removes the run's partial audio files. Checkpoints of completed stages
+        are kept for a retry unless keep_cancelled_stages is disabled.
             
         Returns:
             Podcast generation response
         """
+        job_id = job_id or uuid.uuid4().hex
+        if segment_callback:
+            self._segment_listeners[job_id] = segment_callback
+        final_state: Dict[str, Any] = {}
+        
         try:
             # Initialize state
             initial_state = WorkflowState(
                 request=request,
-                script="",
-                audio_data=b"",
+                job_id=job_id,
+                script=script or "",
+                audio_temp_path="",
                 audio_file_path="",
                 duration_seconds=0.0,
                 success=False,
                 error_message="",
                 user_preferences={},
-                timestamp=time.time()
+                timestamp=time.time(),
+                user_id=user_id
             )
             
-            # Run the workflow
-            final_state = await self.graph.ainvoke(initial_state)
+            graph = await self._get_graph()
+            config = {"configurable": {"thread_id": job_id}, "metadata": metadata or {}}
+            graph_input = initial_state
+            final_state = dict(initial_state)
+            
+            if graph is not self.graph:
+                resume_point = await self._resume_point(graph, job_id)
+                if resume_point is not None:
+                    graph_input = None
+                    config = {**resume_point.config, "metadata": metadata or {}}
+                    final_state = dict(resume_point.values)
+            
+            # Run the workflow, reporting each completed node
+            async with contextlib.aclosing(graph.astream(graph_input, config, stream_mode="updates")) as updates:
+                async for update in updates:
+                    for stage, values in update.items():
+                        if values:
+                            final_state.update(values)
+                        if progress_callback:
+                            progress_callback(stage, STAGE_PROGRESS.get(stage, 0.0))
             
             # Create response
             response = PodcastResponse(
@@ -298,8 +705,20 @@ class PodcastWorkflow:
                 voice_used=request.voice.value
             )
             
+            # Only failed runs are worth resuming
+            if response.success:
+                try:
+                    await self.discard_checkpoints(job_id)
+                except Exception as e:
+                    print(f"Failed to discard checkpoints: {str(e)}")
+            
             return response
             
+        except asyncio.CancelledError:
+            self._discard_pipeline(job_id)
+            await self._clean_up_cancelled(job_id, final_state)
+            raise
+        
         except Exception as e:
             return PodcastResponse(
                 success=False,
@@ -307,6 +726,31 @@ class PodcastWorkflow:
                 topic=request.topic,
                 voice_used=request.voice.value
             )
+        
+        finally:
+            self._discard_pipeline(job_id)
+            self._segment_listeners.pop(job_id, None)
+    
+    async def _clean_up_cancelled(self, job_id: str, state: Dict[str, Any]) -> None:
+        """
+        Remove the partial files of a cancelled run.
+        
+        Args:
+            job_id: Id of the run
+            state: State of the run as of its last completed node
+        """
+        audio_utils.remove_segment_dir(job_id)
+        
+        # A spooled episode from a completed audio stage is what a retry resumes from
+        temp_path = audio_utils.get_temp_path(job_id)
+        if not self.keep_cancelled_stages or state.get("audio_temp_path") != str(temp_path):
+            temp_path.unlink(missing_ok=True)
+        
+        if not self.keep_cancelled_stages:
+            try:
+                await self.discard_checkpoints(job_id)
+            except Exception as e:
+                print(f"Failed to discard checkpoints: {str(e)}")
 
 
 # Global workflow instance
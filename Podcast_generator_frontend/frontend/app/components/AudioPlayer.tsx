@@ -2,23 +2,35 @@ import React, { useRef, useState, useEffect } from "react";
 
 type Props = {
   src?: string;
+  streamSrc?: string;
   isLoading?: boolean;
   onReset?: () => void;
 };
 
-export default function AudioPlayer({ src, isLoading, onReset }: Props) {
+export default function AudioPlayer({ src, streamSrc, isLoading, onReset }: Props) {
   const audioRef = useRef<HTMLAudioElement>(null);
   const [playing, setPlaying] = useState(false);
   const [progress, setProgress] = useState(0);
   const [duration, setDuration] = useState(0);
+  // Position to pick up from when the source switches mid-playback
+  const resumeRef = useRef<{ time: number; playing: boolean } | null>(null);
+
+  // Play the progressive stream while generating, then switch to the finished
+  // file so the stream ends and the server can delete its segments
+  const playbackSrc = src || streamSrc;
 
   useEffect(() => {
-    if (!src) {
+    if (!playbackSrc) {
+      resumeRef.current = null;
       setPlaying(false);
       setProgress(0);
       setDuration(0);
+    } else if (progress > 0) {
+      // The element has already reset to the new source, so use the last reported time
+      resumeRef.current = { time: progress, playing };
     }
-  }, [src]);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [playbackSrc]);
 
   const handlePlayPause = () => {
     if (!audioRef.current) return;
@@ -38,6 +50,15 @@ export default function AudioPlayer({ src, isLoading, onReset }: Props) {
   const handleLoadedMetadata = () => {
     if (!audioRef.current) return;
     setDuration(audioRef.current.duration);
+
+    const resume = resumeRef.current;
+    resumeRef.current = null;
+    if (resume) {
+      audioRef.current.currentTime = resume.time;
+      if (resume.playing) {
+        audioRef.current.play();
+      }
+    }
   };
 
   const handleSeek = (e: React.ChangeEvent<HTMLInputElement>) => {
@@ -47,11 +68,11 @@ export default function AudioPlayer({ src, isLoading, onReset }: Props) {
     setProgress(val);
   };
 
-  if (!src && !isLoading) return null;
+  if (!playbackSrc && !isLoading) return null;
 
   return (
     <div className="w-full max-w-2xl mx-auto mt-8 glass-effect-strong shadow-2xl rounded-3xl p-6 animate-slide-up">
-      {isLoading ? (
+      {isLoading && !playbackSrc ? (
         <div className="flex flex-col items-center gap-4 py-8">
           <div className="relative">
             <div className="w-16 h-16 bg-gradient-to-br from-primary-400 to-secondary-400 rounded-full flex items-center justify-center animate-pulse-glow">
@@ -67,11 +88,11 @@ export default function AudioPlayer({ src, isLoading, onReset }: Props) {
             <p className="text-gray-300 text-sm">Creating high-quality audio content...</p>
           </div>
         </div>
-      ) : src ? (
+      ) : playbackSrc ? (
         <>
           <audio
             ref={audioRef}
-            src={src}
+            src={playbackSrc}
             preload="auto"
             onTimeUpdate={handleTimeUpdate}
             onLoadedMetadata={handleLoadedMetadata}
@@ -81,8 +102,8 @@ export default function AudioPlayer({ src, isLoading, onReset }: Props) {
           
           {/* Header */}
           <div className="text-center mb-6">
-            <h3 className="text-xl font-bold text-white mb-2">🎧 Your Podcast is Ready!</h3>
-            <p className="text-gray-300 text-sm">Listen to your generated podcast episode</p>
+            <h3 className="text-xl font-bold text-white mb-2">{src ? "🎧 Your Podcast is Ready!" : "🎧 Your Podcast is Streaming"}</h3>
+            <p className="text-gray-300 text-sm">{src ? "Listen to your generated podcast episode" : "Start listening while the rest of the episode is generated"}</p>
           </div>
 
           {/* Audio Controls */}
@@ -126,6 +147,7 @@ export default function AudioPlayer({ src, isLoading, onReset }: Props) {
 
             {/* Action Buttons */}
             <div className="flex gap-3 justify-center">
+              {src && (
               <a
                 href={src}
                 download
@@ -139,6 +161,7 @@ export default function AudioPlayer({ src, isLoading, onReset }: Props) {
                   Download
                 </span>
               </a>
+              )}
               
               {onReset && (
                 <button 
@@ -29,6 +29,7 @@ const DUMMY_TONES = [
 
 const BACKEND_URL = "https://podcast-generator-qzhs.onrender.com";
 // const BACKEND_URL = "http://localhost:10000";
+const JOB_POLL_INTERVAL_MS = 2000;
 
 export default function PodcastForm() {
   const [topic, setTopic] = useState("");
@@ -37,6 +38,7 @@ export default function PodcastForm() {
   const [duration, setDuration] = useState(5);
   const [loading, setLoading] = useState(false);
   const [audioPath, setAudioPath] = useState<string | undefined>();
+  const [streamPath, setStreamPath] = useState<string | undefined>();
 
   const [creditsPopup, setCreditsPopup] = useState(false);
   const [credits, setCredits] = useState('');
@@ -52,10 +54,23 @@ export default function PodcastForm() {
   };
 
   const token = Cookies.get("token");
+
+  // Poll the generation job until it completes, fails or is cancelled
+  const waitForJob = async (jobId: string, headers: Record<string, string>) => {
+    while (true) {
+      await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+      const res = await axios.get(`${BACKEND_URL}/api/v1/jobs/${jobId}`, { timeout: 30000, headers });
+      if (["completed", "failed", "cancelled"].includes(res.data.status)) {
+        return res.data;
+      }
+    }
+  };
+
   const handleSubmit = async (e: React.FormEvent) => {
     e.preventDefault();
     setLoading(true);
     setAudioPath(undefined);
+    setStreamPath(undefined);
     try {
 
       const headers = {
@@ -76,13 +91,19 @@ export default function PodcastForm() {
           voice,
           duration_minutes: duration,
         },
-        { timeout: 180000, headers }
+        { timeout: 30000, headers }
       );
-      if (res.data && res.data.success && res.data.audio_file_path) {
-        console.log(res.data.audio_file_path);
-        console.log(res.data);
-        setAudioPath(`${BACKEND_URL}/api/v1/download/${res.data.audio_file_path}`);
+      // Start playback from the first synthesized segment while the rest is generated
+      setStreamPath(`${BACKEND_URL}/api/v1/jobs/${res.data.job_id}/audio?access_token=${encodeURIComponent(token ?? "")}`);
+      const job = await waitForJob(res.data.job_id, headers);
+      if (job && job.status === "completed" && job.audio_file_path) {
+        console.log(job.audio_file_path);
+        console.log(job);
+        setAudioPath(`${BACKEND_URL}/api/v1/download/${job.audio_file_path}`);
         toast.success("Podcast generated!");
+      } else if (job && job.status === "cancelled") {
+        setStreamPath(undefined);
+        toast.error("Podcast generation was cancelled.");
       } else {
         toast.error("Failed to generate podcast. Try again.");
       }
@@ -95,6 +116,7 @@ export default function PodcastForm() {
 
   const handleReset = () => {
     setAudioPath(undefined);
+    setStreamPath(undefined);
     setTopic("");
     setVoice(DUMMY_VOICES[0].value);
     setTone(DUMMY_TONES[0].value);
@@ -198,7 +220,7 @@ export default function PodcastForm() {
           </div>}
       </form>
       
-      <AudioPlayer src={audioPath} isLoading={loading} onReset={audioPath ? handleReset : undefined} />
+      <AudioPlayer src={audioPath} streamSrc={streamPath} isLoading={loading} onReset={audioPath ? handleReset : undefined} />
     </div>
     </div>
 